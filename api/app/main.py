@@ -1,10 +1,68 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from .services.executor import ServiceOverloaded, service_executor
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources before serving: the Mongo pool, the Michelin dataset, the recommender and the vector index"""
+    from .routes.search import michelin_service, semantic_search, map_vector_index
+    from .services.recommendation_service import recommendation_service
+    from .services.mongodb import mongodb
+    from .services.mongo_search import ensure_search_indexes
+    from .services.rollups import prepare_rollups
+
+    # One pooled client for the whole process; routes borrow connections from it
+    if mongodb.configured:
+        db = await mongodb.async_connect()
+        try:
+            backfilled = await ensure_search_indexes(db.restaurants)
+            if backfilled:
+                print(f"Added search fields to {backfilled} restaurants")
+        except Exception as e:
+            print(f"Could not prepare the restaurant search indexes: {e}")
+        try:
+            rebuilt = await prepare_rollups(db)
+            if rebuilt:
+                print(f"Built stats rollups: {rebuilt}")
+        except Exception as e:
+            print(f"Could not prepare the stats rollups: {e}")
+    try:
+        await asyncio.to_thread(michelin_service.load)
+    except Exception as e:
+        # Requests will retry the load lazily
+        print(f"Could not preload the Michelin dataset: {e}")
+    try:
+        await asyncio.to_thread(recommendation_service.load)
+    except Exception as e:
+        # Recommendation endpoints answer 503 until a model is trained (make train-models)
+        print(f"Could not load the recommendation model: {e}")
+    try:
+        await asyncio.to_thread(semantic_search.fetch)
+    except Exception as e:
+        # Fall back to whatever index is already on disk
+        print(f"Could not fetch the vector index: {e}")
+    try:
+        await asyncio.to_thread(semantic_search.load)
+        if michelin_service.loaded:
+            await asyncio.to_thread(map_vector_index)
+    except Exception as e:
+        # /search/semantic answers 503 until the pipeline has built (and published) an index
+        print(f"Could not load the vector index: {e}")
+    refresher = asyncio.create_task(michelin_service.refresh_periodically())
+    yield
+    refresher.cancel()
+    recommendation_service.close()
+    service_executor.shutdown()
+    mongodb.close()
 
 app = FastAPI(
     title="MichelinMind API",
     description="AI-Powered Michelin Restaurant Discovery API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -16,6 +74,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(ServiceOverloaded)
+async def service_overloaded(request: Request, exc: ServiceOverloaded):
+    """Shed load once the service executor's queue is full"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after))},
+    )
+
 @app.get("/")
 async def root():
     return {
@@ -25,7 +92,10 @@ async def root():
     }
 
 # Import and include routers
-from .routes import restaurants, search
+from .routes import health, recommendations, restaurants, search, stats
 
 app.include_router(restaurants.router, prefix="/api/v1/restaurants", tags=["restaurants"])
 app.include_router(search.router, prefix="/api/v1/search", tags=["search"])
+app.include_router(recommendations.router, prefix="/api/v1/recommendations", tags=["recommendations"])
+app.include_router(stats.router, prefix="/api/v1/stats", tags=["stats"])
+app.include_router(health.router, tags=["health"])
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, HttpUrl
-from typing import List, Optional
+from pydantic import BaseModel, Field, HttpUrl, field_validator
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class Location(BaseModel):
@@ -24,6 +24,8 @@ class MichelinInfo(BaseModel):
 class GoogleInfo(BaseModel):
     google_rating: Optional[float] = None
     google_reviews: Optional[int] = None
+    fetched_at: Optional[datetime] = None
+    content_hash: Optional[str] = None
 
 class Restaurant(BaseModel):
     Name: str
@@ -41,9 +43,14 @@ class RestaurantUpdate(BaseModel):
     google_info: Optional[GoogleInfo] = None
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-class RestaurantResponse(Restaurant):
+class StoredRestaurant(Restaurant):
     id: str = Field(..., alias="_id")
 
+    @field_validator("id", mode="before")
+    @classmethod
+    def object_id_to_str(cls, value):
+        return str(value)
+
 class MichelinRestaurant(BaseModel):
     name: str
     address: Optional[str] = None
@@ -70,9 +77,51 @@ class RestaurantSearchParams(BaseModel):
     facilities: Optional[List[str]] = None
     skip: int = 0
     limit: int = 10
+    cursor: Optional[str] = None
+    mode: str = "lexical"
 
 class RestaurantResponse(BaseModel):
     results: List[MichelinRestaurant]
     total: int
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
+
+class FacetCountsResponse(BaseModel):
+    total: int
+    facilities: Dict[str, int]
+
+class GeoPoint(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+class NearestBatchRequest(BaseModel):
+    points: List[GeoPoint] = Field(..., max_length=1000)
+    limit: int = Field(5, ge=1, le=100)
+
+class CuisineStats(BaseModel):
+    cuisine: Optional[str] = None
+    total_restaurants: int = 0
+    google_rating: Optional[float] = None
+    michelin_rating: Dict[str, int] = Field(default_factory=dict)
+
+class CityStats(BaseModel):
+    city: Optional[str] = None
+    country: Optional[str] = None
+    count: int = 0
+
+class Recommendation(BaseModel):
+    restaurant_id: str
+    score: float
+
+class RecommendationResponse(BaseModel):
+    restaurant_id: str
+    recommendations: List[Recommendation]
+
+class BatchRecommendationRequest(BaseModel):
+    restaurant_ids: List[str] = Field(..., max_length=1000)
+    limit: int = Field(5, ge=1, le=100)
+
+class BatchRecommendationResponse(BaseModel):
+    results: List[RecommendationResponse]
+    missing: List[str] = Field(default_factory=list)
@@ -0,0 +1,46 @@
+"""
+Prepare the shared Michelin dataset snapshot before starting API workers.
+
+Downloads the CSV if there is no snapshot yet, builds every index and
+pre-rendered column, and saves them all into the snapshot directory
+(MICHELIN_SNAPSHOT_DIR). Each uvicorn worker then only memory-maps those files
+read-only at startup, so N workers share one copy of the data through the page
+cache instead of each parsing and indexing its own. Put MICHELIN_SNAPSHOT_DIR
+on a tmpfs such as /dev/shm to keep the shared copy in memory only.
+
+Usage:
+    python -m api.app.preload && uvicorn api.app.main:app --workers 4
+"""
+import os
+import time
+from typing import Dict
+from .services.michelin_service import MichelinService
+
+def preload(service: MichelinService) -> Dict:
+    """Make sure the current snapshot holds the dataset with all its artifacts; returns a summary"""
+    start = time.perf_counter()
+    store = service.load()
+    rebuilt = store.unsaved_artifacts()
+    if rebuilt:
+        # A snapshot from before these artifacts were saved: write a complete one
+        with service.snapshot.lock():
+            meta = service.snapshot.read_meta()
+            service.snapshot.save(store, etag=meta.get('etag'), last_modified=meta.get('last_modified'))
+    path = service.snapshot.current_path()
+    size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return {
+        "path": path,
+        "version": store.version,
+        "restaurants": store.size,
+        "rebuilt": rebuilt,
+        "bytes": size,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+if __name__ == "__main__":
+    summary = preload(MichelinService())
+    print(
+        f"Snapshot {summary['path']} ({summary['version']}): {summary['restaurants']} restaurants, "
+        f"{summary['bytes'] / 1e6:.1f} MB, ready in {summary['seconds']}s"
+        + (f", rebuilt {', '.join(summary['rebuilt'])}" if summary['rebuilt'] else "")
+    )
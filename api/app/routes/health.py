@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Response
+from ..services.executor import service_executor
+from ..services.mongodb import mongodb
+from .search import michelin_service, response_cache
+
+router = APIRouter()
+
+@router.get("/health")
+async def health():
+    """Liveness probe: the process is up and serving."""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def ready(response: Response):
+    """Readiness probe: the Michelin dataset is loaded and MongoDB (if configured) answers a ping."""
+    checks = {"dataset": michelin_service.loaded}
+    if mongodb.configured:
+        checks["mongodb"] = await mongodb.ping()
+    is_ready = all(checks.values())
+    if not is_ready:
+        response.status_code = 503
+    return {"status": "ready" if is_ready else "not ready", "checks": checks}
+
+@router.get("/metrics")
+async def metrics():
+    """Connection pool utilization, search cache counters and service executor queue depth."""
+    return {
+        "mongodb_pool": mongodb.metrics(),
+        "search_cache": response_cache.stats(),
+        "service_executor": service_executor.metrics(),
+    }
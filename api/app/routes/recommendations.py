@@ -0,0 +1,41 @@
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Tuple
+from ..models.schemas import (
+    Recommendation, RecommendationResponse, BatchRecommendationRequest, BatchRecommendationResponse
+)
+from ..services.recommendation_service import (
+    recommendation_service, RecommendationUnavailable, RecommendationTimeout
+)
+
+router = APIRouter()
+
+def _response(restaurant_id: str, ranked: List[Tuple[str, float]]) -> RecommendationResponse:
+    return RecommendationResponse(
+        restaurant_id=restaurant_id,
+        recommendations=[Recommendation(restaurant_id=similar_id, score=score) for similar_id, score in ranked],
+    )
+
+@router.get("/{restaurant_id}", response_model=RecommendationResponse)
+async def recommend(restaurant_id: str, response: Response, limit: int = Query(5, ge=1, le=100)):
+    """Restaurants most similar to `restaurant_id` (cosine similarity of their TF-IDF vectors)"""
+    try:
+        ranked, elapsed_ms = await recommendation_service.recommend(restaurant_id, limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Restaurant not found in the recommendation model")
+    except (RecommendationUnavailable, RecommendationTimeout) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    response.headers["Server-Timing"] = f"recommend;dur={elapsed_ms:.2f}"
+    return _response(restaurant_id, ranked)
+
+@router.post("/batch", response_model=BatchRecommendationResponse)
+async def recommend_batch(request: BatchRecommendationRequest, response: Response):
+    """Recommendations for several restaurants in one call; unknown ids are listed in `missing`"""
+    try:
+        results, elapsed_ms = await recommendation_service.recommend_many(request.restaurant_ids, request.limit)
+    except (RecommendationUnavailable, RecommendationTimeout) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    response.headers["Server-Timing"] = f"recommend;dur={elapsed_ms:.2f}"
+    return BatchRecommendationResponse(
+        results=[_response(restaurant_id, ranked) for restaurant_id, ranked in results.items()],
+        missing=[restaurant_id for restaurant_id in request.restaurant_ids if restaurant_id not in results],
+    )
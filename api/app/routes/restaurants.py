@@ -1,78 +1,138 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Optional
-from ..models.schemas import RestaurantCreate, RestaurantUpdate, RestaurantResponse
-from ..services.mongodb import mongodb
+from ..models.schemas import RestaurantCreate, RestaurantUpdate, StoredRestaurant
+from ..services.mongodb import get_database
+from ..services.mongo_search import build_search_query
+from ..services.pagination import decode_cursor, encode_cursor
+from ..services.rollups import apply_rollup_delta, update_rollups
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from common.restaurants import restaurant_key, shadow_fields, with_shadow_fields
 
 router = APIRouter()
 
-@router.get("/", response_model=List[RestaurantResponse])
-async def get_restaurants(skip: int = 0, limit: int = 10):
-    """Get all restaurants with pagination"""
-    db = await mongodb.async_connect()
-    restaurants = await db.restaurants.find().skip(skip).limit(limit).to_list(length=limit)
-    return restaurants
+# Filtered "estimated" totals stop counting here
+ESTIMATED_COUNT_CAP = 1000
 
-@router.get("/{restaurant_id}", response_model=RestaurantResponse)
-async def get_restaurant(restaurant_id: str):
+async def _paginate(collection, query: dict, response: Response, limit: int,
+                    cursor: Optional[str], skip: int, total: str) -> list:
+    """Keyset pagination on _id: stable order, and deep pages cost the same as the first one.
+
+    The next page's cursor goes in the X-Next-Cursor header and, if requested,
+    the match count in X-Total-Count, so the JSON body stays a plain list.
+    """
+    page_query = dict(query)
+    if cursor:
+        try:
+            page_query["_id"] = {"$gt": ObjectId(decode_cursor(cursor)["id"])}
+        except (ValueError, KeyError, InvalidId):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        documents = await collection.find(page_query).sort("_id", 1).limit(limit).to_list(length=limit)
+    else:
+        # Offset pagination is still accepted for the first hop, then cursors take over
+        documents = await collection.find(page_query).sort("_id", 1).skip(skip).limit(limit).to_list(length=limit)
+
+    if len(documents) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor({"id": str(documents[-1]["_id"])})
+    if total == "exact":
+        response.headers["X-Total-Count"] = str(await collection.count_documents(query))
+    elif total == "estimated":
+        if not query:
+            response.headers["X-Total-Count"] = str(await collection.estimated_document_count())
+        else:
+            count = await collection.count_documents(query, limit=ESTIMATED_COUNT_CAP)
+            response.headers["X-Total-Count"] = f"{count}+" if count == ESTIMATED_COUNT_CAP else str(count)
+    return documents
+
+@router.get("/", response_model=List[StoredRestaurant])
+async def get_restaurants(
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    total: str = Query("none", pattern="^(exact|estimated|none)$"),
+    db=Depends(get_database)
+):
+    """Get all restaurants with pagination (pass the X-Next-Cursor header back as `cursor`)"""
+    return await _paginate(db.restaurants, {}, response, limit, cursor, skip, total)
+
+@router.get("/search", response_model=List[StoredRestaurant])
+async def search_restaurants(
+    response: Response,
+    name: Optional[str] = None,
+    cuisine: Optional[str] = None,
+    location: Optional[str] = None,
+    price: Optional[str] = None,
+    q: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    total: str = Query("none", pattern="^(exact|estimated|none)$"),
+    db=Depends(get_database)
+):
+    """Search restaurants with various filters.
+
+    name matches a prefix of the name, cuisine and location a prefix of any of their
+    comma-separated parts, price exactly; q is a whole-word text search. All matching
+    is case and accent insensitive and served from indexes.
+    """
+    query = build_search_query(name=name, cuisine=cuisine, location=location, price=price, text=q)
+    return await _paginate(db.restaurants, query, response, limit, cursor, skip, total)
+
+@router.get("/{restaurant_id}", response_model=StoredRestaurant)
+async def get_restaurant(restaurant_id: str, db=Depends(get_database)):
     """Get a specific restaurant by ID"""
-    db = await mongodb.async_connect()
     restaurant = await db.restaurants.find_one({"_id": ObjectId(restaurant_id)})
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
     return restaurant
 
-@router.post("/", response_model=RestaurantResponse)
-async def create_restaurant(restaurant: RestaurantCreate):
+@router.post("/", response_model=StoredRestaurant)
+async def create_restaurant(restaurant: RestaurantCreate, db=Depends(get_database)):
     """Create a new restaurant"""
-    db = await mongodb.async_connect()
-    restaurant_dict = restaurant.dict()
-    result = await db.restaurants.insert_one(restaurant_dict)
+    restaurant_dict = with_shadow_fields(restaurant.dict())
+    # Same identity the pipeline upserts on, which a unique index enforces
+    restaurant_dict["restaurant_key"] = restaurant_key(restaurant_dict)
+    try:
+        result = await db.restaurants.insert_one(restaurant_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Restaurant already exists")
     created_restaurant = await db.restaurants.find_one({"_id": result.inserted_id})
+    await apply_rollup_delta(db, created_restaurant, 1)
     return created_restaurant
 
-@router.put("/{restaurant_id}", response_model=RestaurantResponse)
-async def update_restaurant(restaurant_id: str, restaurant: RestaurantUpdate):
+@router.put("/{restaurant_id}", response_model=StoredRestaurant)
+async def update_restaurant(restaurant_id: str, restaurant: RestaurantUpdate, db=Depends(get_database)):
     """Update a restaurant"""
-    db = await mongodb.async_connect()
     update_data = {k: v for k, v in restaurant.dict().items() if v is not None}
-    result = await db.restaurants.update_one(
-        {"_id": ObjectId(restaurant_id)},
-        {"$set": update_data}
-    )
-    if result.modified_count == 0:
+    update_data.update(shadow_fields(update_data.get("Name"), update_data.get("michelin_info")))
+    if "Name" in update_data or "michelin_info" in update_data:
+        # The key derives from the name, address and URL, so re-derive it from the merged document
+        current = await db.restaurants.find_one({"_id": ObjectId(restaurant_id)})
+        if current is None:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+        update_data["restaurant_key"] = restaurant_key({**current, **update_data})
+    try:
+        previous = await db.restaurants.find_one_and_update(
+            {"_id": ObjectId(restaurant_id)},
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Another restaurant already has this name and address or URL")
+    if previous is None:
         raise HTTPException(status_code=404, detail="Restaurant not found")
     updated_restaurant = await db.restaurants.find_one({"_id": ObjectId(restaurant_id)})
+    await update_rollups(db, previous, updated_restaurant)
     return updated_restaurant
 
 @router.delete("/{restaurant_id}")
-async def delete_restaurant(restaurant_id: str):
+async def delete_restaurant(restaurant_id: str, db=Depends(get_database)):
     """Delete a restaurant"""
-    db = await mongodb.async_connect()
-    result = await db.restaurants.delete_one({"_id": ObjectId(restaurant_id)})
-    if result.deleted_count == 0:
+    deleted = await db.restaurants.find_one_and_delete({"_id": ObjectId(restaurant_id)})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Restaurant not found")
+    await apply_rollup_delta(db, deleted, -1)
     return {"message": "Restaurant deleted successfully"}
-
-@router.get("/search", response_model=List[RestaurantResponse])
-async def search_restaurants(
-    name: Optional[str] = None,
-    cuisine: Optional[str] = None,
-    location: Optional[str] = None,
-    price: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 10
-):
-    """Search restaurants with various filters."""
-    db = await mongodb.async_connect()
-    query = {}
-    if name:
-        query["name"] = {"$regex": name, "$options": "i"}
-    if cuisine:
-        query["cuisine"] = {"$regex": cuisine, "$options": "i"}
-    if location:
-        query["location"] = {"$regex": location, "$options": "i"}
-    if price:
-        query["price"] = {"$regex": price, "$options": "i"}
-    restaurants = await db.restaurants.find(query).skip(skip).limit(limit).to_list(length=limit)
-    return restaurants
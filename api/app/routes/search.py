@@ -1,13 +1,67 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional, Dict
-from ..models.schemas import RestaurantSearchParams, RestaurantResponse, MichelinRestaurant
-from ..services.michelin_service import MichelinService
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.routing import APIRoute
+from typing import Callable, List, Optional, Dict
+from ..models.schemas import RestaurantSearchParams, RestaurantResponse, MichelinRestaurant, NearestBatchRequest, FacetCountsResponse
+from ..services.michelin_service import MichelinService, PrerenderedJSON
+from ..services.executor import ServiceOverloaded, service_executor
+from ..services.response_cache import create_response_cache, make_cache_key, pack_response, unpack_response
+from ..services.semantic_search import SemanticSearch
+from ..services.timing import StageTimer
 
-router = APIRouter()
 michelin_service = MichelinService()
+semantic_search = SemanticSearch()
+response_cache = create_response_cache()
+michelin_service.add_reload_listener(lambda store: response_cache.clear())
+
+def map_vector_index(store=None):
+    """Map vector index positions to dataset rows ahead of the first hybrid query"""
+    if semantic_search.loaded:
+        michelin_service.vector_index_rows(semantic_search.index, store)
+
+michelin_service.add_reload_listener(map_vector_index)
+
+# Response headers that describe how a result was computed; replayed on cache hits
+CACHED_HEADERS = ("Server-Timing", "X-Search-Mode")
+
+class CachedRoute(APIRoute):
+    """Serve successful GET responses from `response_cache`, keyed on params, dataset version and
+    whether the vector index is loaded (hybrid searches fall back to lexical until it is)"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if "GET" not in self.methods or self.path.endswith("/cache/stats"):
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            if not michelin_service.loaded:
+                # The key needs the dataset version; never block the event loop loading it
+                return await handler(request)
+            version = f"{michelin_service.version}+{'vector' if semantic_search.loaded else 'lexical'}"
+            key = make_cache_key(request.url.path, request.query_params.multi_items(), version)
+            cached = response_cache.get(key)
+            if cached is not None:
+                body, headers = unpack_response(cached)
+                return Response(content=body, media_type="application/json", headers={**headers, "X-Cache": "HIT"})
+            response = await handler(request)
+            if response.status_code == 200:
+                headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+                response_cache.set(key, pack_response(bytes(response.body), headers))
+                response.headers["X-Cache"] = "MISS"
+            return response
+
+        return cached_handler
+
+router = APIRouter(route_class=CachedRoute)
+
+def _respond(result):
+    """Return pre-rendered results as-is; validated models go through response_model as usual"""
+    if isinstance(result, PrerenderedJSON):
+        return Response(content=result.body, media_type="application/json")
+    return result
 
 @router.get("/search", response_model=RestaurantResponse)
 async def search_restaurants(
+    response: Response,
     query: Optional[str] = None,
     cuisine: Optional[str] = None,
     price: Optional[str] = None,
@@ -15,8 +69,10 @@ async def search_restaurants(
     award: Optional[str] = None,
     has_green_star: Optional[bool] = None,
     facilities: Optional[List[str]] = Query(None),
-    skip: int = 0,
-    limit: int = 10
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    mode: str = Query("lexical", pattern="^(lexical|hybrid)$")
 ):
     """
     Search for Michelin restaurants with various filters.
@@ -30,6 +86,10 @@ async def search_restaurants(
     - **facilities**: Filter by available facilities
     - **skip**: Number of records to skip
     - **limit**: Maximum number of records to return
+    - **cursor**: `next_cursor` from the previous page; takes precedence over skip
+    - **mode**: `hybrid` fuses keyword and semantic (vector) matches for `query` with
+      reciprocal rank fusion; per-stage times are returned in `Server-Timing`.
+      Falls back to `lexical` while the vector index is not loaded (see `X-Search-Mode`)
     """
     try:
         params = RestaurantSearchParams(
@@ -41,21 +101,80 @@ async def search_restaurants(
             has_green_star=has_green_star,
             facilities=facilities,
             skip=skip,
-            limit=limit
+            limit=limit,
+            cursor=cursor,
+            mode=mode
         )
-        return michelin_service.search_restaurants(params)
+        if mode == "hybrid" and query and semantic_search.loaded:
+            timer = StageTimer()
+            result = _respond(await michelin_service.search_hybrid(params, semantic_search, timer))
+            headers = {"Server-Timing": timer.header(), "X-Search-Mode": "hybrid"}
+        else:
+            result = _respond(await service_executor.run(michelin_service.search_restaurants, params))
+            headers = {"X-Search-Mode": "lexical"}
+        # Pre-rendered bodies are returned as their own Response, which the injected one does not reach
+        (result if isinstance(result, Response) else response).headers.update(headers)
+        return result
+    except ServiceOverloaded:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/semantic", response_model=List[dict])
+async def search_semantic(
+    query: str = Query(..., min_length=1, description="Free-text description of what you are looking for"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of results")
+):
+    """
+    Restaurants whose name, cuisine and description are closest in meaning to `query`.
+
+    Served from the local vector index built by the pipeline; each entry carries its
+    cosine similarity as `score`.
+    """
+    if not semantic_search.loaded:
+        raise HTTPException(status_code=503, detail="Semantic search index is not loaded")
+    # A little headroom for index entries that are not in the current dataset
+    matches = await service_executor.run(semantic_search.search, query, limit + 10)
+    return _respond(await service_executor.run(michelin_service.find_by_keys, matches, limit))
+
+@router.get("/facets", response_model=FacetCountsResponse)
+async def facet_counts(
+    query: Optional[str] = None,
+    cuisine: Optional[str] = None,
+    price: Optional[str] = None,
+    location: Optional[str] = None,
+    award: Optional[str] = None,
+    has_green_star: Optional[bool] = None,
+    facilities: Optional[List[str]] = Query(None)
+):
+    """
+    Count how many restaurants matching the filters offer each facility.
+
+    Takes the same filters as **/search** and returns the total match count plus
+    a facility -> count map, most common first.
+    """
+    params = RestaurantSearchParams(
+        query=query,
+        cuisine=cuisine,
+        price=price,
+        location=location,
+        award=award,
+        has_green_star=has_green_star,
+        facilities=facilities
+    )
+    return await service_executor.run(michelin_service.facet_counts, params)
+
 @router.get("/restaurants/{name}", response_model=MichelinRestaurant)
 async def get_restaurant_by_name(name: str):
     """
     Get a specific restaurant by name.
     """
-    restaurant = michelin_service.get_restaurant_by_name(name)
+    restaurant = await service_executor.run(michelin_service.get_restaurant_by_name, name)
     if not restaurant:
         raise HTTPException(status_code=404, detail=f"Restaurant '{name}' not found")
-    return restaurant
+    return _respond(restaurant)
 
 @router.get("/price-range", response_model=List[MichelinRestaurant])
 async def find_by_price_range(
@@ -64,14 +183,14 @@ async def find_by_price_range(
     location: Optional[str] = Query(None, description="Location to filter by")
 ):
     """Find restaurants within a specific price range."""
-    return michelin_service.find_by_price_range(min_price, max_price, location)
+    return _respond(await service_executor.run(michelin_service.find_by_price_range, min_price, max_price, location))
 
 @router.get("/price-comparison", response_model=Dict[str, Dict[str, float]])
 async def compare_prices_by_location(
     locations: List[str] = Query(..., description="List of locations to compare")
 ):
     """Compare average prices across different locations."""
-    return michelin_service.compare_prices_by_location(locations)
+    return await service_executor.run(michelin_service.compare_prices_by_location, locations)
 
 @router.get("/best-value", response_model=List[dict])
 async def find_best_value(
@@ -79,17 +198,17 @@ async def find_best_value(
     limit: int = Query(10, description="Maximum number of results")
 ):
     """Find best value restaurants based on award level and price."""
-    return michelin_service.find_best_value(location, limit)
+    return _respond(await service_executor.run(michelin_service.find_best_value, location, limit))
 
 @router.get("/radius", response_model=List[dict])
 async def find_within_radius(
     latitude: float = Query(..., description="Latitude of the center point"),
     longitude: float = Query(..., description="Longitude of the center point"),
-    radius_km: float = Query(..., description="Radius in kilometers"),
-    limit: int = Query(10, description="Maximum number of results")
+    radius_km: float = Query(..., gt=0, description="Radius in kilometers"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of results")
 ):
     """Find restaurants within a specific radius."""
-    return michelin_service.find_within_radius(latitude, longitude, radius_km, limit)
+    return _respond(await service_executor.run(michelin_service.find_within_radius, latitude, longitude, radius_km, limit))
 
 @router.get("/area/{area}", response_model=List[MichelinRestaurant])
 async def find_by_area(
@@ -97,7 +216,7 @@ async def find_by_area(
     limit: int = Query(10, description="Maximum number of results")
 ):
     """Find restaurants in a specific area/neighborhood."""
-    return michelin_service.find_by_area(area, limit)
+    return _respond(await service_executor.run(michelin_service.find_by_area, area, limit))
 
 @router.get("/multi-cuisine", response_model=List[MichelinRestaurant])
 async def find_multiple_cuisines(
@@ -105,7 +224,7 @@ async def find_multiple_cuisines(
     limit: int = Query(10, description="Maximum number of results")
 ):
     """Find restaurants serving multiple cuisines."""
-    return michelin_service.find_multiple_cuisines(cuisines, limit)
+    return _respond(await service_executor.run(michelin_service.find_multiple_cuisines, cuisines, limit))
 
 @router.get("/dietary/{dietary}", response_model=List[MichelinRestaurant])
 async def find_by_dietary(
@@ -113,14 +232,14 @@ async def find_by_dietary(
     limit: int = Query(10, description="Maximum number of results")
 ):
     """Find restaurants with specific dietary options."""
-    return michelin_service.find_by_dietary(dietary, limit)
+    return _respond(await service_executor.run(michelin_service.find_by_dietary, dietary, limit))
 
 @router.get("/unique-cuisines", response_model=List[dict])
 async def find_unique_cuisines(
     limit: int = Query(10, description="Maximum number of results")
 ):
     """Find restaurants with unique or rare cuisines."""
-    return michelin_service.find_unique_cuisines(limit)
+    return _respond(await service_executor.run(michelin_service.find_unique_cuisines, limit))
 
 @router.get("/amenities", response_model=List[MichelinRestaurant])
 async def find_by_amenities(
@@ -128,7 +247,7 @@ async def find_by_amenities(
     limit: int = Query(10, description="Maximum number of results")
 ):
     """Find restaurants with specific amenities."""
-    return michelin_service.find_by_amenities(amenities, limit)
+    return _respond(await service_executor.run(michelin_service.find_by_amenities, amenities, limit))
 
 @router.get("/features", response_model=List[MichelinRestaurant])
 async def find_by_features(
@@ -136,7 +255,7 @@ async def find_by_features(
     limit: int = Query(10, description="Maximum number of results")
 ):
     """Find restaurants with special features."""
-    return michelin_service.find_by_features(features, limit)
+    return _respond(await service_executor.run(michelin_service.find_by_features, features, limit))
 
 @router.get("/services", response_model=List[MichelinRestaurant])
 async def find_by_services(
@@ -144,25 +263,36 @@ async def find_by_services(
     limit: int = Query(10, description="Maximum number of results")
 ):
     """Find restaurants with specific services."""
-    return michelin_service.find_by_services(services, limit)
+    return _respond(await service_executor.run(michelin_service.find_by_services, services, limit))
 
 @router.get("/multiple-awards", response_model=List[MichelinRestaurant])
 async def find_multiple_awards():
     """Find restaurants with multiple awards."""
-    return michelin_service.find_multiple_awards()
+    return _respond(await service_executor.run(michelin_service.find_multiple_awards))
 
 @router.get("/green-stars", response_model=List[MichelinRestaurant])
 async def find_green_stars(
     limit: int = Query(10, description="Maximum number of results")
 ):
     """Find restaurants with green stars."""
-    return michelin_service.find_green_stars(limit)
+    return _respond(await service_executor.run(michelin_service.find_green_stars, limit))
 
 @router.get("/nearest", response_model=List[dict])
 async def find_nearest_restaurants(
     latitude: float = Query(..., description="Latitude of the center point"),
     longitude: float = Query(..., description="Longitude of the center point"),
-    limit: int = Query(5, description="Maximum number of results")
+    limit: int = Query(5, ge=1, le=100, description="Maximum number of results")
 ):
     """Find the nearest restaurants to a given location."""
-    return michelin_service.find_nearest_restaurants(latitude, longitude, limit)
+    return _respond(await service_executor.run(michelin_service.find_nearest_restaurants, latitude, longitude, limit))
+
+@router.post("/nearest/batch", response_model=List[List[dict]])
+async def find_nearest_batch(request: NearestBatchRequest):
+    """Find the nearest restaurants for many locations in a single call (results follow the input order)."""
+    points = [(point.latitude, point.longitude) for point in request.points]
+    return _respond(await service_executor.run(michelin_service.find_nearest_batch, points, request.limit))
+
+@router.get("/cache/stats", response_model=dict)
+async def cache_stats():
+    """Hit/miss counters and size of the search response cache."""
+    return response_cache.stats()
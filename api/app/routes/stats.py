@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, List
+from ..models.schemas import CuisineStats, CityStats
+from ..services.mongodb import get_database
+
+router = APIRouter()
+
+def _cuisine_stats(document: Dict) -> CuisineStats:
+    return CuisineStats(
+        cuisine=document["_id"],
+        total_restaurants=document.get("total_restaurants", 0),
+        google_rating=document.get("google_rating"),
+        michelin_rating=document.get("michelin_rating") or {},
+    )
+
+def _city_stats(document: Dict, count_field: str) -> CityStats:
+    key = document["_id"] or {}
+    return CityStats(city=key.get("City"), country=key.get("Country"), count=document.get(count_field, 0))
+
+@router.get("/cuisines", response_model=List[CuisineStats])
+async def cuisine_stats(limit: int = Query(50, ge=1, le=1000), db=Depends(get_database)):
+    """Restaurants per cuisine with award distribution and average Google rating, largest first"""
+    documents = await db.restaurants_per_cuisine.find().sort("total_restaurants", -1).limit(limit).to_list(length=limit)
+    return [_cuisine_stats(document) for document in documents]
+
+@router.get("/cuisines/{cuisine}", response_model=CuisineStats)
+async def single_cuisine_stats(cuisine: str, db=Depends(get_database)):
+    """Rollup of a single cuisine"""
+    document = await db.restaurants_per_cuisine.find_one({"_id": cuisine})
+    if not document:
+        raise HTTPException(status_code=404, detail="Cuisine not found")
+    return _cuisine_stats(document)
+
+@router.get("/cities", response_model=List[CityStats])
+async def city_stats(limit: int = Query(50, ge=1, le=1000), db=Depends(get_database)):
+    """Michelin-starred (1-3 stars) restaurants per city, largest first"""
+    documents = await db.restaurants_per_city.find().sort("total_restaurants", -1).limit(limit).to_list(length=limit)
+    return [_city_stats(document, "total_restaurants") for document in documents]
+
+@router.get("/cities/three-stars", response_model=List[CityStats])
+async def three_star_city_stats(limit: int = Query(50, ge=1, le=1000), db=Depends(get_database)):
+    """3-star restaurants per city, largest first"""
+    documents = await db.three_star_restaurants_per_city.find().sort("three_star_count", -1).limit(limit).to_list(length=limit)
+    return [_city_stats(document, "three_star_count") for document in documents]
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, TypeVar
+import numpy as np
+
+T = TypeVar("T")
+
+class ServiceOverloaded(Exception):
+    """More blocking calls are waiting than the queue allows; the caller should retry later"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class BoundedExecutor:
+    """Runs blocking service calls (pandas / NumPy scans, dataset fetches) off the event loop.
+
+    A fixed pool of `max_workers` threads executes calls; at most `max_queue` more may
+    wait for a thread. Beyond that `run` fails fast with `ServiceOverloaded` (served
+    as 503 + Retry-After) instead of letting latency grow without bound. Queue depth,
+    wait and run times are exposed through `metrics()`.
+
+    `max_workers=0` runs calls inline on the event loop, the old behaviour, kept
+    for comparison in benchmarks/blocking_load_test.py.
+    """
+
+    def __init__(self, max_workers: int = 8, max_queue: int = 64, window: int = 1024):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="service") if max_workers else None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._runs: Deque[float] = deque(maxlen=window)
+
+    @property
+    def queued(self) -> int:
+        return self._pending - self._running
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """`fn(*args)` on a pool thread, once one is free"""
+        if self._pool is None:
+            return self._call(time.perf_counter(), fn, args)
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ServiceOverloaded(f"{self._pending} requests in flight, try again shortly")
+            self._pending += 1
+            self.peak_queued = max(self.peak_queued, self._pending - self.max_workers)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, self._call, time.perf_counter(), fn, args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _call(self, submitted: float, fn: Callable[..., T], args) -> T:
+        start = time.perf_counter()
+        with self._lock:
+            self._running += 1
+            self._waits.append(start - submitted)
+        try:
+            result = fn(*args)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._runs.append(time.perf_counter() - start)
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            waits = np.array(self._waits) * 1000
+            runs = np.array(self._runs) * 1000
+            return {
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": max(self.queued, 0),
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "wait_ms_p50": float(np.percentile(waits, 50)) if len(waits) else 0.0,
+                "wait_ms_p99": float(np.percentile(waits, 99)) if len(waits) else 0.0,
+                "run_ms_p50": float(np.percentile(runs, 50)) if len(runs) else 0.0,
+                "run_ms_p99": float(np.percentile(runs, 99)) if len(runs) else 0.0,
+            }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+service_executor = BoundedExecutor(
+    max_workers=int(os.getenv("SERVICE_WORKERS", min(8, (os.cpu_count() or 1) + 4))),
+    max_queue=int(os.getenv("SERVICE_MAX_QUEUE", 64)),
+)
@@ -0,0 +1,88 @@
+import json
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+
+# Number of set bits in every possible byte
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+class FacetIndex:
+    """One packed bitmap per distinct value of a comma-separated multi-value column.
+
+    Values are normalized (trimmed, lowercased) once at build time. Filters become
+    bitwise AND/OR over the bitmaps and facet counts are popcounts of the bitmaps
+    intersected with the current result set.
+    """
+
+    def __init__(self, labels: List[str], bitmaps: np.ndarray, size: int):
+        self.labels = labels
+        self.keys = [label.lower() for label in labels]
+        self.bitmaps = bitmaps
+        self.size = size
+
+    @classmethod
+    def build(cls, size: int, values: Iterable[Optional[str]], separator: str = ",") -> "FacetIndex":
+        """Parse every row's value list into the facet vocabulary and its bitmaps"""
+        labels = []
+        key_ids: Dict[str, int] = {}
+        rows, facets = [], []
+        for row, value in enumerate(values):
+            if not value:
+                continue
+            for item in value.split(separator):
+                label = item.strip()
+                if not label:
+                    continue
+                key = label.lower()
+                if key not in key_ids:
+                    key_ids[key] = len(labels)
+                    labels.append(label)
+                rows.append(row)
+                facets.append(key_ids[key])
+
+        dense = np.zeros((len(labels), size), dtype=bool)
+        dense[np.asarray(facets, dtype=np.int64), np.asarray(rows, dtype=np.int64)] = True
+        return cls(labels, np.packbits(dense, axis=1), size)
+
+    def save(self, prefix: str):
+        """Write the bitmaps as `<prefix>.bitmaps.npy` and the labels as `<prefix>.labels.json`"""
+        np.save(f"{prefix}.bitmaps.npy", self.bitmaps)
+        with open(f"{prefix}.labels.json", "w") as f:
+            json.dump({"size": self.size, "labels": self.labels}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, prefix: str, mmap_mode: Optional[str] = "r") -> "FacetIndex":
+        """Open an index written by `save`, with memory-mapped bitmaps by default"""
+        with open(f"{prefix}.labels.json") as f:
+            header = json.load(f)
+        return cls(header["labels"], np.load(f"{prefix}.bitmaps.npy", mmap_mode=mmap_mode), header["size"])
+
+    def pack(self, mask: np.ndarray) -> np.ndarray:
+        return np.packbits(mask)
+
+    def unpack(self, bitmap: np.ndarray) -> np.ndarray:
+        return np.unpackbits(bitmap, count=self.size).astype(bool)
+
+    def match_any(self, term: str) -> np.ndarray:
+        """Packed bitmap of rows having any facet whose name contains `term`"""
+        term = term.strip().lower()
+        matching = [i for i, key in enumerate(self.keys) if term in key]
+        if not matching:
+            return np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[matching], axis=0)
+
+    def match_all(self, terms: Iterable[str]) -> np.ndarray:
+        """Row mask for rows matching every term (each term may match several facets)"""
+        bitmap = self.pack(np.ones(self.size, dtype=bool))
+        for term in terms:
+            bitmap &= self.match_any(term)
+        return self.unpack(bitmap)
+
+    def counts(self, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """How many rows of `mask` (default: all rows) carry each facet, most common first"""
+        if mask is None:
+            selected = self.bitmaps
+        else:
+            selected = self.bitmaps & self.pack(mask)
+        totals = POPCOUNT[selected].sum(axis=1, dtype=np.int64)
+        order = np.argsort(-totals, kind='stable')
+        return {self.labels[i]: int(totals[i]) for i in order if totals[i] > 0}
@@ -1,20 +1,163 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional, Tuple
-from ..models.schemas import MichelinRestaurant, RestaurantSearchParams, RestaurantResponse
+from typing import Callable, List, Dict, Optional, Tuple, Union
+from ..models.schemas import MichelinRestaurant, RestaurantSearchParams, RestaurantResponse, FacetCountsResponse
+from .restaurant_store import RestaurantStore, StringColumn
+from .pagination import decode_cursor, encode_cursor
+from .rank_fusion import RRF_K, reciprocal_rank_fusion
+from .snapshot import DatasetSnapshot
+from .spatial_index import haversine_km
+from .timing import StageTimer
+from .executor import service_executor
 import requests
-from io import StringIO
-from math import radians, sin, cos, sqrt, atan2
+from io import BytesIO
+
+AWARD_VALUES = {
+    '3 Stars': 3,
+    '2 Stars': 2,
+    '1 Star': 1,
+    'Bib Gourmand': 0.5
+}
+
+class PrerenderedJSON:
+    """A JSON body stitched together from restaurants serialized once at load time.
+
+    Routes hand it back as a raw Response, skipping per-row model construction
+    and FastAPI's response serialization.
+    """
+
+    __slots__ = ('body',)
+
+    def __init__(self, body: bytes):
+        self.body = body
+
+# Service results are either validated models (debug mode) or a pre-rendered body
+Restaurants = Union[List[MichelinRestaurant], PrerenderedJSON]
+Entries = Union[List[Dict], PrerenderedJSON]
 
 class MichelinService:
-    def __init__(self):
-        self.csv_url = "https://raw.githubusercontent.com/ngshiheng/michelin-my-maps/main/data/michelin_my_maps.csv"
-        self._data = None
+    def __init__(self, snapshot_dir: Optional[str] = None):
+        self.csv_url = os.getenv(
+            "MICHELIN_CSV_URL",
+            "https://raw.githubusercontent.com/ngshiheng/michelin-my-maps/main/data/michelin_my_maps.csv"
+        )
+        self.refresh_interval = float(os.getenv("MICHELIN_REFRESH_INTERVAL", 6 * 3600))
+        self.snapshot = DatasetSnapshot(snapshot_dir)
+        self._data: Optional[RestaurantStore] = None
+        self._refresh_lock = threading.Lock()
+        self._reload_listeners: List[Callable[[RestaurantStore], None]] = []
+        # Debug mode: build and validate a MichelinRestaurant per row on every request
+        self.validate_responses = os.getenv("MICHELIN_VALIDATE_RESPONSES", "0") == "1"
+        # Hybrid search: results taken from each retriever before fusion, and the RRF constant
+        self.hybrid_candidates = int(os.getenv("HYBRID_CANDIDATES", 100))
+        self.rrf_k = int(os.getenv("HYBRID_RRF_K", RRF_K))
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    @property
+    def version(self) -> Optional[str]:
+        """Content version of the dataset currently being served"""
+        return self._load_data().version
+
+    def add_reload_listener(self, listener: Callable[[RestaurantStore], None]):
+        """Call `listener(new_store)` every time a refresh swaps in new data"""
+        self._reload_listeners.append(listener)
+
+    def _fetch_frame(self, etag: Optional[str] = None,
+                     last_modified: Optional[str] = None) -> Tuple[Optional[pd.DataFrame], Dict]:
+        """Download the CSV; returns (None, {}) when the server answers 304 Not Modified"""
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        response = requests.get(self.csv_url, headers=headers, timeout=60)
+        if response.status_code == 304:
+            return None, {}
+        response.raise_for_status()
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'version': hashlib.sha1(response.content).hexdigest()[:12],
+        }
+        return pd.read_csv(BytesIO(response.content)), validators
+
+    def load(self) -> RestaurantStore:
+        """Load the dataset, preferring the local snapshot over a network fetch"""
+        with self._refresh_lock:
+            if self._data is None:
+                store = self.snapshot.load()
+                self._data = self._prepare(store) if store is not None else None
+        if self._data is None:
+            self.refresh()
+        return self._data
 
-    def _load_data(self) -> pd.DataFrame:
+    def refresh(self) -> bool:
+        """Swap in a newer snapshot saved by another process, or re-download the CSV if it changed upstream.
+
+        Processes sharing the snapshot directory take turns: the first one to see a
+        change downloads it and saves a snapshot, the rest map that snapshot's files.
+        """
+        with self._refresh_lock, self.snapshot.lock():
+            current = self.snapshot.current_path()
+            store = None
+            if current is not None and (self._data is None or self._data.directory != current):
+                store = self.snapshot.load()
+            if store is None:
+                store = self._download()
+            if store is None:
+                return False
+            # Requests already holding the old store finish against it
+            self._data = self._prepare(store)
+        for listener in self._reload_listeners:
+            listener(store)
+        return True
+
+    def _download(self) -> Optional[RestaurantStore]:
+        """Fetch the CSV (conditionally once loaded), save it as the new snapshot and map it back; None if unchanged"""
+        meta = self.snapshot.read_meta() if self._data is not None else {}
+        frame, validators = self._fetch_frame(meta.get('etag'), meta.get('last_modified'))
+        if frame is None:
+            return None
+        store = self._prepare(RestaurantStore.from_frame(frame, version=validators.pop('version')))
+        self.snapshot.save(store, **validators)
+        # Serve from the saved files, which other worker processes map too, rather than this heap copy
+        return self.snapshot.load() or store
+
+    async def refresh_periodically(self):
+        """Background loop that keeps the dataset current without blocking requests"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                print(f"Michelin dataset refresh failed: {e}")
+
+    def _prepare(self, store: RestaurantStore) -> RestaurantStore:
+        """Build indexes and pre-rendered JSON before a store starts serving requests"""
+        store.warm()
+        self._rendered(store)
+        return store
+
+    def _rendered(self, store: RestaurantStore) -> StringColumn:
+        return store.derived('json', self._render_json)
+
+    def _render_json(self, store: RestaurantStore) -> StringColumn:
+        """Serialize every restaurant once through the validated model"""
+        return StringColumn.from_values(
+            self._convert_to_restaurant(store.record(i)).model_dump_json() for i in range(store.size)
+        )
+
+    def _load_data(self) -> RestaurantStore:
         if self._data is None:
-            response = requests.get(self.csv_url)
-            response.raise_for_status()
-            self._data = pd.read_csv(StringIO(response.text))
+            return self.load()
         return self._data
 
     def _convert_to_restaurant(self, row):
@@ -42,357 +185,414 @@ class MichelinService:
             facilities=row.get('FacilitiesAndServices', '').split(',') if pd.notna(row.get('FacilitiesAndServices')) else []
         )
 
-    def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        """Calculate distance between two points using Haversine formula"""
-        R = 6371  # Earth's radius in kilometers
-
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        distance = R * c
-
-        return distance
-
-    def search_restaurants(self, params: RestaurantSearchParams) -> RestaurantResponse:
-        df = self._load_data()
+    def _calculate_distance(self, lat1, lon1, lat2, lon2):
+        """Calculate distance between points using Haversine formula; accepts scalars or arrays"""
+        return haversine_km(lat1, lon1, lat2, lon2)
+
+    def _to_restaurants(self, store: RestaurantStore, indices) -> Restaurants:
+        if self.validate_responses:
+            return [self._convert_to_restaurant(store.record(int(i))) for i in indices]
+        rendered = self._rendered(store)
+        return PrerenderedJSON(b"[" + b",".join(rendered.raw(int(i)) for i in indices) + b"]")
+
+    def _to_entries(self, store: RestaurantStore, entries: List[Tuple[int, Dict]]) -> Entries:
+        """List of {"restaurant": ..., **extra} objects"""
+        if self.validate_responses:
+            return [
+                {"restaurant": self._convert_to_restaurant(store.record(int(i))), **extra}
+                for i, extra in entries
+            ]
+        rendered = self._rendered(store)
+        parts = []
+        for i, extra in entries:
+            part = b'{"restaurant":' + rendered.raw(int(i))
+            if extra:
+                part += b"," + json.dumps(extra, separators=(",", ":"), ensure_ascii=False)[1:-1].encode("utf-8")
+            parts.append(part + b"}")
+        return PrerenderedJSON(b"[" + b",".join(parts) + b"]")
+
+    def _location_mask(self, store: RestaurantStore, location: Optional[str]) -> np.ndarray:
+        if location:
+            return store.contains('Location', location)
+        return store.all()
 
-        # Apply filters with OR logic
-        mask = pd.Series(True, index=df.index)
-        if params.query:
-            mask &= (
-                df['Name'].astype(str).str.contains(params.query, case=False, na=False) |
-                df['Cuisine'].astype(str).str.contains(params.query, case=False, na=False) |
-                df['Description'].astype(str).str.contains(params.query, case=False, na=False)
-            )
+    def _filter_mask(self, store: RestaurantStore, params: RestaurantSearchParams) -> np.ndarray:
+        """Rows passing the structured filters (everything but the keyword query)"""
+        mask = store.all()
         if params.cuisine:
-            mask &= df['Cuisine'].astype(str).str.contains(params.cuisine, case=False, na=False)
+            mask &= store.contains('Cuisine', params.cuisine)
         if params.price:
-            mask &= df['Price'].astype(str) == str(params.price)
+            mask &= store.equals('Price', params.price)
         if params.location:
-            mask &= df['Location'].astype(str).str.contains(params.location, case=False, na=False)
+            mask &= store.contains('Location', params.location)
         if params.award:
-            mask &= df['Award'].astype(str).str.contains(params.award, case=False, na=False)
+            mask &= store.contains('Award', params.award)
         if params.has_green_star is not None:
-            mask &= df['GreenStar'].astype(str) == str(params.has_green_star)
+            mask &= store.green_star == params.has_green_star
         if params.facilities:
-            for facility in params.facilities:
-                mask &= df['FacilitiesAndServices'].astype(str).str.contains(facility, case=False, na=False)
-
-        df = df[mask]
-
+            mask &= store.facilities.match_all(params.facilities)
+        return mask
+
+    def _lexical_ranking(self, store: RestaurantStore, query: str,
+                         mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 matches within `mask`, best first (ties by row)"""
+        ranked, scores = store.text.search(query)
+        keep = mask[ranked]
+        return ranked[keep], scores[keep]
+
+    def _search_indices(self, store: RestaurantStore,
+                        params: RestaurantSearchParams) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Row indices matching the search filters, plus their scores for keyword queries.
+
+        Keyword queries are ordered by relevance (ties by row), everything else by row.
+        """
+        mask = self._filter_mask(store, params)
+        if params.query:
+            # Keyword search ranks by relevance instead of CSV order
+            return self._lexical_ranking(store, params.query, mask)
+        return np.flatnonzero(mask), None
+
+    def _page(self, store: RestaurantStore, indices: np.ndarray, scores: Optional[np.ndarray],
+              params: RestaurantSearchParams) -> Tuple[np.ndarray, Optional[str]]:
+        """Slice one page, by keyset cursor when given (else by skip), and the cursor of the next page"""
+        if params.cursor:
+            position = decode_cursor(params.cursor)
+            if position.get('v') != store.version:
+                raise ValueError("Cursor belongs to a previous dataset version, restart pagination")
+            if not isinstance(position.get('row'), int) or (
+                    scores is not None and not isinstance(position.get('score'), (int, float))):
+                raise ValueError("Invalid pagination cursor")
+            # Results are sorted by (-score, row) or by row, so "after the cursor" is a suffix
+            if scores is None:
+                start = int(np.searchsorted(indices, position['row'], side='right'))
+            else:
+                after = (scores < position['score']) | ((scores == position['score']) & (indices > position['row']))
+                start = int(np.argmax(after)) if after.any() else len(indices)
+        else:
+            start = params.skip
+
+        page = indices[start:start + params.limit]
+        next_cursor = None
+        if len(page) and start + params.limit < len(indices):
+            last = len(page) - 1
+            position = {'v': store.version, 'row': int(page[last])}
+            if scores is not None:
+                position['score'] = float(scores[start + last])
+            next_cursor = encode_cursor(position)
+        return page, next_cursor
+
+    def search_restaurants(self, params: RestaurantSearchParams) -> Union[RestaurantResponse, PrerenderedJSON]:
+        store = self._load_data()
+        indices, scores = self._search_indices(store, params)
+        return self._search_response(store, indices, scores, params)
+
+    def _search_response(self, store: RestaurantStore, indices: np.ndarray, scores: Optional[np.ndarray],
+                         params: RestaurantSearchParams) -> Union[RestaurantResponse, PrerenderedJSON]:
         # Apply pagination
-        total = len(df)
-        df = df.iloc[params.skip:params.skip + params.limit]
+        total = len(indices)
+        page, next_cursor = self._page(store, indices, scores, params)
 
         # Convert to restaurant objects
-        restaurants = [self._convert_to_restaurant(row) for _, row in df.iterrows()]
+        restaurants = self._to_restaurants(store, page)
 
         # Fallback logic: If no results, suggest relaxing filters
         if total == 0:
             print("No results found. Try relaxing your filters.")
 
+        if isinstance(restaurants, PrerenderedJSON):
+            return PrerenderedJSON(
+                b'{"results":' + restaurants.body +
+                f',"total":{total},"skip":{params.skip},"limit":{params.limit},'
+                f'"next_cursor":{json.dumps(next_cursor)}}}'.encode("utf-8")
+            )
         return RestaurantResponse(
             results=restaurants,
             total=total,
             skip=params.skip,
-            limit=params.limit
+            limit=params.limit,
+            next_cursor=next_cursor
         )
 
-    def get_restaurant_by_name(self, name: str) -> Optional[MichelinRestaurant]:
-        df = self._load_data()
-        restaurant = df[df['Name'] == name]
-        if len(restaurant) > 0:
-            return self._convert_to_restaurant(restaurant.iloc[0])
-        return None
-
-    def find_nearest_restaurants(self, latitude: float, longitude: float, limit: int = 5) -> List[Dict]:
+    def vector_index_rows(self, index, store: Optional[RestaurantStore] = None) -> np.ndarray:
+        """Vector index position -> dataset row, -1 for entries not in this dataset (memoized per store)"""
+        store = store or self._load_data()
+
+        def build(store: RestaurantStore) -> np.ndarray:
+            rows = self._url_rows(store)
+            return np.array([rows.get(key, -1) for key in index.keys], dtype=np.int64)
+        return store.derived(f'index_rows:{id(index)}', build)
+
+    async def search_hybrid(self, params: RestaurantSearchParams, semantic,
+                            timer: StageTimer) -> Union[RestaurantResponse, PrerenderedJSON]:
+        """Keyword (BM25) and vector retrieval run concurrently, fused with reciprocal rank fusion.
+
+        Structured filters are applied first and both retrievers only rank rows that
+        pass them. Each contributes its top `hybrid_candidates`, a fixed depth so that
+        pages (skip or cursor) all slice the same fused list; `timer` records every stage.
+        """
+        store = await service_executor.run(self._load_data)
+
+        def filter_rows() -> np.ndarray:
+            with timer.stage('filter'):
+                return self._filter_mask(store, params)
+
+        # Every stage that scans the dataset runs on the service executor, never on the event loop
+        mask = await service_executor.run(filter_rows)
+        depth = self.hybrid_candidates
+
+        def lexical() -> np.ndarray:
+            with timer.stage('lexical'):
+                return self._lexical_ranking(store, params.query, mask)[0][:depth]
+
+        def vector() -> np.ndarray:
+            with timer.stage('embed'):
+                query = semantic.embed(params.query)
+            with timer.stage('vector'):
+                index_rows = self.vector_index_rows(semantic.index, store)
+                allowed = (index_rows >= 0) & mask[index_rows]
+                _, positions = semantic.index.search(query, depth, allowed=allowed)
+                return index_rows[positions]
+
+        def fuse_and_render(lexical_rows: np.ndarray, vector_rows: np.ndarray):
+            with timer.stage('fuse'):
+                indices, scores = reciprocal_rank_fusion([lexical_rows, vector_rows], store.size, self.rrf_k)
+            with timer.stage('render'):
+                return self._search_response(store, indices, scores, params)
+
+        lexical_rows, vector_rows = await asyncio.gather(service_executor.run(lexical), service_executor.run(vector))
+        return await service_executor.run(fuse_and_render, lexical_rows, vector_rows)
+
+    def facet_counts(self, params: RestaurantSearchParams) -> FacetCountsResponse:
+        """Count how many search results offer each facility"""
+        store = self._load_data()
+        mask = np.zeros(store.size, dtype=bool)
+        mask[self._search_indices(store, params)[0]] = True
+        return FacetCountsResponse(total=int(mask.sum()), facilities=store.facilities.counts(mask))
+
+    def get_restaurant_by_name(self, name: str) -> Union[MichelinRestaurant, PrerenderedJSON, None]:
+        store = self._load_data()
+        index = store.find_name(name)
+        if index is None:
+            return None
+        if self.validate_responses:
+            return self._convert_to_restaurant(store.record(index))
+        return PrerenderedJSON(self._rendered(store).raw(index))
+
+    def find_nearest_restaurants(self, latitude: float, longitude: float, limit: int = 5) -> Entries:
         """Find the nearest restaurants to a given location"""
-        df = self._load_data()
-
-        # Filter out restaurants without coordinates
-        df = df.dropna(subset=['Latitude', 'Longitude'])
-
-        # Calculate distances
-        distances = []
-        for _, row in df.iterrows():
-            distance = self._calculate_distance(
-                latitude, longitude,
-                float(row['Latitude']), float(row['Longitude'])
-            )
-            distances.append((distance, row))
-
-        # Sort by distance and get top N
-        distances.sort(key=lambda x: x[0])
-        nearest = distances[:limit]
-
-        return [{
-            "restaurant": self._convert_to_restaurant(row),
-            "distance_km": round(distance, 2)
-        } for distance, row in nearest]
-
-    def find_most_affordable(self, cuisine: Optional[str] = None, location: Optional[str] = None, limit: int = 5) -> List[MichelinRestaurant]:
+        store = self._load_data()
+        distances, indices = store.spatial.nearest(latitude, longitude, limit)
+
+        return self._to_entries(store, [
+            (i, {"distance_km": round(float(distance), 2)}) for distance, i in zip(distances, indices)
+        ])
+
+    def find_nearest_batch(self, points: List[Tuple[float, float]], limit: int = 5) -> Union[List[List[Dict]], PrerenderedJSON]:
+        """Find the nearest restaurants for many (latitude, longitude) points in one pass"""
+        store = self._load_data()
+        if not points:
+            return []
+        latitudes, longitudes = zip(*points)
+        distances, indices = store.spatial.nearest_batch(latitudes, longitudes, limit)
+
+        results = [
+            self._to_entries(store, [
+                (i, {"distance_km": round(float(distance), 2)}) for distance, i in zip(row_distances, row_indices)
+            ])
+            for row_distances, row_indices in zip(distances, indices)
+        ]
+        if self.validate_responses:
+            return results
+        return PrerenderedJSON(b"[" + b",".join(result.body for result in results) + b"]")
+
+    def _url_rows(self, store: RestaurantStore) -> Dict[str, int]:
+        """Michelin URL -> row, the key the vector index refers to restaurants by"""
+        urls = store.strings['Url']
+        return store.derived('url_rows', lambda s: {urls[i]: i for i in range(s.size) if urls[i]})
+
+    def find_by_keys(self, matches: List[Tuple[str, float]], limit: int) -> Entries:
+        """Restaurants for (restaurant key, score) matches, in order; keys not in the dataset are skipped"""
+        store = self._load_data()
+        rows = self._url_rows(store)
+        entries = [(rows[key], {"score": round(score, 4)}) for key, score in matches if key in rows]
+        return self._to_entries(store, entries[:limit])
+
+    def find_most_affordable(self, cuisine: Optional[str] = None, location: Optional[str] = None, limit: int = 5) -> Restaurants:
         """Find the most affordable restaurants"""
-        df = self._load_data()
+        store = self._load_data()
 
         # Filter by cuisine and location if provided
+        mask = self._location_mask(store, location)
         if cuisine:
-            df = df[df['Cuisine'].str.contains(cuisine, case=False, na=False)]
-        if location:
-            df = df[df['Location'].str.contains(location, case=False, na=False)]
-
-        # Sort by price (assuming $ is cheaper than $$, etc.)
-        df['price_rank'] = df['Price'].map({'$': 1, '$$': 2, '$$$': 3, '$$$$': 4})
-        df = df.sort_values('price_rank')
+            mask &= store.contains('Cuisine', cuisine)
+        indices = np.flatnonzero(mask)
 
-        # Get top N
-        df = df.head(limit)
+        # Sort by price level (fewer symbols is cheaper), missing prices last
+        price_rank = np.where(store.price_level > 0, store.price_level, np.iinfo(np.int8).max)
+        indices = indices[np.argsort(price_rank[indices], kind='stable')]
 
-        return [self._convert_to_restaurant(row) for _, row in df.iterrows()]
+        return self._to_restaurants(store, indices[:limit])
 
-    def find_by_award(self, award: str, location: Optional[str] = None) -> List[MichelinRestaurant]:
+    def find_by_award(self, award: str, location: Optional[str] = None) -> Restaurants:
         """Find restaurants by award type"""
-        df = self._load_data()
-
-        # Filter by award
-        df = df[df['Award'] == award]
-
-        # Filter by location if provided
-        if location:
-            df = df[df['Location'].str.contains(location, case=False, na=False)]
-
-        return [self._convert_to_restaurant(row) for _, row in df.iterrows()]
+        store = self._load_data()
+        mask = store.equals('Award', award) & self._location_mask(store, location)
+        return self._to_restaurants(store, np.flatnonzero(mask))
 
-    def find_by_facilities(self, facilities: List[str], location: Optional[str] = None) -> List[MichelinRestaurant]:
+    def find_by_facilities(self, facilities: List[str], location: Optional[str] = None) -> Restaurants:
         """Find restaurants with specific facilities"""
-        df = self._load_data()
+        store = self._load_data()
 
-        # Filter by facilities
-        for facility in facilities:
-            df = df[df['FacilitiesAndServices'].str.contains(facility, case=False, na=False)]
+        mask = self._location_mask(store, location) & store.facilities.match_all(facilities)
 
-        # Filter by location if provided
-        if location:
-            df = df[df['Location'].str.contains(location, case=False, na=False)]
+        return self._to_restaurants(store, np.flatnonzero(mask))
 
-        return [self._convert_to_restaurant(row) for _, row in df.iterrows()]
-
-    def find_vegetarian_friendly(self, location: Optional[str] = None, limit: int = 10) -> List[MichelinRestaurant]:
+    def find_vegetarian_friendly(self, location: Optional[str] = None, limit: int = 10) -> Restaurants:
         """Find vegetarian-friendly restaurants."""
-        restaurants = self._load_data()
+        store = self._load_data()
 
-        # Filter by location if specified
-        if location:
-            restaurants = [r for r in restaurants if location.lower() in r.location.lower()]
+        vegetarian = np.zeros(store.size, dtype=bool)
+        for term in ['vegetarian', 'vegan', 'plant-based']:
+            vegetarian |= store.contains('Description', term)
+        mask = vegetarian & self._location_mask(store, location)
 
-        # Filter for vegetarian-friendly restaurants
-        vegetarian = [r for r in restaurants if any(
-            term in r.description.lower() for term in ['vegetarian', 'vegan', 'plant-based']
-        )]
-
-        return vegetarian[:limit]
+        return self._to_restaurants(store, np.flatnonzero(mask)[:limit])
 
     def find_by_price_range(self, min_price: Optional[int] = None, max_price: Optional[int] = None,
-                          location: Optional[str] = None) -> List[MichelinRestaurant]:
+                          location: Optional[str] = None) -> Restaurants:
         """Find restaurants within a specific price range."""
-        restaurants = self._load_data()
-
-        # Filter by location if specified
-        if location:
-            restaurants = [r for r in restaurants if location.lower() in r.location.lower()]
+        store = self._load_data()
 
-        # Filter by price range
+        mask = self._location_mask(store, location)
         if min_price is not None:
-            restaurants = [r for r in restaurants if r.price and len(r.price) >= min_price]
+            mask &= (store.price_level > 0) & (store.price_level >= min_price)
         if max_price is not None:
-            restaurants = [r for r in restaurants if r.price and len(r.price) <= max_price]
+            mask &= (store.price_level > 0) & (store.price_level <= max_price)
 
-        return restaurants
+        return self._to_restaurants(store, np.flatnonzero(mask))
 
     def compare_prices_by_location(self, locations: List[str]) -> Dict[str, Dict[str, float]]:
         """Compare average prices across different locations."""
-        restaurants = self._load_data()
+        store = self._load_data()
         results = {}
+        has_price = store.price_level > 0
 
         for location in locations:
-            location_restaurants = [r for r in restaurants if location.lower() in r.location.lower()]
-            if not location_restaurants:
+            location_mask = store.contains('Location', location)
+            if not location_mask.any():
                 continue
 
             # Calculate average price for each award level
-            prices = {
-                '3 Stars': [],
-                '2 Stars': [],
-                '1 Star': [],
-                'Bib Gourmand': []
-            }
-
-            for r in location_restaurants:
-                if r.award in prices and r.price:
-                    prices[r.award].append(len(r.price))
-
-            # Calculate averages
-            results[location] = {
-                award: sum(prices) / len(prices) if prices else 0
-                for award, prices in prices.items()
-            }
+            results[location] = {}
+            for award in AWARD_VALUES:
+                levels = store.price_level[location_mask & has_price & store.equals('Award', award)]
+                results[location][award] = float(levels.mean()) if len(levels) else 0
 
         return results
 
-    def find_best_value(self, location: Optional[str] = None, limit: int = 10) -> List[dict]:
-        df = self._load_data()
-        restaurants = [self._convert_to_restaurant(row) for _, row in df.iterrows()]
-
-        # Filter by location if specified
-        if location:
-            restaurants = [r for r in restaurants if location.lower() in (r.location or "").lower()]
+    def find_best_value(self, location: Optional[str] = None, limit: int = 10) -> Entries:
+        store = self._load_data()
 
         # Calculate value score (award level / price)
-        value_scores = []
-        for r in restaurants:
-            if not r.award:
-                continue
-            award_value = {
-                '3 Stars': 3,
-                '2 Stars': 2,
-                '1 Star': 1,
-                'Bib Gourmand': 0.5
-            }.get(r.award, 0)
-            # If price is missing, treat as highest price level (4)
-            price = len(r.price) if r.price else 4
-            if award_value > 0:
-                value_score = award_value / price
-                value_scores.append({
-                    'restaurant': r.dict(),
-                    'value_score': value_score,
-                    'award_value': award_value,
-                    'price': price
-                })
-
-        # Sort by value score
-        value_scores.sort(key=lambda x: x['value_score'], reverse=True)
-        return value_scores[:limit]
-
-    def find_within_radius(self, latitude: float, longitude: float, radius_km: float,
-                         limit: int = 10) -> List[dict]:
-        """Find restaurants within a specific radius."""
-        restaurants = self._load_data()
-        results = []
+        award_table = np.array([AWARD_VALUES.get(a, 0) for a in store.categories['Award']] + [0], dtype=np.float64)
+        award_value = award_table[store.codes['Award']]
+        # If price is missing, treat as highest price level (4)
+        price = np.where(store.price_level > 0, store.price_level, 4)
+        value_score = award_value / price
 
-        for r in restaurants:
-            if not r.latitude or not r.longitude:
-                continue
+        indices = np.flatnonzero((award_value > 0) & self._location_mask(store, location))
+        indices = indices[np.argsort(-value_score[indices], kind='stable')][:limit]
 
-            distance = self._calculate_distance(
-                latitude, longitude,
-                float(r.latitude), float(r.longitude)
-            )
+        return self._to_entries(store, [(i, {
+            'value_score': float(value_score[i]),
+            'award_value': AWARD_VALUES[store.value('Award', int(i))],
+            'price': int(price[i])
+        }) for i in indices])
 
-            if distance <= radius_km:
-                results.append({
-                    'restaurant': r,
-                    'distance_km': distance
-                })
+    def find_within_radius(self, latitude: float, longitude: float, radius_km: float,
+                         limit: int = 10) -> Entries:
+        """Find restaurants within a specific radius."""
+        store = self._load_data()
+        distances, indices = store.spatial.within_radius(latitude, longitude, radius_km, limit)
 
-        # Sort by distance
-        results.sort(key=lambda x: x['distance_km'])
-        return results[:limit]
+        return self._to_entries(store, [
+            (i, {'distance_km': float(distance)}) for distance, i in zip(distances, indices)
+        ])
 
-    def find_by_area(self, area: str, limit: int = 10) -> List[MichelinRestaurant]:
+    def find_by_area(self, area: str, limit: int = 10) -> Restaurants:
         """Find restaurants in a specific area/neighborhood."""
-        restaurants = self._load_data()
+        store = self._load_data()
 
         # Filter by area/neighborhood
-        area_restaurants = [r for r in restaurants if area.lower() in r.location.lower()]
-        return area_restaurants[:limit]
+        mask = store.contains('Location', area)
+        return self._to_restaurants(store, np.flatnonzero(mask)[:limit])
 
-    def find_multiple_cuisines(self, cuisines: List[str], limit: int = 10) -> List[MichelinRestaurant]:
+    def find_multiple_cuisines(self, cuisines: List[str], limit: int = 10) -> Restaurants:
         """Find restaurants serving multiple cuisines."""
-        restaurants = self._load_data()
+        store = self._load_data()
 
         # Filter restaurants that serve all specified cuisines
-        multi_cuisine = [
-            r for r in restaurants
-            if all(cuisine.lower() in r.cuisine.lower() for cuisine in cuisines)
-        ]
+        wanted = [cuisine.lower() for cuisine in cuisines]
+        mask = store.category_mask('Cuisine', lambda value: all(c in value for c in wanted))
 
-        return multi_cuisine[:limit]
+        return self._to_restaurants(store, np.flatnonzero(mask)[:limit])
 
-    def find_by_dietary(self, dietary: str, limit: int = 10) -> List[MichelinRestaurant]:
+    def find_by_dietary(self, dietary: str, limit: int = 10) -> Restaurants:
         """Find restaurants with specific dietary options."""
-        restaurants = self._load_data()
+        store = self._load_data()
 
         # Filter by dietary options
-        dietary_restaurants = [
-            r for r in restaurants
-            if dietary.lower() in r.description.lower()
-        ]
+        mask = store.contains('Description', dietary)
+        return self._to_restaurants(store, np.flatnonzero(mask)[:limit])
 
-        return dietary_restaurants[:limit]
-
-    def find_unique_cuisines(self, limit: int = 10) -> List[dict]:
+    def find_unique_cuisines(self, limit: int = 10) -> Entries:
         """Find restaurants with unique or rare cuisines."""
-        restaurants = self._load_data()
+        store = self._load_data()
+        categories = store.categories['Cuisine']
+        codes = store.codes['Cuisine']
 
-        # Count cuisine occurrences
+        # Count cuisine occurrences, weighting each distinct value by its row count
+        category_counts = np.bincount(codes[codes >= 0], minlength=len(categories))
         cuisine_counts = {}
-        for r in restaurants:
-            for cuisine in r.cuisine.split(','):
+        for category, count in zip(categories, category_counts):
+            for cuisine in category.split(','):
                 cuisine = cuisine.strip()
-                cuisine_counts[cuisine] = cuisine_counts.get(cuisine, 0) + 1
+                cuisine_counts[cuisine] = cuisine_counts.get(cuisine, 0) + int(count)
 
         # Find rare cuisines (appearing in less than 5 restaurants)
         rare_cuisines = {c: count for c, count in cuisine_counts.items() if count < 5}
+        rare_by_code = [
+            [c.strip() for c in category.split(',') if c.strip() in rare_cuisines]
+            for category in categories
+        ]
 
         # Find restaurants with rare cuisines
         rare_restaurants = []
-        for r in restaurants:
-            rare_cuisine_list = [c.strip() for c in r.cuisine.split(',') if c.strip() in rare_cuisines]
+        for i in np.flatnonzero(codes >= 0):
+            rare_cuisine_list = rare_by_code[codes[i]]
             if rare_cuisine_list:
-                rare_restaurants.append({
-                    'restaurant': r,
-                    'rare_cuisines': rare_cuisine_list
-                })
+                rare_restaurants.append((i, {'rare_cuisines': rare_cuisine_list}))
+                if len(rare_restaurants) >= limit:
+                    break
 
-        return rare_restaurants[:limit]
+        return self._to_entries(store, rare_restaurants)
 
-    def find_by_amenities(self, amenities: List[str], limit: int = 10) -> List[MichelinRestaurant]:
-        """Find restaurants with specific amenities."""
-        restaurants = self._load_data()
-
-        # Filter by amenities
-        amenity_restaurants = [
-            r for r in restaurants
-            if all(amenity.lower() in r.facilities_and_services.lower() for amenity in amenities)
-        ]
+    def _find_by_facility_terms(self, terms: List[str], limit: int) -> Restaurants:
+        store = self._load_data()
+        mask = store.facilities.match_all(terms)
+        return self._to_restaurants(store, np.flatnonzero(mask)[:limit])
 
-        return amenity_restaurants[:limit]
+    def find_by_amenities(self, amenities: List[str], limit: int = 10) -> Restaurants:
+        """Find restaurants with specific amenities."""
+        return self._find_by_facility_terms(amenities, limit)
 
-    def find_by_features(self, features: List[str], limit: int = 10) -> List[MichelinRestaurant]:
+    def find_by_features(self, features: List[str], limit: int = 10) -> Restaurants:
         """Find restaurants with special features."""
-        restaurants = self._load_data()
+        return self._find_by_facility_terms(features, limit)
 
-        # Filter by features
-        feature_restaurants = [
-            r for r in restaurants
-            if all(feature.lower() in r.facilities_and_services.lower() for feature in features)
-        ]
-
-        return feature_restaurants[:limit]
-
-    def find_by_services(self, services: List[str], limit: int = 10) -> List[MichelinRestaurant]:
+    def find_by_services(self, services: List[str], limit: int = 10) -> Restaurants:
         """Find restaurants with specific services."""
-        restaurants = self._load_data()
-
-        # Filter by services
-        service_restaurants = [
-            r for r in restaurants
-            if all(service.lower() in r.facilities_and_services.lower() for service in services)
-        ]
-
-        return service_restaurants[:limit]
+        return self._find_by_facility_terms(services, limit)
 
     def find_recent_award_changes(self, years: int = 1) -> List[dict]:
         """Find restaurants that recently gained/lost stars."""
@@ -400,22 +600,17 @@ class MichelinService:
         # This is a placeholder for future implementation
         return []
 
-    def find_multiple_awards(self) -> List[MichelinRestaurant]:
+    def find_multiple_awards(self) -> Restaurants:
         """Find restaurants with multiple awards."""
-        restaurants = self._load_data()
+        store = self._load_data()
 
         # Filter restaurants with multiple awards
-        multi_award = [
-            r for r in restaurants
-            if r.award and ('Stars' in r.award and 'Bib Gourmand' in r.award)
-        ]
-
-        return multi_award
+        mask = store.category_mask('Award', lambda value: 'stars' in value and 'bib gourmand' in value)
+        return self._to_restaurants(store, np.flatnonzero(mask))
 
-    def find_green_stars(self, limit: int = 10) -> List[MichelinRestaurant]:
+    def find_green_stars(self, limit: int = 10) -> Restaurants:
         """Find restaurants with green stars."""
-        restaurants = self._load_data()
+        store = self._load_data()
 
         # Filter restaurants with green stars
-        green_star = [r for r in restaurants if r.has_green_star]
-        return green_star[:limit]
+        return self._to_restaurants(store, np.flatnonzero(store.green_star)[:limit])
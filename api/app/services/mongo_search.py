@@ -0,0 +1,62 @@
+import re
+from typing import Dict, Optional
+from pymongo import UpdateOne
+from common.restaurants import SEARCH_INDEXES, SHADOW_FIELD, TEXT_INDEX, normalize, shadow_fields
+
+REGEX_SPECIAL = re.compile(r"([.^$*+?()\[\]{}|\\])")
+
+def _prefix(value: str) -> Dict:
+    # Anchored and case-sensitive on an already-lowercased field, so it turns into index bounds
+    return {"$regex": "^" + REGEX_SPECIAL.sub(r"\\\1", value)}
+
+def build_search_query(name: Optional[str] = None, cuisine: Optional[str] = None,
+                       location: Optional[str] = None, price: Optional[str] = None,
+                       text: Optional[str] = None) -> Dict:
+    """Translate the search filters into an index-friendly Mongo filter.
+
+    - name: prefix of the restaurant name
+    - cuisine / location: prefix of any comma-separated part ("paris", "france", "japan")
+    - price: exact price symbol(s)
+    - text: whole-word search through the $text index (name, cuisine, description)
+    """
+    query = {}
+    if name and normalize(name):
+        query[f"{SHADOW_FIELD}.name"] = _prefix(normalize(name))
+    if cuisine and normalize(cuisine):
+        query[f"{SHADOW_FIELD}.cuisine"] = _prefix(normalize(cuisine))
+    if location and normalize(location):
+        query[f"{SHADOW_FIELD}.location"] = _prefix(normalize(location))
+    if price and normalize(price):
+        query[f"{SHADOW_FIELD}.price"] = normalize(price)
+    if text and text.strip():
+        query["$text"] = {"$search": text.strip()}
+    return query
+
+async def ensure_search_indexes(collection, backfill: bool = True) -> int:
+    """Create the search indexes and fill shadow fields for documents loaded without them.
+
+    Returns the number of documents backfilled. create_index is a no-op when the
+    index already exists, so this is safe to run on every startup.
+    """
+    for name, keys in SEARCH_INDEXES:
+        await collection.create_index(keys, name=name)
+    try:
+        await collection.create_index(TEXT_INDEX)
+    except Exception as e:
+        # A collection allows one text index; keep whichever the pipeline created
+        print(f"Text index not created: {e}")
+
+    if not backfill:
+        return 0
+    updated = 0
+    batch = []
+    cursor = collection.find({SHADOW_FIELD: {"$exists": False}}, {"Name": 1, "michelin_info": 1})
+    async for document in cursor:
+        batch.append(UpdateOne({"_id": document["_id"]},
+                               {"$set": shadow_fields(document.get("Name"), document.get("michelin_info") or {})}))
+        if len(batch) == 1000:
+            updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+    return updated
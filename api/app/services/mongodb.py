@@ -1,35 +1,138 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
+from pymongo.monitoring import ConnectionPoolListener
 import os
+import threading
+from typing import Dict
 from dotenv import load_dotenv
 
 load_dotenv()
 
+class PoolMetrics(ConnectionPoolListener):
+    """Connection pool counters collected from pymongo's CMAP monitoring events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def connection_created(self, event):
+        self._add(open=1)
+
+    def connection_closed(self, event):
+        self._add(open=-1)
+
+    def connection_checked_out(self, event):
+        self._add(checked_out=1, checkouts=1)
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
+
+    def connection_check_out_failed(self, event):
+        self._add(checkout_failures=1)
+
+    def pool_cleared(self, event):
+        self._add(pool_clears=1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def snapshot(self, max_pool_size: int) -> Dict:
+        with self._lock:
+            return {
+                "open_connections": self.open,
+                "checked_out": self.checked_out,
+                "max_pool_size": max_pool_size,
+                "utilization": self.checked_out / max_pool_size if max_pool_size else 0.0,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears,
+            }
+
 class MongoDB:
     def __init__(self):
         self.client = None
         self.db = None
         self.async_client = None
         self.async_db = None
+        self.pool_metrics = PoolMetrics()
+
+    def _client_options(self) -> Dict:
+        """Pool, timeout and read preference settings, overridable through MONGODB_* variables"""
+        return {
+            "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", 100)),
+            "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", 0)),
+            "maxIdleTimeMS": int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", 60000)),
+            "waitQueueTimeoutMS": int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 5000)),
+            "connectTimeoutMS": int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", 5000)),
+            "serverSelectionTimeoutMS": int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+            "socketTimeoutMS": int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", 30000)),
+            "readPreference": os.getenv("MONGODB_READ_PREFERENCE", "primaryPreferred"),
+            "event_listeners": [self.pool_metrics],
+        }
 
     def connect(self):
         """Connect to MongoDB"""
-        self.client = MongoClient(os.getenv("MONGODB_URI"))
-        self.db = self.client[os.getenv("MONGODB_DATABASE")]
+        if self.client is None:
+            self.client = MongoClient(os.getenv("MONGODB_URI"), **self._client_options())
+            self.db = self.client[os.getenv("MONGODB_DATABASE")]
         return self.db
 
     async def async_connect(self):
-        """Connect to MongoDB asynchronously"""
-        self.async_client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
-        self.async_db = self.async_client[os.getenv("MONGODB_DATABASE")]
+        """Return the shared async database, creating the pooled client on first use"""
+        if self.async_client is None:
+            self.async_client = AsyncIOMotorClient(os.getenv("MONGODB_URI"), **self._client_options())
+            self.async_db = self.async_client[os.getenv("MONGODB_DATABASE")]
         return self.async_db
 
+    @property
+    def configured(self) -> bool:
+        return bool(os.getenv("MONGODB_URI"))
+
+    async def ping(self) -> bool:
+        """Round-trip to the server through the shared pool"""
+        db = await self.async_connect()
+        try:
+            await db.command("ping")
+            return True
+        except Exception:
+            return False
+
+    def metrics(self) -> Dict:
+        return self.pool_metrics.snapshot(self._client_options()["maxPoolSize"])
+
     def close(self):
         """Close MongoDB connection"""
         if self.client:
             self.client.close()
+            self.client = None
         if self.async_client:
             self.async_client.close()
+            self.async_client = None
 
 # Create a global instance
 mongodb = MongoDB()
+
+async def get_database():
+    """FastAPI dependency returning the shared async database"""
+    return await mongodb.async_connect()
@@ -0,0 +1,19 @@
+import base64
+import json
+from typing import Dict
+
+def encode_cursor(position: Dict) -> str:
+    """Opaque, URL-safe token for the last item of a page"""
+    raw = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict:
+    """Inverse of `encode_cursor`; raises ValueError for anything that is not one of our tokens"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(position, dict):
+        raise ValueError("Invalid pagination cursor")
+    return position
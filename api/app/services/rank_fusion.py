@@ -0,0 +1,18 @@
+from typing import Sequence, Tuple
+import numpy as np
+
+# Standard RRF constant: damps the weight of the very top ranks so neither retriever dominates
+RRF_K = 60
+
+def reciprocal_rank_fusion(rankings: Sequence[np.ndarray], size: int, k: int = RRF_K) -> Tuple[np.ndarray, np.ndarray]:
+    """Fuse ranked row lists (best first, rows < size) into (rows, scores), best first with ties by row.
+
+    Each row scores the sum over rankings of 1 / (k + rank), rank counted from 1.
+    """
+    scores = np.zeros(size, dtype=np.float64)
+    for ranking in rankings:
+        ranking = np.asarray(ranking, dtype=np.int64)
+        scores[ranking] += 1.0 / (k + np.arange(1, len(ranking) + 1))
+    rows = np.flatnonzero(scores)
+    order = np.lexsort((rows, -scores[rows]))
+    return rows[order], scores[rows][order]
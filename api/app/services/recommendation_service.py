@@ -0,0 +1,67 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from ml.models.recommendation import RestaurantRecommender
+
+class RecommendationUnavailable(Exception):
+    """No trained model is loaded"""
+
+class RecommendationTimeout(Exception):
+    """Inference did not finish within its latency budget"""
+
+class RecommendationService:
+    """The trained recommender, loaded once per process and queried off the event loop.
+
+    Model arrays are memory-mapped read-only, so every uvicorn worker maps the same
+    files and the OS keeps a single copy in the page cache. Lookups run in a small
+    dedicated thread pool and are abandoned (503) once they exceed their budget.
+    """
+
+    def __init__(self, model_path: Optional[str] = None):
+        self.model_path = model_path or os.getenv("RECOMMENDER_MODEL_PATH")
+        self.workers = int(os.getenv("RECOMMENDATION_WORKERS", 4))
+        self.timeout = float(os.getenv("RECOMMENDATION_TIMEOUT_MS", 100)) / 1000
+        self.batch_timeout = float(os.getenv("RECOMMENDATION_BATCH_TIMEOUT_MS", 500)) / 1000
+        self._model: Optional[RestaurantRecommender] = None
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="recommend")
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        """Map the trained model; replaces the served model only once it loaded successfully"""
+        model = RestaurantRecommender(self.model_path)
+        model.load_model(mmap_mode="r")
+        if model.matrix is None:
+            raise FileNotFoundError(f"No trained recommendation model in {model.model_path}")
+        self._model = model
+        print(f"Loaded recommendation model: {len(model.ids)} restaurants from {model.model_path}")
+
+    async def _run(self, timeout: float, method: str, *args):
+        """Call `method` of the served model in the thread pool, resolved only once a model is known to be loaded"""
+        model = self._model
+        if model is None:
+            raise RecommendationUnavailable("Recommendation model is not loaded")
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(loop.run_in_executor(self._executor, getattr(model, method), *args), timeout)
+        except asyncio.TimeoutError:
+            raise RecommendationTimeout(f"Recommendation exceeded its {timeout * 1000:.0f} ms budget")
+        return result, (time.perf_counter() - start) * 1000
+
+    async def recommend(self, restaurant_id: str, n: int) -> Tuple[List[Tuple[str, float]], float]:
+        """Most similar restaurants and the inference time in ms; KeyError for unknown ids"""
+        return await self._run(self.timeout, 'similar', restaurant_id, n)
+
+    async def recommend_many(self, restaurant_ids: List[str], n: int) -> Tuple[Dict[str, List[Tuple[str, float]]], float]:
+        """`recommend` for a batch in one thread-pool task; unknown ids are left out"""
+        return await self._run(self.batch_timeout, 'similar_many', restaurant_ids, n)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+recommendation_service = RecommendationService()
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+def make_cache_key(path: str, params: Iterable[Tuple[str, str]], version: Optional[str]) -> str:
+    """Stable key for a read-only request: path, query params in sorted order and the dataset version"""
+    normalized = "&".join(f"{k}={v}" for k, v in sorted(params))
+    digest = hashlib.sha1(f"{path}?{normalized}".encode("utf-8")).hexdigest()
+    return f"{version or 'unversioned'}:{digest}"
+
+def pack_response(body: bytes, headers: Dict[str, str]) -> bytes:
+    """Cache value for a response body plus the headers to replay with it on a hit"""
+    return json.dumps(headers).encode("utf-8") + b"\n" + body
+
+def unpack_response(value: bytes) -> Tuple[bytes, Dict[str, str]]:
+    """Inverse of `pack_response`; the JSON header line never contains a raw newline"""
+    headers, _, body = value.partition(b"\n")
+    return body, json.loads(headers)
+
+class ResponseCache:
+    """Bounded in-process LRU cache of serialized responses with a TTL.
+
+    Entries are evicted least-recently-used first once either `max_entries` or
+    `max_bytes` (body + key size) is exceeded. Keys carry the dataset version,
+    and `clear()` is hooked to dataset reloads, so stale results are never served.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 10000, ttl: float = 300):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: bytes):
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, value = self._entries.pop(key)
+        self._bytes -= len(key) + len(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+class RedisResponseCache:
+    """Same interface as `ResponseCache`, backed by Redis so several workers share one cache.
+
+    Eviction is left to the server's maxmemory policy; entries expire after `ttl`.
+    Old dataset versions are simply never looked up again and age out.
+    """
+
+    PREFIX = "michelinmind:search:"
+
+    def __init__(self, url: str, ttl: float = 300):
+        import redis  # optional dependency, only needed for the shared backend
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self.client.get(self.PREFIX + key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes):
+        self.client.set(self.PREFIX + key, value, ex=max(1, int(self.ttl)))
+
+    def clear(self):
+        # Keys are versioned; other workers may still be serving the previous version
+        pass
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+def create_response_cache():
+    """Build the cache configured through SEARCH_CACHE_* environment variables"""
+    ttl = float(os.getenv("SEARCH_CACHE_TTL", 300))
+    redis_url = os.getenv("SEARCH_CACHE_REDIS_URL")
+    if redis_url:
+        return RedisResponseCache(redis_url, ttl=ttl)
+    return ResponseCache(
+        max_bytes=int(os.getenv("SEARCH_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+        max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 10000)),
+        ttl=ttl,
+    )
@@ -0,0 +1,374 @@
+import json
+import os
+import re
+from bisect import bisect_left
+import numpy as np
+import pandas as pd
+from functools import cached_property
+from typing import Callable, Dict, Iterable, List, Optional
+from .facet_index import FacetIndex
+from .spatial_index import SpatialIndex
+from .text_index import TextIndex
+
+class StringColumn:
+    """Immutable string column stored as one contiguous UTF-8 buffer plus row offsets.
+
+    Rows are separated by a NUL byte so a substring search over the whole buffer
+    can never match across two rows.
+    """
+
+    SEPARATOR = b"\x00"
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray, present: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+        self.present = present
+
+    @classmethod
+    def from_values(cls, values: Iterable[Optional[str]]) -> "StringColumn":
+        """Build a column from python strings, using None for missing values"""
+        chunks = []
+        offsets = [0]
+        present = []
+        position = 0
+        for value in values:
+            encoded = value.encode("utf-8").replace(cls.SEPARATOR, b"") if value is not None else b""
+            chunks.append(encoded + cls.SEPARATOR)
+            position += len(encoded) + 1
+            offsets.append(position)
+            present.append(value is not None)
+        data = np.frombuffer(b"".join(chunks), dtype=np.uint8)
+        return cls(data, np.asarray(offsets, dtype=np.int64), np.asarray(present, dtype=bool))
+
+    def save(self, prefix: str):
+        """Write the column as `<prefix>.data.npy`, `<prefix>.offsets.npy` and `<prefix>.present.npy`"""
+        np.save(f"{prefix}.data.npy", self.data)
+        np.save(f"{prefix}.offsets.npy", self.offsets)
+        np.save(f"{prefix}.present.npy", self.present)
+
+    @classmethod
+    def load(cls, prefix: str, mmap_mode: Optional[str] = "r") -> "StringColumn":
+        """Open a column written by `save`, memory-mapped by default"""
+        return cls(
+            np.load(f"{prefix}.data.npy", mmap_mode=mmap_mode),
+            np.load(f"{prefix}.offsets.npy", mmap_mode=mmap_mode),
+            np.load(f"{prefix}.present.npy", mmap_mode=mmap_mode),
+        )
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        if not self.present[index]:
+            return None
+        start, end = self.offsets[index], self.offsets[index + 1] - 1
+        return self.data[start:end].tobytes().decode("utf-8")
+
+    def raw(self, index: int) -> bytes:
+        """Encoded UTF-8 value without decoding it (b"" when missing)"""
+        start, end = self.offsets[index], self.offsets[index + 1] - 1
+        return self.data[start:end].tobytes()
+
+    def contains(self, needle: str) -> np.ndarray:
+        """Return a mask of rows whose value contains `needle` (exact byte match)"""
+        mask = np.zeros(len(self), dtype=bool)
+        encoded = needle.encode("utf-8")
+        if not encoded:
+            mask[:] = self.present
+            return mask
+        pattern = re.compile(re.escape(encoded))
+        buffer = memoryview(self.data)
+        position = 0
+        while True:
+            match = pattern.search(buffer, position)
+            if match is None:
+                break
+            row = int(np.searchsorted(self.offsets, match.start(), side="right")) - 1
+            mask[row] = True
+            # Skip the rest of this row, one hit per row is enough
+            position = int(self.offsets[row + 1])
+        return mask
+
+
+def _optional_str(value) -> Optional[str]:
+    return str(value) if pd.notna(value) else None
+
+
+class _SortedView:
+    """Values of a column in the order of a row permutation, as a sequence `bisect` can search"""
+
+    def __init__(self, column: StringColumn, order: np.ndarray):
+        self.column = column
+        self.order = order
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, index: int) -> str:
+        return self.column[self.order[index]]
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+class RestaurantStore:
+    """Immutable columnar view of the Michelin dataset, built once and shared by every request.
+
+    - Award, Price, Cuisine and Location are interned as integer codes into a small
+      category table, so substring filters only run over the distinct values.
+    - Free-text columns are kept as `StringColumn`s, with a pre-lowercased copy for search.
+    - Coordinates and the green star flag are plain NumPy arrays.
+
+    `save` writes the columns together with every index and pre-rendered column
+    built so far, and `load` memory-maps all of it. Processes that load the same
+    directory share one copy of the data through the page cache.
+    """
+
+    COLUMNS = (
+        'Name', 'Address', 'Location', 'Price', 'Cuisine', 'Longitude', 'Latitude',
+        'PhoneNumber', 'Url', 'WebsiteUrl', 'Award', 'GreenStar', 'FacilitiesAndServices', 'Description'
+    )
+    CATEGORICAL_COLUMNS = ('Award', 'Price', 'Cuisine', 'Location')
+    STRING_COLUMNS = ('Name', 'Address', 'PhoneNumber', 'Url', 'WebsiteUrl', 'FacilitiesAndServices', 'Description')
+    SEARCH_COLUMNS = ('Name', 'Address', 'FacilitiesAndServices', 'Description')
+    INDEXES = ('spatial', 'text', 'facilities', 'name_order')
+
+    def __init__(
+        self,
+        strings: Dict[str, StringColumn],
+        lowered: Dict[str, StringColumn],
+        categories: Dict[str, List[str]],
+        codes: Dict[str, np.ndarray],
+        latitude: np.ndarray,
+        longitude: np.ndarray,
+        green_star: np.ndarray,
+        version: Optional[str] = None,
+        directory: Optional[str] = None,
+        mmap_mode: Optional[str] = None,
+        saved: Iterable[str] = (),
+    ):
+        self.version = version
+        self.strings = strings
+        self.lowered = lowered
+        self.categories = categories
+        self.categories_lower = {col: [c.lower() for c in values] for col, values in categories.items()}
+        self.codes = {col: _read_only(values) for col, values in codes.items()}
+        self.latitude = _read_only(latitude)
+        self.longitude = _read_only(longitude)
+        self.green_star = _read_only(green_star)
+        self.size = len(self.latitude)
+        self.has_coordinates = _read_only(~(np.isnan(self.latitude) | np.isnan(self.longitude)))
+
+        # Price level is the number of currency symbols ("$$" -> 2), 0 when missing
+        price_levels = np.array([len(p) for p in categories['Price']] + [0], dtype=np.int8)
+        self.price_level = _read_only(price_levels[self.codes['Price']])
+
+        self._derived: Dict[str, object] = {}
+        # Set by `save` / `load`: where this store's files live and which artifacts are among them
+        self.directory = directory
+        self._mmap_mode = mmap_mode
+        self._saved = set(saved)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, version: Optional[str] = None) -> "RestaurantStore":
+        """Build the store from the raw Michelin CSV DataFrame"""
+        strings = {
+            col: StringColumn.from_values(_optional_str(v) for v in df[col])
+            for col in cls.STRING_COLUMNS
+        }
+        lowered = {
+            col: StringColumn.from_values(
+                strings[col][i].lower() if strings[col].present[i] else None for i in range(len(df))
+            )
+            for col in cls.SEARCH_COLUMNS
+        }
+        categories = {}
+        codes = {}
+        for col in cls.CATEGORICAL_COLUMNS:
+            col_codes, uniques = pd.factorize(df[col].map(_optional_str), use_na_sentinel=True)
+            codes[col] = col_codes.astype(np.int32)
+            categories[col] = [str(u) for u in uniques]
+
+        latitude = pd.to_numeric(df['Latitude'], errors='coerce').to_numpy(dtype=np.float64)
+        longitude = pd.to_numeric(df['Longitude'], errors='coerce').to_numpy(dtype=np.float64)
+        green_star = pd.to_numeric(df['GreenStar'], errors='coerce').fillna(0).to_numpy() > 0
+        return cls(strings, lowered, categories, codes, latitude, longitude, green_star, version)
+
+    def save(self, directory: str):
+        """Persist the columns, built indexes and pre-rendered columns so `load` can reopen them"""
+        os.makedirs(directory, exist_ok=True)
+        for col, column in self.strings.items():
+            column.save(os.path.join(directory, col))
+        for col, column in self.lowered.items():
+            column.save(os.path.join(directory, f"lowered.{col}"))
+        for col, codes in self.codes.items():
+            np.save(os.path.join(directory, f"{col}.codes.npy"), codes)
+        np.save(os.path.join(directory, "latitude.npy"), self.latitude)
+        np.save(os.path.join(directory, "longitude.npy"), self.longitude)
+        np.save(os.path.join(directory, "green_star.npy"), self.green_star)
+
+        saved = []
+        for name in self.INDEXES:
+            # cached_property keeps built indexes in the instance dict
+            if name in self.__dict__:
+                self._save_index(name, os.path.join(directory, name))
+                saved.append(name)
+        for name, value in self._derived.items():
+            if isinstance(value, StringColumn):
+                value.save(os.path.join(directory, f"derived.{name}"))
+                saved.append(f"derived.{name}")
+        with open(os.path.join(directory, "categories.json"), "w") as f:
+            json.dump({"version": self.version, "categories": self.categories, "artifacts": saved}, f, ensure_ascii=False)
+        self.directory = directory
+        self._saved = set(saved)
+
+    def _save_index(self, name: str, path: str):
+        index = getattr(self, name)
+        if name == 'name_order':
+            np.save(f"{path}.npy", index)
+        elif name == 'spatial':
+            index.save(f"{path}.joblib")
+        else:
+            index.save(path)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = "r") -> "RestaurantStore":
+        """Reopen a saved store; with the default mmap_mode nothing but the category table is read eagerly"""
+        with open(os.path.join(directory, "categories.json")) as f:
+            header = json.load(f)
+        return cls(
+            strings={col: StringColumn.load(os.path.join(directory, col), mmap_mode) for col in cls.STRING_COLUMNS},
+            lowered={col: StringColumn.load(os.path.join(directory, f"lowered.{col}"), mmap_mode) for col in cls.SEARCH_COLUMNS},
+            categories=header["categories"],
+            codes={
+                col: np.load(os.path.join(directory, f"{col}.codes.npy"), mmap_mode=mmap_mode)
+                for col in cls.CATEGORICAL_COLUMNS
+            },
+            latitude=np.load(os.path.join(directory, "latitude.npy"), mmap_mode=mmap_mode),
+            longitude=np.load(os.path.join(directory, "longitude.npy"), mmap_mode=mmap_mode),
+            green_star=np.load(os.path.join(directory, "green_star.npy"), mmap_mode=mmap_mode),
+            version=header["version"],
+            directory=directory,
+            mmap_mode=mmap_mode,
+            saved=header.get("artifacts", ()),
+        )
+
+    def _saved_path(self, name: str) -> Optional[str]:
+        """Path prefix of a saved artifact, or None if it has to be built"""
+        return os.path.join(self.directory, name) if name in self._saved else None
+
+    def unsaved_artifacts(self) -> List[str]:
+        """Indexes and pre-rendered columns built in this process rather than loaded from `directory`"""
+        built = [name for name in self.INDEXES if name in self.__dict__]
+        built += [f"derived.{name}" for name, value in self._derived.items() if isinstance(value, StringColumn)]
+        return [name for name in built if name not in self._saved]
+
+    @cached_property
+    def spatial(self) -> SpatialIndex:
+        """BallTree over the coordinates, built on first use and shared for the store's lifetime"""
+        path = self._saved_path('spatial')
+        if path:
+            return SpatialIndex.load(f"{path}.joblib", self._mmap_mode)
+        return SpatialIndex(self.latitude, self.longitude)
+
+    @cached_property
+    def text(self) -> TextIndex:
+        """BM25 inverted index over name, cuisine and description"""
+        path = self._saved_path('text')
+        if path:
+            return TextIndex.load(path, self._mmap_mode)
+        cuisine = [self.categories_lower['Cuisine'][c] if c >= 0 else None for c in self.codes['Cuisine']]
+        return TextIndex.build(self.size, [
+            ((self.lowered['Name'][i] for i in range(self.size)), 3.0),
+            (cuisine, 2.0),
+            ((self.lowered['Description'][i] for i in range(self.size)), 1.0),
+        ])
+
+    @cached_property
+    def facilities(self) -> FacetIndex:
+        """Bitmap per distinct entry of the comma-separated FacilitiesAndServices column"""
+        path = self._saved_path('facilities')
+        if path:
+            return FacetIndex.load(path, self._mmap_mode)
+        column = self.strings['FacilitiesAndServices']
+        return FacetIndex.build(self.size, (column[i] for i in range(self.size)))
+
+    @cached_property
+    def name_order(self) -> np.ndarray:
+        """Rows with a name, sorted by (name, row), for binary search in `find_name`"""
+        path = self._saved_path('name_order')
+        if path:
+            return np.load(f"{path}.npy", mmap_mode=self._mmap_mode)
+        names = self.strings['Name']
+        rows = [i for i in range(self.size) if names.present[i]]
+        return np.array(sorted(rows, key=lambda i: (names[i], i)), dtype=np.int64)
+
+    def warm(self) -> "RestaurantStore":
+        """Build (or map) the derived indexes up front so no request pays for them"""
+        for name in self.INDEXES:
+            getattr(self, name)
+        return self
+
+    def derived(self, name: str, factory: Callable[["RestaurantStore"], object]):
+        """Per-store memo for structures built outside this module, e.g. pre-rendered responses.
+
+        StringColumn results are saved with the store and memory-mapped back by `load`.
+        """
+        if name not in self._derived:
+            path = self._saved_path(f"derived.{name}")
+            self._derived[name] = StringColumn.load(path, self._mmap_mode) if path else factory(self)
+        return self._derived[name]
+
+    def all(self) -> np.ndarray:
+        """Mask selecting every row"""
+        return np.ones(self.size, dtype=bool)
+
+    def category_mask(self, column: str, predicate: Callable[[str], bool]) -> np.ndarray:
+        """Mask of rows whose lowercased category satisfies `predicate`"""
+        table = np.array([predicate(c) for c in self.categories_lower[column]] + [False], dtype=bool)
+        # Missing values have code -1, which picks the trailing False
+        return table[self.codes[column]]
+
+    def contains(self, column: str, term: str) -> np.ndarray:
+        """Case-insensitive substring filter on a categorical or searchable text column"""
+        term = term.lower()
+        if column in self.codes:
+            return self.category_mask(column, lambda value: term in value)
+        return self.lowered[column].contains(term)
+
+    def equals(self, column: str, value: str) -> np.ndarray:
+        """Exact match filter on a categorical column"""
+        try:
+            code = self.categories[column].index(str(value))
+        except ValueError:
+            return np.zeros(self.size, dtype=bool)
+        return self.codes[column] == code
+
+    def value(self, column: str, index: int):
+        """Single cell, None when missing"""
+        if column in self.codes:
+            code = self.codes[column][index]
+            return self.categories[column][code] if code >= 0 else None
+        if column in self.strings:
+            return self.strings[column][index]
+        if column == 'Latitude':
+            return None if np.isnan(self.latitude[index]) else float(self.latitude[index])
+        if column == 'Longitude':
+            return None if np.isnan(self.longitude[index]) else float(self.longitude[index])
+        if column == 'GreenStar':
+            return int(self.green_star[index])
+        raise KeyError(column)
+
+    def record(self, index: int) -> Dict:
+        """One row as a dict keyed by the original CSV column names"""
+        return {col: self.value(col, index) for col in self.COLUMNS}
+
+    def find_name(self, name: str) -> Optional[int]:
+        """Row index of the first restaurant with this exact name"""
+        names, order = self.strings['Name'], self.name_order
+        position = bisect_left(_SortedView(names, order), name)
+        if position < len(order) and names[order[position]] == name:
+            return int(order[position])
+        return None
@@ -0,0 +1,207 @@
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+# Award -> counter field in the per-cuisine rollup
+AWARD_FIELDS = {
+    "3 Stars": "three_stars",
+    "2 Stars": "two_stars",
+    "1 Star": "one_star",
+    "Bib Gourmand": "bib_gourmand",
+    "Selected": "selected",
+}
+STARRED_AWARDS = ["1 Star", "2 Stars", "3 Stars"]
+
+# "City, Country" -> {City, Country}; single-part locations (e.g. "Hong Kong") have no Country
+CITY_COUNTRY = {
+    "City": {"$arrayElemAt": [{"$split": ["$michelin_info.Location", ", "]}, 0]},
+    "Country": {"$arrayElemAt": [{"$split": ["$michelin_info.Location", ", "]}, 1]},
+}
+
+# Output collection -> pipeline computing it, run together as the branches of one $facet
+ROLLUPS: Dict[str, List[Dict]] = {
+    "restaurants_per_cuisine": [
+        {"$group": {
+            "_id": "$michelin_info.Cuisine",
+            "google_rating": {"$avg": "$google_info.google_rating"},
+            # Kept so the average can be maintained incrementally (see apply_rollup_delta)
+            "google_rating_sum": {"$sum": "$google_info.google_rating"},
+            "google_rating_count": {"$sum": {"$cond": [{"$isNumber": "$google_info.google_rating"}, 1, 0]}},
+            "total_restaurants": {"$sum": 1},
+            **{
+                field: {"$sum": {"$cond": [{"$eq": ["$michelin_info.Award", award]}, 1, 0]}}
+                for award, field in AWARD_FIELDS.items()
+            },
+        }},
+        {"$set": {"michelin_rating": {field: f"${field}" for field in AWARD_FIELDS.values()}}},
+        {"$project": {field: 0 for field in AWARD_FIELDS.values()}},
+        {"$sort": {"google_rating": -1}},
+    ],
+    "restaurants_per_city": [
+        {"$match": {
+            "michelin_info.Location": {"$exists": True, "$ne": ""},
+            "michelin_info.Award": {"$in": STARRED_AWARDS},  # Exclude "Bib Gourmand" & "Selected"
+        }},
+        {"$group": {"_id": CITY_COUNTRY, "total_restaurants": {"$sum": 1}}},
+        {"$sort": {"total_restaurants": -1}},
+    ],
+    "three_star_restaurants_per_city": [
+        {"$match": {"michelin_info.Award": "3 Stars"}},
+        {"$group": {"_id": CITY_COUNTRY, "three_star_count": {"$sum": 1}}},
+        {"$sort": {"three_star_count": -1}},
+    ],
+}
+
+def rollup_pipeline() -> List[Dict]:
+    """Every rollup in a single collection scan"""
+    return [{"$facet": ROLLUPS}]
+
+# Field that, once back at zero, means a rollup group no longer has any restaurant
+COUNT_FIELDS = {
+    "restaurants_per_cuisine": "total_restaurants",
+    "restaurants_per_city": "total_restaurants",
+    "three_star_restaurants_per_city": "three_star_count",
+}
+
+# Every group apply_rollup_delta touches is logged here, so a rebuild can redo those it raced with
+CHANGES = "rollup_changes"
+CHANGES_TTL_SECONDS = 24 * 3600
+# Changes logged this long before a rebuild's scan are redone too, to absorb clock skew between hosts
+CHANGE_MARGIN = timedelta(minutes=5)
+# Rounds of redoing changed groups before a rebuild is swapped in regardless
+MAX_CHANGE_ROUNDS = 5
+
+AVERAGE_RATING = {"$cond": [
+    {"$gt": ["$google_rating_count", 0]},
+    {"$divide": ["$google_rating_sum", "$google_rating_count"]},
+    None,
+]}
+
+def _city_key(location: str) -> Dict:
+    """Same _id shape as the CITY_COUNTRY group key"""
+    parts = location.split(", ")
+    key = {"City": parts[0]}
+    if len(parts) > 1:
+        key["Country"] = parts[1]
+    return key
+
+def contributions(document: Optional[Dict]) -> List[Tuple[str, object, Dict[str, float]]]:
+    """(rollup collection, group _id, counter increments) a restaurant document adds to the rollups"""
+    if not document:
+        return []
+    info = document.get("michelin_info") or {}
+    award = info.get("Award")
+    location = info.get("Location")
+    rating = (document.get("google_info") or {}).get("google_rating")
+
+    cuisine = {"total_restaurants": 1}
+    if award in AWARD_FIELDS:
+        cuisine[f"michelin_rating.{AWARD_FIELDS[award]}"] = 1
+    if isinstance(rating, (int, float)):
+        cuisine["google_rating_sum"] = rating
+        cuisine["google_rating_count"] = 1
+    result = [("restaurants_per_cuisine", info.get("Cuisine"), cuisine)]
+    if location and award in STARRED_AWARDS:
+        result.append(("restaurants_per_city", _city_key(location), {"total_restaurants": 1}))
+    if location and award == "3 Stars":
+        result.append(("three_star_restaurants_per_city", _city_key(location), {"three_star_count": 1}))
+    return result
+
+async def apply_rollup_delta(db, document: Optional[Dict], sign: int):
+    """Add (sign=1) or remove (sign=-1) one restaurant's contribution to every rollup.
+
+    Called from the write path so the rollup collections stay current between
+    DAG runs; each step is an atomic single-document update. Every group touched
+    is logged in CHANGES for a concurrent rebuild (see `write_rollups`).
+    """
+    for rollup, key, increments in contributions(document):
+        collection = db[rollup]
+        await collection.update_one(
+            {"_id": key},
+            {"$inc": {field: sign * value for field, value in increments.items()}},
+            upsert=True,
+        )
+        if rollup == "restaurants_per_cuisine":
+            await collection.update_one({"_id": key}, [{"$set": {"google_rating": AVERAGE_RATING}}])
+        if sign < 0:
+            await collection.delete_one({"_id": key, COUNT_FIELDS[rollup]: {"$lte": 0}})
+        await db[CHANGES].insert_one({"rollup": rollup, "key": key, "at": datetime.now(timezone.utc)})
+
+async def update_rollups(db, before: Optional[Dict], after: Optional[Dict]):
+    """Move a restaurant's contribution from its previous state to its new one (either may be None)"""
+    if before is not None and after is not None and contributions(before) == contributions(after):
+        return
+    await apply_rollup_delta(db, before, -1)
+    await apply_rollup_delta(db, after, 1)
+
+def _group_filter(rollup: str, key) -> Dict:
+    """Restaurants that can fall into group `key` of `rollup` (the rollup's own pipeline narrows it down)"""
+    if rollup == "restaurants_per_cuisine":
+        return {"michelin_info.Cuisine": key}
+    # Mirrors CITY_COUNTRY: the first two ", "-separated parts of the location
+    location = re.escape(key["City"]) + (f", {re.escape(key['Country'])}(, |$)" if "Country" in key else "$")
+    return {"michelin_info.Location": {"$regex": f"^{location}"}}
+
+def _redo_changed_groups(db, staging, rollup: str, source: str, since: datetime) -> int:
+    """Recompute, in `staging`, the groups of `rollup` the API changed after `since`; returns how many.
+
+    A delta applied while the rebuild was scanning may or may not be in its result,
+    so those groups are recomputed from the restaurants rather than replayed.
+    """
+    redone = 0
+    for _ in range(MAX_CHANGE_ROUNDS):
+        checked = datetime.now(timezone.utc)
+        keys = db[CHANGES].distinct("key", {"rollup": rollup, "at": {"$gte": since}})
+        if not keys:
+            break
+        for key in keys:
+            pipeline = [{"$match": _group_filter(rollup, key)}] + ROLLUPS[rollup]
+            entry = next((entry for entry in db[source].aggregate(pipeline) if entry["_id"] == key), None)
+            if entry is None:
+                staging.delete_one({"_id": key})
+            else:
+                staging.replace_one({"_id": key}, entry, upsert=True)
+        redone += len(keys)
+        since = checked - CHANGE_MARGIN
+    return redone
+
+def write_rollups(db, result: Dict[str, List[Dict]], source: Optional[str] = None,
+                  since: Optional[datetime] = None) -> Dict[str, int]:
+    """Replace each rollup collection with freshly computed groups; the one writer the pipeline and API share.
+
+    Every rollup is written to `<name>_rebuild`, indexed, then renamed over the live
+    collection, so readers never see it empty or half-written and groups left with
+    no restaurant disappear. With `source` and `since` (when the scan behind `result`
+    started), groups the API changed meanwhile are recomputed before the swap instead
+    of being lost. Takes a synchronous (pymongo) database.
+    """
+    counts = {}
+    for rollup, entries in result.items():
+        staging = db[f"{rollup}_rebuild"]
+        staging.drop()
+        staging.create_index([(COUNT_FIELDS[rollup], -1)])
+        if entries:
+            staging.insert_many(entries)
+        if source is not None and since is not None:
+            _redo_changed_groups(db, staging, rollup, source, since - CHANGE_MARGIN)
+        staging.rename(rollup, dropTarget=True)
+        counts[rollup] = db[rollup].estimated_document_count()
+    return counts
+
+def rebuild_rollups(db, source: str = "restaurants") -> Dict[str, int]:
+    """Recompute every rollup from scratch with the single-scan $facet and swap the collections in"""
+    started = datetime.now(timezone.utc)
+    result = next(db[source].aggregate(rollup_pipeline(), allowDiskUse=True), {})
+    return write_rollups(db, result, source, started)
+
+async def prepare_rollups(db, source: str = "restaurants") -> Optional[Dict[str, int]]:
+    """Index the rollups for the stats endpoints, and build them once if the pipeline has not yet"""
+    for rollup, count_field in COUNT_FIELDS.items():
+        await db[rollup].create_index([(count_field, -1)])
+    await db[CHANGES].create_index("at", expireAfterSeconds=CHANGES_TTL_SECONDS)
+    if await db.restaurants_per_cuisine.estimated_document_count() == 0 and \
+            await db[source].estimated_document_count() > 0:
+        # Motor wraps a pymongo database the synchronous writer can use from a thread
+        return await asyncio.to_thread(rebuild_rollups, db.delegate, source)
+    return None
@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+import requests
+from common.embeddings import EMBEDDING_MODEL, encode, load_encoder
+from common.vector_index import VectorIndex
+
+DEFAULT_VECTOR_INDEX_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'vector_index')
+)
+
+class SemanticSearch:
+    """Query embedding plus the memory-mapped IVF index built by the pipeline.
+
+    The index is keyed by `restaurant_key` (the Michelin URL), so it keeps working
+    across dataset refreshes; callers map keys back to rows. Embeddings of recent
+    queries are cached, since encoding costs more than the index lookup. With
+    VECTOR_INDEX_URL set, `fetch` downloads the index the pipeline published there
+    (e.g. https://storage.googleapis.com/<bucket>/vector_index) into `index_dir`.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None):
+        self.index_dir = index_dir or os.getenv("VECTOR_INDEX_DIR", DEFAULT_VECTOR_INDEX_DIR)
+        self.index_url = os.getenv("VECTOR_INDEX_URL", "").rstrip("/")
+        self.n_probe = int(os.getenv("VECTOR_SEARCH_NPROBE", 32))
+        self.query_cache_size = int(os.getenv("VECTOR_QUERY_CACHE_SIZE", 1024))
+        self.index: Optional[VectorIndex] = None
+        self.encoder = None
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.index is not None and self.encoder is not None
+
+    def fetch(self) -> bool:
+        """Download the published index into `index_dir` unless it is already there; True if files changed"""
+        if not self.index_url:
+            return False
+        response = requests.get(f"{self.index_url}/{VectorIndex.META_FILE}", timeout=60)
+        response.raise_for_status()
+        meta_path = os.path.join(self.index_dir, VectorIndex.META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, "rb") as f:
+                if f.read() == response.content:
+                    return False
+        os.makedirs(self.index_dir, exist_ok=True)
+        # Arrays first and the metadata last, each renamed into place like VectorIndex.save does
+        for name in VectorIndex.files(json.loads(response.content)):
+            self._download(name)
+        tmp = f"{meta_path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(response.content)
+        os.replace(tmp, meta_path)
+        print(f"Fetched vector index from {self.index_url} into {self.index_dir}")
+        return True
+
+    def _download(self, name: str):
+        path = os.path.join(self.index_dir, name)
+        with requests.get(f"{self.index_url}/{name}", stream=True, timeout=60) as response:
+            response.raise_for_status()
+            with open(f"{path}.tmp", "wb") as f:
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    f.write(chunk)
+        os.replace(f"{path}.tmp", path)
+
+    def load(self):
+        """Map the index and load the model it was built with"""
+        index = VectorIndex.load(self.index_dir, n_probe=self.n_probe)
+        self.encoder = load_encoder(index.model or EMBEDDING_MODEL)
+        self.index = index
+        self._query_cache.clear()
+        print(f"Loaded vector index: {len(index)} restaurants, {len(index.centroids)} lists from {self.index_dir}")
+
+    def embed(self, query: str) -> np.ndarray:
+        key = " ".join(query.lower().split())
+        with self._cache_lock:
+            vector = self._query_cache.get(key)
+            if vector is not None:
+                self._query_cache.move_to_end(key)
+                return vector
+        vector = encode(self.encoder, [key])[0]
+        with self._cache_lock:
+            self._query_cache[key] = vector
+            if len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """(restaurant key, cosine similarity) of the k closest restaurants"""
+        scores, positions = self.index.search(self.embed(query), k)
+        return [(self.index.key(int(i)), float(score)) for score, i in zip(scores, positions)]
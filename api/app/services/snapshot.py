@@ -0,0 +1,89 @@
+import fcntl
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional
+from .restaurant_store import RestaurantStore
+
+DEFAULT_SNAPSHOT_DIR = os.path.normpath(
+    os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data', 'michelin_snapshot')
+)
+
+class DatasetSnapshot:
+    """Local, memory-mapped copy of the parsed Michelin dataset.
+
+    Each save goes into its own versioned sub-directory; `meta.json` names the current
+    one and is replaced atomically, so a reader never opens a half-written snapshot.
+    The HTTP validators (ETag / Last-Modified) of the CSV it came from are kept in
+    `meta.json` for conditional refreshes.
+
+    Several API worker processes share one directory: `lock` serializes refreshes
+    across them, so one process downloads and saves while the others wait and
+    then map the files it wrote.
+    """
+
+    META_FILE = "meta.json"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv("MICHELIN_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)
+
+    def read_meta(self) -> Dict:
+        """Return the current snapshot metadata, or {} if there is no snapshot yet"""
+        try:
+            with open(os.path.join(self.directory, self.META_FILE)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def current_path(self) -> Optional[str]:
+        """Directory of the current snapshot version, or None if there is none"""
+        path = self.read_meta().get("path")
+        return os.path.join(self.directory, path) if path else None
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Exclusive lock shared by every process using this snapshot directory"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, self.LOCK_FILE), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def load(self) -> Optional[RestaurantStore]:
+        """Memory-map the current snapshot, or return None if there is none"""
+        meta = self.read_meta()
+        if not meta.get("path"):
+            return None
+        try:
+            return RestaurantStore.load(os.path.join(self.directory, meta["path"]))
+        except (FileNotFoundError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable snapshot {meta['path']}: {e}")
+            return None
+
+    def save(self, store: RestaurantStore, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Write `store` as a new snapshot version and make it current"""
+        os.makedirs(self.directory, exist_ok=True)
+        previous = self.read_meta().get("path")
+        path = f"{store.version or 'snapshot'}-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}"
+        store.save(os.path.join(self.directory, path))
+
+        meta = {
+            "path": path,
+            "version": store.version,
+            "etag": etag,
+            "last_modified": last_modified,
+            "saved_at": datetime.now(timezone.utc).isoformat(),
+        }
+        tmp_path = os.path.join(self.directory, f".{self.META_FILE}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.directory, self.META_FILE))
+
+        # Processes that still map the old files keep them alive until they unmap
+        if previous and previous != path:
+            shutil.rmtree(os.path.join(self.directory, previous), ignore_errors=True)
@@ -0,0 +1,116 @@
+import joblib
+import numpy as np
+from sklearn.neighbors import BallTree
+from typing import Optional, Tuple
+
+EARTH_RADIUS_KM = 6371
+
+def _haversine(lat1, lon1, cos_lat1, lat2, lon2, cos_lat2):
+    """Haversine on angles already in radians, with cos(lat) precomputed"""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * cos_lat2 * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+def _check_limit(k: int):
+    if k < 1:
+        raise ValueError("limit must be at least 1")
+
+def haversine_km(lat1, lon1, lat2, lon2, dtype=np.float64):
+    """Great-circle distance in km between points given in degrees; broadcasts like any ufunc"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=dtype)) for v in (lat1, lon1, lat2, lon2))
+    return _haversine(lat1, lon1, np.cos(lat1), lat2, lon2, np.cos(lat2))
+
+class SpatialIndex:
+    """Haversine BallTree over the restaurants that have coordinates.
+
+    Queries return (distances_km, row_indices) where the row indices refer to the
+    `RestaurantStore` the index was built from, nearest first.
+    """
+
+    def __init__(self, latitude: np.ndarray, longitude: np.ndarray, leaf_size: int = 40, dtype=np.float32):
+        valid = ~(np.isnan(latitude) | np.isnan(longitude))
+        self.rows = np.flatnonzero(valid)
+        points = np.radians(np.column_stack([latitude[valid], longitude[valid]]))
+        self.tree = BallTree(points, leaf_size=leaf_size, metric='haversine') if len(self.rows) else None
+
+        # Precomputed inputs for the brute-force kernel
+        self.dtype = dtype
+        self.lat_rad = points[:, 0].astype(dtype)
+        self.lon_rad = points[:, 1].astype(dtype)
+        self.cos_lat = np.cos(self.lat_rad)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def save(self, path: str):
+        """Pickle the index with joblib, which stores every array (the tree's included) as raw data"""
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str, mmap_mode: Optional[str] = "r") -> "SpatialIndex":
+        """Open an index written by `save`; with the default mmap_mode the tree's arrays are memory-mapped"""
+        return joblib.load(path, mmap_mode=mmap_mode)
+
+    def nearest(self, latitude: float, longitude: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """The k nearest restaurants to a point"""
+        _check_limit(k)
+        k = min(k, len(self.rows))
+        if k <= 0:
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        distances, positions = self.tree.query(np.radians([[latitude, longitude]]), k=k)
+        return distances[0] * EARTH_RADIUS_KM, self.rows[positions[0]]
+
+    def within_radius(self, latitude: float, longitude: float, radius_km: float,
+                      limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Restaurants within `radius_km` of a point, optionally truncated to the closest `limit`"""
+        if limit is not None:
+            _check_limit(limit)
+        if self.tree is None or radius_km < 0:
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        positions, distances = self.tree.query_radius(
+            np.radians([[latitude, longitude]]),
+            r=radius_km / EARTH_RADIUS_KM,
+            return_distance=True,
+            sort_results=True
+        )
+        positions, distances = positions[0][:limit], distances[0][:limit]
+        return distances * EARTH_RADIUS_KM, self.rows[positions]
+
+    def distances(self, latitudes, longitudes) -> np.ndarray:
+        """Distance matrix (queries x indexed restaurants) in km, computed in one vectorized pass"""
+        lat = np.radians(np.asarray(latitudes, dtype=self.dtype).reshape(-1, 1))
+        lon = np.radians(np.asarray(longitudes, dtype=self.dtype).reshape(-1, 1))
+        return _haversine(lat, lon, np.cos(lat), self.lat_rad, self.lon_rad, self.cos_lat)
+
+    def nearest_batch(self, latitudes, longitudes, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k for many query points in one tree traversal; returns (queries x k) distance and row arrays"""
+        _check_limit(k)
+        points = np.radians(np.column_stack([
+            np.asarray(latitudes, dtype=np.float64), np.asarray(longitudes, dtype=np.float64)
+        ]))
+        k = min(k, len(self.rows))
+        if k <= 0 or len(points) == 0:
+            return np.empty((len(points), 0)), np.empty((len(points), 0), dtype=np.int64)
+        distances, positions = self.tree.query(points, k=k)
+        return distances * EARTH_RADIUS_KM, self.rows[positions]
+
+    def nearest_brute_force(self, latitudes, longitudes, k: int,
+                            chunk_size: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+        """Same result as `nearest_batch` from the distance-matrix kernel; used to cross-check the tree"""
+        _check_limit(k)
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        k = min(k, len(self.rows))
+        distances = np.empty((len(latitudes), max(k, 0)))
+        rows = np.empty((len(latitudes), max(k, 0)), dtype=np.int64)
+        if k <= 0:
+            return distances, rows
+
+        # Chunk the queries so the distance matrix stays at chunk_size x n floats
+        for start in range(0, len(latitudes), chunk_size):
+            matrix = self.distances(latitudes[start:start + chunk_size], longitudes[start:start + chunk_size])
+            top = np.argpartition(matrix, k - 1, axis=1)[:, :k]
+            top_distances = np.take_along_axis(matrix, top, axis=1)
+            order = np.argsort(top_distances, axis=1, kind='stable')
+            distances[start:start + chunk_size] = np.take_along_axis(top_distances, order, axis=1)
+            rows[start:start + chunk_size] = self.rows[np.take_along_axis(top, order, axis=1)]
+        return distances, rows
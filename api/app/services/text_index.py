@@ -0,0 +1,140 @@
+import re
+import numpy as np
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens"""
+    return TOKEN_RE.findall(text.lower())
+
+class TextIndex:
+    """In-memory inverted index with BM25 ranking and prefix matching.
+
+    Postings are stored CSR-style: the documents of term `t` are
+    `docs[offsets[t]:offsets[t + 1]]` (sorted row ids) with matching term
+    frequencies in `freqs`. The vocabulary is sorted so a prefix maps to a
+    contiguous range of term ids.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    # Terms reached only through prefix expansion score a little below an exact hit
+    PREFIX_WEIGHT = 0.8
+    MAX_EXPANSIONS = 64
+
+    def __init__(self, vocabulary: Sequence[str], offsets: np.ndarray, docs: np.ndarray,
+                 freqs: np.ndarray, doc_lengths: np.ndarray):
+        # Any sorted sequence works, e.g. a memory-mapped StringColumn after `load`
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.docs = docs
+        self.freqs = freqs
+        self.doc_lengths = doc_lengths
+        self.size = len(doc_lengths)
+        self.avg_doc_length = float(doc_lengths.mean()) if self.size and doc_lengths.mean() > 0 else 1.0
+        doc_freqs = np.diff(offsets)
+        self.idf = np.log(1 + (self.size - doc_freqs + 0.5) / (doc_freqs + 0.5))
+
+    @classmethod
+    def build(cls, size: int, fields: Iterable[Tuple[Iterable[str], float]]) -> "TextIndex":
+        """Index `size` rows from (texts, weight) pairs, one pair per field.
+
+        A token's frequency in a row is the weighted sum over fields, so a hit in a
+        heavily weighted field (e.g. the name) counts for more.
+        """
+        term_ids = {}
+        term_list, doc_list, weight_list = [], [], []
+        for texts, weight in fields:
+            for doc, text in enumerate(texts):
+                if not text:
+                    continue
+                for token in TOKEN_RE.findall(text):
+                    term_list.append(term_ids.setdefault(token, len(term_ids)))
+                    doc_list.append(doc)
+                    weight_list.append(weight)
+
+        # Renumber terms alphabetically so prefixes are contiguous ranges
+        vocabulary = sorted(term_ids, key=term_ids.get)
+        rank = np.empty(len(vocabulary), dtype=np.int64)
+        rank[np.argsort(np.array(vocabulary, dtype=object))] = np.arange(len(vocabulary))
+        vocabulary.sort()
+
+        terms = rank[np.asarray(term_list, dtype=np.int64)]
+        doc_ids = np.asarray(doc_list, dtype=np.int64)
+        keys, inverse = np.unique(terms * max(size, 1) + doc_ids, return_inverse=True)
+        freqs = np.bincount(inverse, weights=np.asarray(weight_list, dtype=np.float64)).astype(np.float32)
+        posting_terms = keys // max(size, 1)
+        docs = (keys % max(size, 1)).astype(np.int32)
+        offsets = np.searchsorted(posting_terms, np.arange(len(vocabulary) + 1)).astype(np.int64)
+        doc_lengths = np.bincount(docs, weights=freqs, minlength=size).astype(np.float32)
+        return cls(vocabulary, offsets, docs, freqs, doc_lengths)
+
+    def save(self, prefix: str):
+        """Write the index as `<prefix>.*.npy` files, the vocabulary as a StringColumn"""
+        from .restaurant_store import StringColumn
+
+        StringColumn.from_values(self.vocabulary[i] for i in range(len(self.vocabulary))).save(f"{prefix}.vocabulary")
+        np.save(f"{prefix}.offsets.npy", self.offsets)
+        np.save(f"{prefix}.docs.npy", self.docs)
+        np.save(f"{prefix}.freqs.npy", self.freqs)
+        np.save(f"{prefix}.doc_lengths.npy", self.doc_lengths)
+
+    @classmethod
+    def load(cls, prefix: str, mmap_mode: Optional[str] = "r") -> "TextIndex":
+        """Open an index written by `save`, memory-mapped by default"""
+        from .restaurant_store import StringColumn
+
+        return cls(
+            StringColumn.load(f"{prefix}.vocabulary", mmap_mode),
+            np.load(f"{prefix}.offsets.npy", mmap_mode=mmap_mode),
+            np.load(f"{prefix}.docs.npy", mmap_mode=mmap_mode),
+            np.load(f"{prefix}.freqs.npy", mmap_mode=mmap_mode),
+            np.load(f"{prefix}.doc_lengths.npy", mmap_mode=mmap_mode),
+        )
+
+    def _expand(self, token: str) -> Tuple[range, List[Tuple[int, float]]]:
+        """Term ids matching `token` exactly or by prefix, and those of them to score with their weight
+
+        Matching uses the whole range; only scoring is capped at MAX_EXPANSIONS terms.
+        """
+        start = bisect_left(self.vocabulary, token)
+        end = bisect_left(self.vocabulary, token + "\U0010ffff", lo=start)
+        expanded = [
+            (term, 1.0 if self.vocabulary[term] == token else self.PREFIX_WEIGHT)
+            for term in range(start, end)
+        ]
+        if len(expanded) > self.MAX_EXPANSIONS:
+            # Score the exact match and the most common completions
+            expanded.sort(key=lambda item: (item[1], self.offsets[item[0] + 1] - self.offsets[item[0]]), reverse=True)
+            expanded = expanded[:self.MAX_EXPANSIONS]
+        return range(start, end), expanded
+
+    def search(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows matching every query token (as a word or word prefix), best BM25 score first"""
+        tokens = tokenize(query)
+        if not tokens:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        matched = np.ones(self.size, dtype=bool)
+        for token in tokens:
+            terms, scored = self._expand(token)
+            # Postings of a term range are contiguous, so every completion's rows are one slice
+            token_matched = np.zeros(self.size, dtype=bool)
+            token_matched[self.docs[self.offsets[terms.start]:self.offsets[terms.stop]]] = True
+            token_scores = np.zeros(self.size, dtype=np.float32)
+            for term, weight in scored:
+                start, end = self.offsets[term], self.offsets[term + 1]
+                docs, freqs = self.docs[start:end], self.freqs[start:end]
+                norm = self.K1 * (1 - self.B + self.B * self.doc_lengths[docs] / self.avg_doc_length)
+                term_scores = weight * self.idf[term] * freqs * (self.K1 + 1) / (freqs + norm)
+                # A row matched by several completions keeps its best one
+                np.maximum.at(token_scores, docs, term_scores.astype(np.float32))
+            matched &= token_matched
+            scores += token_scores
+
+        rows = np.flatnonzero(matched)
+        order = np.argsort(-scores[rows], kind='stable')
+        return rows[order], scores[rows][order]
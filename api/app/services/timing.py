@@ -0,0 +1,24 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+class StageTimer:
+    """Wall time per named request stage, reported as a Server-Timing header.
+
+    Stages may run in different threads; each one only writes its own entry.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def header(self) -> str:
+        """`Server-Timing` value, e.g. "filter;dur=0.12, lexical;dur=1.40" """
+        return ", ".join(f"{name};dur={ms:.2f}" for name, ms in self.stages.items())
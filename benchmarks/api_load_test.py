@@ -0,0 +1,60 @@
+"""
+Closed-loop HTTP load test against a running API.
+
+Each of --concurrency workers sends requests back to back for --duration seconds,
+cycling through the given paths. Prints throughput and latency percentiles per path.
+
+Usage (API started with `make start-api`, MongoDB reachable):
+    python -m benchmarks.api_load_test --base-url http://localhost:8000 \
+        --concurrency 50 --duration 30 /api/v1/restaurants/?limit=10
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+import httpx
+import numpy as np
+
+async def worker(client, paths, offset, deadline, latencies, errors):
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors[path] += 1
+        except httpx.HTTPError:
+            errors[path] += 1
+        latencies[path].append(time.perf_counter() - start)
+
+async def run(base_url, paths, concurrency, duration):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            worker(client, paths, n, deadline, latencies, errors) for n in range(concurrency)
+        ))
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{total} requests in {duration}s with {concurrency} workers: {total / duration:.1f} req/s")
+    for path, values in latencies.items():
+        ms = np.array(values) * 1000
+        print(
+            f"  {path}\n"
+            f"    n={len(ms)} errors={errors[path]} "
+            f"p50={np.percentile(ms, 50):.1f}ms p95={np.percentile(ms, 95):.1f}ms "
+            f"p99={np.percentile(ms, 99):.1f}ms max={ms.max():.1f}ms"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.paths, args.concurrency, args.duration))
@@ -0,0 +1,147 @@
+"""
+Tail latency of fast requests while slow, CPU-heavy searches run on the same
+uvicorn worker, with service calls inline on the event loop (SERVICE_WORKERS=0,
+the old behaviour) and on the bounded service executor.
+
+Builds a synthetic dataset snapshot, starts one API process per setting with the
+response cache disabled, and drives mixed traffic at it: --slow-concurrency
+clients loop over full-dataset searches while --fast-concurrency clients loop
+over single-restaurant lookups. No MongoDB or network access is needed.
+
+Usage:
+    python -m benchmarks.blocking_load_test [--restaurants 200000] [--duration 10] [--workers 0 8]
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+import httpx
+import numpy as np
+import pandas as pd
+from api.app.services.restaurant_store import RestaurantStore
+from api.app.services.snapshot import DatasetSnapshot
+from benchmarks.api_load_test import worker
+
+WORDS = ("seasonal tasting menu local produce wine list modern classic french japanese sushi "
+         "italian pasta seafood grill creative garden terrace chef counter vegetarian tapas").split()
+CUISINES = ["Modern Cuisine", "Japanese", "French, Creative", "Italian", "Seafood", "Steakhouse", "Korean"]
+CITIES = ["Paris, France", "Tokyo, Japan", "New York, USA", "London, United Kingdom", "Lima, Peru"]
+AWARDS = ["3 Stars", "2 Stars", "1 Star", "Bib Gourmand", "Selected Restaurants"]
+FACILITIES = ["Air conditioning", "Terrace", "Great view", "Car park", "Wheelchair access"]
+
+# Slow: full-dataset scans and large result pages; fast: a single pre-rendered row
+SLOW_PATHS = [
+    "/api/v1/search/search?query=tasting&limit=100",
+    "/api/v1/search/price-comparison?locations=Paris&locations=Tokyo&locations=Lima",
+    "/api/v1/search/unique-cuisines?limit=100",
+    "/api/v1/search/search?cuisine=Japanese&min_stars=1&limit=100",
+]
+FAST_PATHS = [f"/api/v1/search/restaurants/Resto%20{i}" for i in range(0, 1000, 7)]
+
+def synthetic_frame(count, seed=0):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "Name": [f"Resto {i}" for i in range(count)],
+        "Address": [f"{i} Street" for i in range(count)],
+        "Location": [rng.choice(CITIES) for _ in range(count)],
+        "Price": [rng.choice(["$", "$$", "$$$", "$$$$"]) for _ in range(count)],
+        "Cuisine": [rng.choice(CUISINES) for _ in range(count)],
+        "Longitude": [rng.uniform(-180, 180) for _ in range(count)],
+        "Latitude": [rng.uniform(-60, 60) for _ in range(count)],
+        "PhoneNumber": [None] * count,
+        "Url": [f"https://guide.michelin.com/r/{i}" for i in range(count)],
+        "WebsiteUrl": [None] * count,
+        "Award": [rng.choice(AWARDS) for _ in range(count)],
+        "GreenStar": [rng.random() < 0.05 for _ in range(count)],
+        "FacilitiesAndServices": [",".join(rng.sample(FACILITIES, 2)) for _ in range(count)],
+        "Description": [" ".join(rng.choices(WORDS, k=30)) for _ in range(count)],
+    })
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_api(snapshot_dir, service_workers):
+    port = free_port()
+    env = dict(os.environ, MICHELIN_SNAPSHOT_DIR=snapshot_dir, SEARCH_CACHE_MAX_ENTRIES="0",
+               SERVICE_WORKERS=str(service_workers), MONGODB_URI="")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + 120
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("API did not become ready")
+
+async def mixed_load(base_url, slow_concurrency, fast_concurrency, duration):
+    latencies = {"slow": defaultdict(list), "fast": defaultdict(list)}
+    errors = {"slow": defaultdict(int), "fast": defaultdict(int)}
+    concurrency = slow_concurrency + fast_concurrency
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        # Warm both paths before measuring
+        for path in SLOW_PATHS + FAST_PATHS[:5]:
+            await client.get(path)
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            *(worker(client, SLOW_PATHS, n, deadline, latencies["slow"], errors["slow"])
+              for n in range(slow_concurrency)),
+            *(worker(client, FAST_PATHS, n, deadline, latencies["fast"], errors["fast"])
+              for n in range(fast_concurrency)),
+        )
+        executor = (await client.get("/metrics")).json().get("service_executor", {})
+    return latencies, errors, executor
+
+def summarize(kind, latencies, errors):
+    ms = np.concatenate([np.array(v) for v in latencies.values()]) * 1000 if latencies else np.zeros(1)
+    failed = sum(errors.values())
+    print(f"  {kind:>4}: n={len(ms):6d} errors={failed:4d} p50={np.percentile(ms, 50):7.1f}ms "
+          f"p95={np.percentile(ms, 95):7.1f}ms p99={np.percentile(ms, 99):7.1f}ms max={ms.max():7.1f}ms")
+
+def main(restaurants, duration, slow_concurrency, fast_concurrency, workers):
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        start = time.perf_counter()
+        DatasetSnapshot(snapshot_dir).save(RestaurantStore.from_frame(synthetic_frame(restaurants), version="bench"))
+        print(f"{restaurants} restaurants, snapshot built in {time.perf_counter() - start:.1f}s; "
+              f"{slow_concurrency} slow + {fast_concurrency} fast clients for {duration}s")
+        for service_workers in workers:
+            process, base_url = start_api(snapshot_dir, service_workers)
+            try:
+                latencies, errors, executor = asyncio.run(
+                    mixed_load(base_url, slow_concurrency, fast_concurrency, duration)
+                )
+            finally:
+                process.terminate()
+                process.wait()
+            label = "inline on the event loop" if service_workers == 0 else f"{service_workers} service threads"
+            print(f"SERVICE_WORKERS={service_workers} ({label})")
+            summarize("slow", latencies["slow"], errors["slow"])
+            summarize("fast", latencies["fast"], errors["fast"])
+            if service_workers:
+                print(f"  executor: peak_queued={executor.get('peak_queued')} rejected={executor.get('rejected')} "
+                      f"wait_p99={executor.get('wait_ms_p99', 0):.1f}ms run_p99={executor.get('run_ms_p99', 0):.1f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--restaurants", type=int, default=200_000)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--slow-concurrency", type=int, default=1)
+    parser.add_argument("--fast-concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 8])
+    args = parser.parse_args()
+    main(args.restaurants, args.duration, args.slow_concurrency, args.fast_concurrency, args.workers)
@@ -0,0 +1,111 @@
+"""
+Compare the original clean_data serialization (iterrows + one indented json.dumps)
+with the chunked, column-wise NDJSON writer, on synthetic data at growing scales.
+
+Reports wall time and peak traced memory (tracemalloc) for each. The streamed
+writer's peak should stay roughly flat as the row count grows.
+
+Usage:
+    python -m benchmarks.clean_data_benchmark [--rows 17000] [--scales 1 10 100] [--legacy-max-rows 200000]
+"""
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from pipeline.documents import iter_ndjson, read_merged_chunks, write_ndjson
+
+def synthetic_csv(path, rows, seed=0):
+    """Michelin + Google shaped CSV, written in slices so generation itself stays small"""
+    rng = np.random.default_rng(seed)
+    awards = np.array(["3 Stars", "2 Stars", "1 Star", "Bib Gourmand", "Selected"])
+    cuisines = np.array(["Modern Cuisine", "Japanese", "French, Creative", "Italian", "Seafood"])
+    locations = np.array(["Paris, France", "Tokyo, Japan", "New York, USA", "Wien, Austria", "Seoul, South Korea"])
+    step = 100_000
+    for start in range(0, rows, step):
+        n = min(step, rows - start)
+        ids = np.arange(start, start + n)
+        frame = pd.DataFrame({
+            "Name": [f"Restaurant {i}" for i in ids],
+            "Address": [f"{i} Main Street" for i in ids],
+            "Location": locations[rng.integers(0, len(locations), n)],
+            "Price": rng.choice(["€", "€€", "€€€", "€€€€"], n),
+            "Cuisine": cuisines[rng.integers(0, len(cuisines), n)],
+            "Longitude": rng.uniform(-180, 180, n),
+            "Latitude": rng.uniform(-90, 90, n),
+            "PhoneNumber": np.where(rng.random(n) < 0.1, None, [f"+33 1 {i:08d}" for i in ids]),
+            "Url": [f"https://guide.michelin.com/r/{i}" for i in ids],
+            "WebsiteUrl": np.where(rng.random(n) < 0.3, None, [f"https://r{i}.example.com" for i in ids]),
+            "Award": awards[rng.integers(0, len(awards), n)],
+            "GreenStar": rng.integers(0, 2, n),
+            "FacilitiesAndServices": "Air conditioning,Credit card / Debit card accepted,Wheelchair access",
+            "Description": "Seasonal tasting menu with local produce and a long wine list. " * 4,
+            "google_rating": np.where(rng.random(n) < 0.05, np.nan, rng.uniform(3.5, 5, n).round(1)),
+            "google_reviews": np.where(rng.random(n) < 0.05, np.nan, rng.integers(0, 5000, n)),
+        })
+        frame.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+def legacy_clean(csv_path, out_path):
+    """The original clean_data body (minus GCS): iterrows into a list, one json.dumps(indent=4)"""
+    merged_data = pd.read_csv(csv_path)
+    merged_data = merged_data.replace({pd.NA: None, float("nan"): None})
+    structured_data = []
+    for _, row in merged_data.iterrows():
+        structured_data.append({
+            "Name": row["Name"],
+            "michelin_info": {
+                "Address": row["Address"], "Location": row["Location"], "Price": row["Price"],
+                "Cuisine": row["Cuisine"], "Longitude": row["Longitude"], "Latitude": row["Latitude"],
+                "PhoneNumber": row["PhoneNumber"], "Url": row["Url"], "WebsiteUrl": row["WebsiteUrl"],
+                "Award": row["Award"], "GreenStar": int(row["GreenStar"]),
+                "FacilitiesAndServices": row["FacilitiesAndServices"], "Description": row["Description"],
+            },
+            "google_info": {"google_rating": row["google_rating"], "google_reviews": row["google_reviews"]},
+        })
+    json_output = json.dumps(structured_data, indent=4, ensure_ascii=False)
+    with open(out_path, "w") as f:
+        f.write(json_output)
+    return len(structured_data)
+
+def streamed_clean(csv_path, out_path, chunk_size):
+    return write_ndjson(iter_ndjson(read_merged_chunks(csv_path, chunk_size=chunk_size)), out_path)
+
+def measure(fn, *args):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    documents = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return documents, elapsed, peak / 2**20
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=17_000, help="base row count (roughly today's dataset)")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--legacy-max-rows", type=int, default=200_000,
+                        help="skip the original implementation above this size (it is slow and memory hungry)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'impl':>9} {'seconds':>9} {'peak MiB':>9} {'rows/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "michelin_google.csv")
+        for scale in args.scales:
+            rows = args.rows * scale
+            synthetic_csv(csv_path, rows)
+            runs = [("streamed", streamed_clean, (csv_path, os.path.join(tmp, "out.ndjson"), args.chunk_size))]
+            if rows <= args.legacy_max_rows:
+                runs.insert(0, ("legacy", legacy_clean, (csv_path, os.path.join(tmp, "out.json"))))
+            for label, fn, fn_args in runs:
+                documents, elapsed, peak = measure(fn, *fn_args)
+                assert documents == rows, (label, documents, rows)
+                print(f"{rows:>10} {label:>9} {elapsed:>9.2f} {peak:>9.1f} {rows / elapsed:>10.0f}")
+
+if __name__ == "__main__":
+    main()
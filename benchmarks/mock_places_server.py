@@ -0,0 +1,102 @@
+"""
+Local stand-in for the Google Places findplacefromtext / details endpoints.
+
+Ratings are derived from a hash of the query, so runs are reproducible. The server
+can add latency, throttle (429 with Retry-After), fail (503), answer without
+ratings and deny requests that do not carry --api-key (REQUEST_DENIED), so the pipeline's concurrency, retries and details fallback can be
+exercised without an API key or quota.
+
+Usage:
+    python -m benchmarks.mock_places_server --port 8090 --latency 0.05 --throttle-rate 0.02
+    PLACES_API_BASE_URL=http://localhost:8090 airflow tasks test michelin_star_explorer ...
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+from collections import Counter
+from typing import Optional
+from aiohttp import web
+
+def place_for(query: str):
+    digest = hashlib.sha1(query.encode("utf-8")).digest()
+    if digest[0] < 13:  # ~5% of restaurants are not found
+        return None
+    return {
+        "place_id": "mock_" + digest[:8].hex(),
+        "rating": round(3.5 + digest[1] / 255 * 1.5, 1),
+        "user_ratings_total": int.from_bytes(digest[2:4], "big") % 5000,
+    }
+
+def create_app(latency: float, throttle_rate: float, error_rate: float, details_rate: float,
+               api_key: Optional[str] = None) -> web.Application:
+    counts = Counter()
+
+    def denied(request):
+        if api_key is None or request.query.get("key") == api_key:
+            return None
+        counts["denied"] += 1
+        return web.json_response({"status": "REQUEST_DENIED", "error_message": "The provided API key is invalid."})
+
+    async def faults():
+        counts["requests"] += 1
+        if latency:
+            await asyncio.sleep(latency * (0.5 + random.random()))
+        roll = random.random()
+        if roll < throttle_rate:
+            counts["throttled"] += 1
+            raise web.HTTPTooManyRequests(headers={"Retry-After": "1"})
+        if roll < throttle_rate + error_rate:
+            counts["errors"] += 1
+            raise web.HTTPServiceUnavailable()
+
+    async def find_place(request):
+        await faults()
+        rejection = denied(request)
+        if rejection is not None:
+            return rejection
+        place = place_for(request.query.get("input", ""))
+        if place is None:
+            return web.json_response({"candidates": [], "status": "ZERO_RESULTS"})
+        if random.random() < details_rate:
+            # Force the client through the details call
+            place = {"place_id": place["place_id"]}
+        return web.json_response({"candidates": [place], "status": "OK"})
+
+    async def details(request):
+        await faults()
+        rejection = denied(request)
+        if rejection is not None:
+            return rejection
+        counts["details"] += 1
+        place_id = request.query.get("place_id", "")
+        digest = bytes.fromhex(place_id[len("mock_"):].ljust(16, "0"))
+        return web.json_response({"result": {
+            "rating": round(3.5 + digest[1] / 255 * 1.5, 1),
+            "user_ratings_total": int.from_bytes(digest[2:4], "big") % 5000,
+        }, "status": "OK"})
+
+    async def stats(request):
+        return web.json_response(dict(counts))
+
+    app = web.Application()
+    app.router.add_get("/findplacefromtext/json", find_place)
+    app.router.add_get("/details/json", details)
+    app.router.add_get("/stats", stats)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.05, help="mean seconds per response")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 503")
+    parser.add_argument("--details-rate", type=float, default=0.1,
+                        help="share of matches returned without a rating")
+    parser.add_argument("--api-key", help="answer REQUEST_DENIED to requests with any other key")
+    args = parser.parse_args()
+    web.run_app(create_app(args.latency, args.throttle_rate, args.error_rate, args.details_rate, args.api_key),
+                port=args.port)
+
+if __name__ == "__main__":
+    main()
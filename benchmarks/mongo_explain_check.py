@@ -0,0 +1,57 @@
+"""
+Explain-plan check for the restaurant search queries.
+
+Builds the same filters as /api/v1/restaurants/search, runs `explain` on each
+(with the _id sort and limit used by pagination) and fails if any winning plan
+contains a COLLSCAN stage instead of an IXSCAN / TEXT stage.
+
+Usage (MONGODB_URI and MONGODB_DATABASE pointing at a loaded collection):
+    python -m benchmarks.mongo_explain_check
+"""
+import asyncio
+import os
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from api.app.services.mongo_search import build_search_query, ensure_search_indexes
+
+CASES = {
+    "name prefix": dict(name="le "),
+    "cuisine": dict(cuisine="Modern Cuisine"),
+    "location part": dict(location="France"),
+    "cuisine + price": dict(cuisine="japanese", price="€€€€"),
+    "location + price": dict(location="tokyo", price="€€"),
+    "price": dict(price="$$"),
+    "text": dict(text="sushi omakase"),
+}
+
+def stages(plan):
+    """All stage names of a (possibly nested) winning plan"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from stages(item)
+
+async def main() -> int:
+    load_dotenv()
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    collection = client[os.getenv("MONGODB_DATABASE")].restaurants
+    await ensure_search_indexes(collection)
+
+    failures = 0
+    for label, filters in CASES.items():
+        query = build_search_query(**filters)
+        explain = await collection.find(query).sort("_id", 1).limit(10).explain()
+        plan_stages = set(stages(explain["queryPlanner"]["winningPlan"]))
+        ok = "COLLSCAN" not in plan_stages and bool(plan_stages & {"IXSCAN", "TEXT", "TEXT_MATCH"})
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {label:<18} {sorted(plan_stages)}")
+    client.close()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
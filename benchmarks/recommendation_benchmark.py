@@ -0,0 +1,92 @@
+"""
+Compare the original per-call recommendation path (reload the joblib vectorizer,
+re-vectorize every restaurant, compute a full cosine row) with the warm model
+the API serves: memory-mapped matrix and neighbour table, loaded once.
+
+Reports per-call latency percentiles for each, on synthetic restaurants.
+
+Usage:
+    python -m benchmarks.recommendation_benchmark [--restaurants 17000] [--calls 200] [--limit 5]
+"""
+import argparse
+import random
+import tempfile
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import cosine_similarity
+from ml.models.recommendation import RestaurantRecommender
+
+WORDS = ("seasonal tasting menu local produce wine list modern classic french japanese sushi "
+         "italian pasta seafood grill creative garden terrace chef counter vegetarian tapas").split()
+CUISINES = ["Modern Cuisine", "Japanese", "French, Creative", "Italian", "Seafood", "Steakhouse", "Korean"]
+
+def synthetic_restaurants(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "_id": f"{i:024x}",
+            "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}",
+            "cuisine": rng.choice(CUISINES),
+            "description": " ".join(rng.choices(WORDS, k=30)),
+        }
+        for i in range(count)
+    ]
+
+def legacy_recommend(model, restaurant_id, restaurants, n):
+    """The original get_recommendations body"""
+    model.vectorizer = joblib.load(model._file("vectorizer.joblib"))
+    df = pd.DataFrame(restaurants)
+    df["text_features"] = df.apply(
+        lambda x: f"{x['name']} {x['cuisine']} {x['description'] if 'description' in x else ''}", axis=1
+    )
+    tfidf_matrix = model.vectorizer.transform(df["text_features"])
+    idx = df[df["_id"] == restaurant_id].index[0]
+    cosine_sim = cosine_similarity(tfidf_matrix[idx:idx + 1], tfidf_matrix).flatten()
+    similar_indices = cosine_sim.argsort()[::-1][1:n + 1]
+    return df.iloc[similar_indices].to_dict("records")
+
+def timed(fn, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.percentile(latencies, [50, 95, 99])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--restaurants", type=int, default=17_000)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--legacy-calls", type=int, default=10, help="the original path takes seconds per call")
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args()
+
+    restaurants = synthetic_restaurants(args.restaurants)
+    ids = [restaurant["_id"] for restaurant in restaurants]
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        RestaurantRecommender(tmp).train(restaurants, top_k=args.top_k)
+        print(f"trained {args.restaurants} restaurants (top-{args.top_k} table) in {time.perf_counter() - start:.2f}s")
+
+        model = RestaurantRecommender(tmp)
+        start = time.perf_counter()
+        model.load_model(mmap_mode="r")
+        print(f"loaded (mmap) in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        legacy_model = RestaurantRecommender(tmp)
+        runs = [
+            ("legacy", args.legacy_calls, lambda: legacy_recommend(legacy_model, rng.choice(ids), restaurants, args.limit)),
+            ("table", args.calls, lambda: model.similar(rng.choice(ids), args.limit)),
+            ("sparse", args.calls, lambda: model.similar(rng.choice(ids), args.top_k + 1)),
+        ]
+        print(f"{'path':>8} {'calls':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+        for label, calls, fn in runs:
+            p50, p95, p99 = timed(fn, calls)
+            print(f"{label:>8} {calls:>6} {p50:>10.3f} {p95:>10.3f} {p99:>10.3f}")
+
+if __name__ == "__main__":
+    main()
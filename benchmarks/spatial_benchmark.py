@@ -0,0 +1,87 @@
+"""
+Compare the per-row haversine loop with the BallTree spatial index and the
+vectorized batch kernel.
+
+Usage:
+    python -m benchmarks.spatial_benchmark [--sizes 17000 1000000] [--queries 20]
+"""
+import argparse
+import time
+import numpy as np
+from math import radians, sin, cos, sqrt, atan2
+from api.app.services.spatial_index import SpatialIndex
+
+def loop_haversine(lat1, lon1, lat2, lon2):
+    """The original scalar MichelinService._calculate_distance"""
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    a = sin((lat2 - lat1) / 2)**2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2)**2
+    return 6371 * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+def loop_nearest(latitude, longitude, points_lat, points_lon, k):
+    distances = []
+    for i in range(len(points_lat)):
+        distances.append((loop_haversine(latitude, longitude, points_lat[i], points_lon[i]), i))
+    distances.sort(key=lambda x: x[0])
+    return distances[:k]
+
+def loop_radius(latitude, longitude, points_lat, points_lon, radius_km):
+    results = []
+    for i in range(len(points_lat)):
+        distance = loop_haversine(latitude, longitude, points_lat[i], points_lon[i])
+        if distance <= radius_km:
+            results.append((distance, i))
+    results.sort(key=lambda x: x[0])
+    return results
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def run(size, queries, k, radius_km, batch_size, seed=0):
+    rng = np.random.default_rng(seed)
+    latitude = np.degrees(np.arcsin(rng.uniform(-1, 1, size)))
+    longitude = rng.uniform(-180, 180, size)
+    query_points = list(zip(rng.uniform(-60, 60, queries), rng.uniform(-180, 180, queries)))
+    points_lat, points_lon = latitude.tolist(), longitude.tolist()
+
+    start = time.perf_counter()
+    index = SpatialIndex(latitude, longitude)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # The loop is slow at 1M rows, so only time a handful of its queries
+    loop_queries = query_points[:max(1, min(queries, 2_000_000 // size))]
+    loop_knn = timed(lambda: [loop_nearest(la, lo, points_lat, points_lon, k) for la, lo in loop_queries], 1) / len(loop_queries)
+    loop_rad = timed(lambda: [loop_radius(la, lo, points_lat, points_lon, radius_km) for la, lo in loop_queries], 1) / len(loop_queries)
+    index_knn = timed(lambda: [index.nearest(la, lo, k) for la, lo in query_points], 1) / len(query_points)
+    index_rad = timed(lambda: [index.within_radius(la, lo, radius_km) for la, lo in query_points], 1) / len(query_points)
+
+    batch_lat = rng.uniform(-60, 60, batch_size)
+    batch_lon = rng.uniform(-180, 180, batch_size)
+    sequential = timed(lambda: [index.nearest(la, lo, k) for la, lo in zip(batch_lat, batch_lon)], 1)
+    batched = timed(lambda: index.nearest_batch(batch_lat, batch_lon, k), 1)
+    kernel = timed(lambda: index.nearest_brute_force(batch_lat, batch_lon, k), 1)
+
+    # Sanity check: every path agrees on the nearest neighbours
+    la, lo = query_points[0]
+    expected = [i for _, i in loop_nearest(la, lo, points_lat, points_lon, k)]
+    assert list(index.nearest_batch([la], [lo], k)[1][0]) == expected
+    assert list(index.nearest_brute_force([la], [lo], k)[1][0]) == expected
+    assert list(index.nearest(la, lo, k)[1]) == expected
+
+    print(f"n={size:>9,}  build={build_ms:8.1f}ms")
+    print(f"    knn(k={k})        loop={loop_knn:9.2f}ms  index={index_knn:7.3f}ms  speedup={loop_knn / index_knn:8.0f}x")
+    print(f"    radius({radius_km}km)  loop={loop_rad:9.2f}ms  index={index_rad:7.3f}ms  speedup={loop_rad / index_rad:8.0f}x")
+    print(f"    batch of {batch_size}    sequential={sequential:7.2f}ms  batched tree={batched:7.2f}ms  brute-force kernel={kernel:7.2f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[17_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--radius-km", type=float, default=50)
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries, args.k, args.radius_km, args.batch_size)
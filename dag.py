@@ -4,16 +4,25 @@ from datetime import datetime
 from pymongo import MongoClient
 from google.cloud import storage
 import requests
-import json
 import os
 import csv
 from io import StringIO
 import pandas as pd
+import numpy as np
 import time
+import asyncio
+import hashlib
+from datetime import timedelta, timezone
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Optional, Tuple
 from airflow.utils.email import send_email  # Import email utility if using email notifications
 from pymongo import TEXT
+from pymongo.errors import OperationFailure
+from pipeline.documents import iter_ndjson, read_merged_chunks, write_ndjson, iter_json_documents
+from pipeline.mongo_loader import load_documents
+from pipeline.embeddings import build_vector_index
+from pipeline.places import PlacesCache, PlacesEnricher, place_rating_steps
+from api.app.services.rollups import rebuild_rollups, rollup_pipeline, write_rollups
 
 # Load environment variables
 load_dotenv()
@@ -30,6 +39,34 @@ GOOGLE_DATA_NAME = os.getenv('GOOGLE_DATA_NAME')
 MICHELIN_DATA_NAME = os.getenv('MICHELIN_DATA_NAME')
 MICHELIN_GOOGLE_DATA_NAME = os.getenv('MICHELIN_GOOGLE_DATA_NAME')
 JSON_MERGED_DATA_NAME = os.getenv('JSON_MERGED_DATA_NAME')
+# Places enrichment tuning; point PLACES_API_BASE_URL at benchmarks/mock_places_server.py to test locally
+PLACES_API_BASE_URL = os.getenv('PLACES_API_BASE_URL', 'https://maps.googleapis.com/maps/api/place')
+PLACES_CONCURRENCY = int(os.getenv('PLACES_CONCURRENCY', 16))
+PLACES_REQUESTS_PER_SECOND = float(os.getenv('PLACES_REQUESTS_PER_SECOND', 20))
+PLACES_MAX_RETRIES = int(os.getenv('PLACES_MAX_RETRIES', 5))
+PLACES_CHECKPOINT_PATH = os.getenv('PLACES_CHECKPOINT_PATH', 'places_checkpoint.jsonl')
+# Ratings older than this are re-fetched even if the restaurant did not change
+PLACES_TTL_DAYS = float(os.getenv('PLACES_TTL_DAYS', 90))
+# Persistent lookup cache (empty PLACES_CACHE_PATH disables it)
+PLACES_CACHE_PATH = os.getenv('PLACES_CACHE_PATH', 'places_cache.sqlite')
+PLACES_CACHE_PLACE_ID_TTL_DAYS = float(os.getenv('PLACES_CACHE_PLACE_ID_TTL_DAYS', 365))
+PLACES_CACHE_RATING_TTL_DAYS = float(os.getenv('PLACES_CACHE_RATING_TTL_DAYS', 7))
+PLACES_CACHE_NEGATIVE_TTL_DAYS = float(os.getenv('PLACES_CACHE_NEGATIVE_TTL_DAYS', 7))
+# Rows serialized per batch by clean_data, and GCS upload chunk size (resumable uploads)
+CLEAN_CHUNK_SIZE = int(os.getenv('CLEAN_CHUNK_SIZE', 5000))
+GCS_UPLOAD_CHUNK_SIZE = int(os.getenv('GCS_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+# Mongo loader: documents per bulk_write and concurrent writer threads
+MONGO_LOAD_BATCH_SIZE = int(os.getenv('MONGO_LOAD_BATCH_SIZE', 1000))
+MONGO_LOAD_WRITERS = int(os.getenv('MONGO_LOAD_WRITERS', 4))
+# Local vector index for /api/v1/search/semantic, built here and published under a GCS prefix;
+# the API downloads it from VECTOR_INDEX_URL, the public URL of that prefix
+VECTOR_INDEX_DIR = os.getenv('VECTOR_INDEX_DIR', 'vector_index')
+VECTOR_INDEX_GCS_PREFIX = os.getenv('VECTOR_INDEX_GCS_PREFIX', 'vector_index')
+# Embedding stage: worker processes, padded tokens per batch, content-hash cache and vector storage dtype
+EMBEDDING_WORKERS = int(os.getenv('EMBEDDING_WORKERS', max(1, (os.cpu_count() or 1) // 2)))
+EMBEDDING_MAX_TOKENS = int(os.getenv('EMBEDDING_MAX_TOKENS', 8192))
+EMBEDDING_CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR', 'embedding_cache')
+VECTOR_INDEX_DTYPE = os.getenv('VECTOR_INDEX_DTYPE', 'float16')
 if not GOOGLE_PLACES_API_KEY:
     raise ValueError("Please set GOOGLE_PLACES_API_KEY in .env file")
 
@@ -43,56 +80,139 @@ def check_mongo_collection():
     db = client[DB_NAME]
     return COLLECTION_NAME in db.list_collection_names()
 
-def load_json_to_mongo():
-    """Step 2: Load `michelin_google_mongo.json` from GCS into MongoDB."""
+def load_json_to_mongo(swap: bool = True):
+    """Step 2: Stream `michelin_google_mongo.json` from GCS into MongoDB with batched upserts.
+
+    A full load (`swap`) builds a staging collection and renames it over the live one.
+    Either way the rollups are then rebuilt from the loaded collection.
+    """
     client = MongoClient(MONGO_URI)
     db = client[DB_NAME]
-    collection = db[COLLECTION_NAME]
 
     bucket = storage_client.bucket(MICHELIN_BUCKET_NAME)
     blob = bucket.blob("michelin_google_mongo.json")
 
     if blob.exists():
-        json_data = json.loads(blob.download_as_string())
-        collection.insert_many(json_data)
-        print("Loaded `michelin_google_mongo.json` into MongoDB.")
+        with blob.open('r', encoding='utf-8') as f:
+            counts = load_documents(db, COLLECTION_NAME, iter_json_documents(f), batch_size=MONGO_LOAD_BATCH_SIZE,
+                                    writers=MONGO_LOAD_WRITERS, swap=swap)
+        print(f"Loaded `michelin_google_mongo.json` into MongoDB: {counts}")
+        # The API only applies per-write deltas to the rollups; a new dataset needs them recomputed
+        print(f"Rebuilt rollups: {rebuild_rollups(db, COLLECTION_NAME)}")
+        client.close()
         return True
+    client.close()
     return False
 
 ### **Google Places API for Ratings**
-def get_place_rating(name: str, address: str) -> Optional[float]:
-    """Fetch Google Places rating for a restaurant."""
-    base_url = "https://maps.googleapis.com/maps/api/place/findplacefromtext/json"
-    query = f"{name} {address}"
-    params = {
-        'input': query,
-        'inputtype': 'textquery',
-        'fields': 'place_id,rating',
-        'key': GOOGLE_PLACES_API_KEY
-    }
-
+_shared_places_cache: Optional[PlacesCache] = None
+
+def default_places_cache() -> Optional[PlacesCache]:
+    """The process-wide PlacesCache at PLACES_CACHE_PATH, or None when caching is disabled."""
+    global _shared_places_cache
+    if _shared_places_cache is None and PLACES_CACHE_PATH:
+        _shared_places_cache = PlacesCache(PLACES_CACHE_PATH, PLACES_CACHE_PLACE_ID_TTL_DAYS,
+                                           PLACES_CACHE_RATING_TTL_DAYS, PLACES_CACHE_NEGATIVE_TTL_DAYS)
+    return _shared_places_cache
+
+def get_place_rating(name: str, address: str, cache: Optional[PlacesCache] = None) -> Tuple[Optional[float], Optional[int]]:
+    """Fetch Google Places rating and review count for a single restaurant (through the shared cache by default)."""
+    steps = place_rating_steps(cache if cache is not None else default_places_cache(), name, address)
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        if data['candidates']:
-            place_id = data['candidates'][0].get('place_id')
-            if place_id:
-                details_url = "https://maps.googleapis.com/maps/api/place/details/json"
-                details_params = {
-                    'place_id': place_id,
-                    'fields': 'rating,user_ratings_total',
-                    'key': GOOGLE_PLACES_API_KEY
-                }
-                details_response = requests.get(details_url, params=details_params)
-                details_response.raise_for_status()
-                details_data = details_response.json()
-                return details_data.get('result', {}).get('rating'), details_data.get('result', {}).get('user_ratings_total')
-        return None
+        endpoint, params = next(steps)
+        while True:
+            response = requests.get(f"{PLACES_API_BASE_URL}/{endpoint}/json", params={**params, 'key': GOOGLE_PLACES_API_KEY})
+            response.raise_for_status()
+            endpoint, params = steps.send(response.json())
+    except StopIteration as done:
+        return done.value
     except Exception as e:
         print(f"Error fetching rating for {name}: {str(e)}")
-        return None
+        return None, None
+
+def restaurant_content_hash(df: pd.DataFrame) -> pd.Series:
+    """Hash of the fields a Places lookup depends on (name, address, coordinates)."""
+    key = (
+        df['Name'].fillna('').astype(str).str.strip().str.lower() + '\x1f' +
+        df['Address'].fillna('').astype(str).str.strip().str.lower() + '\x1f' +
+        pd.to_numeric(df['Latitude'], errors='coerce').map('{:.5f}'.format) + '\x1f' +
+        pd.to_numeric(df['Longitude'], errors='coerce').map('{:.5f}'.format)
+    )
+    return pd.Series([hashlib.sha1(k.encode('utf-8')).hexdigest()[:16] for k in key], index=df.index)
+
+def plan_enrichment(current: pd.DataFrame, previous: Optional[pd.DataFrame],
+                    ttl_days: float = PLACES_TTL_DAYS, now: Optional[datetime] = None) -> pd.DataFrame:
+    """
+    Carry over Google data from the previous enriched snapshot where it is still valid.
+
+    Returns `current` with content_hash, google_rating, google_reviews, google_fetched_at
+    and an `enrich_reason` column: 'added', 'changed' or 'stale' for rows that need a
+    Places lookup, None for rows whose previous result was reused.
+    """
+    now = now or datetime.now(timezone.utc)
+    df = current.copy()
+    df['content_hash'] = restaurant_content_hash(df)
+    df['enrich_reason'] = 'added'
+    df['google_rating'] = None
+    df['google_reviews'] = None
+    df['google_fetched_at'] = None
+    if previous is None or previous.empty:
+        return df
+
+    previous = previous.copy()
+    if 'content_hash' not in previous:
+        previous['content_hash'] = restaurant_content_hash(previous)
+    if 'google_fetched_at' not in previous:
+        previous['google_fetched_at'] = None
+    previous = previous.drop_duplicates('content_hash').set_index('content_hash')
+
+    known = df['content_hash'].isin(previous.index)
+    reused = previous.reindex(df['content_hash'])
+    df['google_rating'] = reused['google_rating'].to_numpy()
+    df['google_reviews'] = reused['google_reviews'].to_numpy()
+    df['google_fetched_at'] = reused['google_fetched_at'].to_numpy()
+
+    fetched_at = pd.to_datetime(df['google_fetched_at'], utc=True, errors='coerce', format='ISO8601')
+    stale = known & (fetched_at.isna() | (fetched_at < now - timedelta(days=ttl_days)))
+    changed = ~known & df['Name'].isin(set(previous['Name']))
+    df.loc[known & ~stale, 'enrich_reason'] = None
+    df.loc[stale, 'enrich_reason'] = 'stale'
+    df.loc[changed, 'enrich_reason'] = 'changed'
+    return df
+
+def enrich_with_google_ratings(df: pd.DataFrame, previous: Optional[pd.DataFrame] = None,
+                               enricher: Optional[PlacesEnricher] = None) -> pd.DataFrame:
+    """
+    Add google_rating / google_reviews (and content_hash / google_fetched_at) to a Michelin DataFrame.
+
+    With a `previous` enriched snapshot only added, changed or stale restaurants are looked up.
+    """
+    df = plan_enrichment(df, previous)
+    todo = df['enrich_reason'].notna()
+    print(f"Places enrichment plan: {df['enrich_reason'].value_counts().to_dict()}, "
+          f"{int((~todo).sum())} reused")
+
+    if todo.any():
+        enricher = enricher or PlacesEnricher(
+            GOOGLE_PLACES_API_KEY, base_url=PLACES_API_BASE_URL, concurrency=PLACES_CONCURRENCY,
+            requests_per_second=PLACES_REQUESTS_PER_SECOND, max_retries=PLACES_MAX_RETRIES,
+            checkpoint_path=PLACES_CHECKPOINT_PATH, cache=default_places_cache(),
+        )
+        keys = list(zip(df.loc[todo, 'Name'].astype(str), df.loc[todo, 'Address'].fillna('').astype(str)))
+        start = time.perf_counter()
+        results = asyncio.run(enricher.enrich(keys))
+        print(f"Places enrichment: {enricher.stats} in {time.perf_counter() - start:.1f}s")
+        if enricher.cache:
+            enricher.cache.report()
+
+        # Failed lookups keep their previous values and timestamp, so the next run retries them
+        found = [key in results for key in keys]
+        rows = df.index[todo][found]
+        fetched = [results[key] for key in keys if key in results]
+        df.loc[rows, 'google_rating'] = np.array([rating for rating, _ in fetched], dtype=float)
+        df.loc[rows, 'google_reviews'] = np.array([reviews for _, reviews in fetched], dtype=float)
+        df.loc[rows, 'google_fetched_at'] = datetime.now(timezone.utc).isoformat()
+    return df.drop(columns='enrich_reason')
 
 def download_from_gcs(bucket_name: str, file_name: str, credentials_path: str) -> str:
     """Download a file from Google Cloud Storage."""
@@ -106,6 +226,18 @@ def download_from_gcs(bucket_name: str, file_name: str, credentials_path: str) -
         print(f"File {file_name} does not exist in bucket {bucket_name}.")
         return None
 
+def download_from_gcs_to_file(bucket_name: str, file_name: str, credentials_path: str) -> Optional[str]:
+    """Download a file from Google Cloud Storage to a local file of the same name, without holding it in memory."""
+    client = storage.Client.from_service_account_json(credentials_path)
+    blob = client.bucket(bucket_name).blob(file_name)
+
+    if not blob.exists():
+        print(f"File {file_name} does not exist in bucket {bucket_name}.")
+        return None
+    local_path = os.path.basename(file_name)
+    blob.download_to_filename(local_path)
+    return local_path
+
 def check_file_in_gcs(file_name: str) -> Optional[str]:
     """Check if a file exists in Google Cloud Storage."""
     client = storage.Client.from_service_account_json(CREDENTIALS_PATH)
@@ -117,275 +249,71 @@ def check_file_in_gcs(file_name: str) -> Optional[str]:
 def clean_data():
     """
     Merge the Michelin and Google Places datasets on 'Name' and
-    save the merged data in a structured JSON format to a file.
+    stream the structured documents as NDJSON to a file and to GCS.
     """
-    # Define necessary variables
-    bucket_name = MICHELIN_BUCKET_NAME  # Assuming this is the intended bucket name
-    credentials_path = CREDENTIALS_PATH  # Use the existing credentials path
-    # Download the data from GCS
-    michelin_google_from_gcs = download_from_gcs(bucket_name, MICHELIN_GOOGLE_DATA_NAME, credentials_path)
-    michelin_data_from_gcs = download_from_gcs(bucket_name, MICHELIN_DATA_NAME, credentials_path)
-    google_data_from_gcs = download_from_gcs(bucket_name, GOOGLE_DATA_NAME, credentials_path)
-
-    # Merge the datasets on 'Name'
-    try:
-        michelin_google = pd.read_csv(michelin_google_from_gcs)
-        merged_data = michelin_google
-    except:
-        michelin_data = pd.read_csv(michelin_data_from_gcs)
-        google_data = pd.read_csv(google_data_from_gcs)
-        merged_data = pd.merge(michelin_data, google_data, on="Name", how="inner")
-
-    # Replace NaN values with None for MongoDB JSON
-    merged_data = merged_data.replace({pd.NA: None, float("nan"): None})
-
-    # Convert DataFrame to structured JSON
-    structured_data = []
-
-    for _, row in merged_data.iterrows():
-        structured_entry = {
-            "Name": row["Name"],
-            "michelin_info": {
-                "Address": row["Address"],
-                "Location": row["Location"],
-                "Price": row["Price"],
-                "Cuisine": row["Cuisine"],
-                "Longitude": row["Longitude"],
-                "Latitude": row["Latitude"],
-                "PhoneNumber": row["PhoneNumber"],
-                "Url": row["Url"],
-                "WebsiteUrl": row["WebsiteUrl"],
-                "Award": row["Award"],
-                "GreenStar": int(row["GreenStar"]),
-                "FacilitiesAndServices": row["FacilitiesAndServices"],
-                "Description": row["Description"],
-            },
-            "google_info": {
-                "google_rating": row["google_rating"],
-                "google_reviews": row["google_reviews"],
-            },
-        }
-        structured_data.append(structured_entry)
-
-    # Convert to JSON format
-    json_output = json.dumps(structured_data, indent=4, ensure_ascii=False)
-
-    # Save to file
+    bucket_name = MICHELIN_BUCKET_NAME
+    credentials_path = CREDENTIALS_PATH
+
+    # Prefer the already enriched CSV, else join the Michelin and Google CSVs
+    michelin_google_path = download_from_gcs_to_file(bucket_name, MICHELIN_GOOGLE_DATA_NAME, credentials_path)
+    if michelin_google_path:
+        chunks = read_merged_chunks(michelin_google_path, chunk_size=CLEAN_CHUNK_SIZE)
+    else:
+        chunks = read_merged_chunks(
+            michelin_path=download_from_gcs_to_file(bucket_name, MICHELIN_DATA_NAME, credentials_path),
+            google_path=download_from_gcs_to_file(bucket_name, GOOGLE_DATA_NAME, credentials_path),
+            chunk_size=CLEAN_CHUNK_SIZE,
+        )
+
+    # One document per line, written chunk by chunk
     json_file_path = JSON_MERGED_DATA_NAME
-    with open(json_file_path, "w") as json_file:
-        json_file.write(json_output)
+    documents = write_ndjson(iter_ndjson(chunks), json_file_path)
+    print(f"Wrote {documents} documents to {json_file_path}.")
 
-    # Upload the JSON file to GCS
-    upload_to_gcs(json_output,JSON_MERGED_DATA_NAME)
+    # Upload the file to GCS
+    upload_file_to_gcs(json_file_path, JSON_MERGED_DATA_NAME)
 
 ### **Places API Call for Google Ratings**
 def places_api_call():
-    """Fetch Google ratings and update MongoDB."""
-    csv_data = check_file_in_gcs(GOOGLE_DATA_NAME)
-    if csv_data is None:
-        print("No CSV found in GCS.")
-        csv_file = StringIO(csv_data)
-        df = pd.read_csv(csv_file)
-        df['google_rating'] = None
-        df['google_reviews'] = None
-
-        for idx, row in df.iterrows():
-            rating, reviews = get_place_rating(row['Name'], row['Address'])
-            df.at[idx, 'google_rating'] = rating
-            df.at[idx, 'google_reviews'] = reviews
-            time.sleep(0.2)  # API rate limit handling
-            if idx % 10 == 0:
-                print(f"Processed {idx} restaurants...")
-
-        csv_output = StringIO()
-        df.to_csv(csv_output, index=False)
-        print("Google API DAG Task completed successfully.")
-        return csv_output.getvalue()
-    else:
-        print("CSV found in GCS.")
-        return csv_data
+    """Fetch Google ratings for new, changed or stale restaurants (returns the enriched CSV as a string)."""
+    michelin_csv = download_from_gcs(MICHELIN_BUCKET_NAME, MICHELIN_DATA_NAME, CREDENTIALS_PATH)
+    previous = None
+    if check_file_in_gcs(MICHELIN_GOOGLE_DATA_NAME):
+        print("Previous enriched CSV found in GCS, only updating what changed.")
+        previous = pd.read_csv(StringIO(download_from_gcs(MICHELIN_BUCKET_NAME, MICHELIN_GOOGLE_DATA_NAME, CREDENTIALS_PATH)))
+    df = enrich_with_google_ratings(pd.read_csv(StringIO(michelin_csv)), previous)
+
+    csv_output = StringIO()
+    df.to_csv(csv_output, index=False)
+    print("Google API DAG Task completed successfully.")
+    # Completed run: the next one must start from scratch, not resume
+    if os.path.exists(PLACES_CHECKPOINT_PATH):
+        os.remove(PLACES_CHECKPOINT_PATH)
+    return csv_output.getvalue()
 
 ### **Aggregation Functions**
 
-def count_restaurant_per_cuisine(client, db, collection , OUTPUT_COLLECTION="restaurants_per_cuisine", write_to_db=False):
+def aggregate_rollups(client, db, collection, write_to_db=False):
     """
-    Fetches Michelin cuisine context, including average Google rating and Michelin award distribution.
-    If `write_to_db=True`, writes results into the OUTPUT_COLLECTION using $merge.
+    Computes every rollup (per cuisine with average Google rating and award distribution,
+    starred restaurants per city, 3-star restaurants per city) in one `$facet` scan.
+    If `write_to_db=True`, swaps each rollup collection for the new results with the
+    writer the API uses too, so groups that disappeared are dropped.
     """
-
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$michelin_info.Cuisine",
-                "google_rating": {"$avg": "$google_info.google_rating"},
-                "total_restaurants": {"$sum": 1}
-            }
-        },
-        {"$sort": {"google_rating": -1}}
-    ]
-
-    result = list(collection.aggregate(pipeline, allowDiskUse=True))
+    started = datetime.now(timezone.utc)
+    result = next(collection.aggregate(rollup_pipeline(), allowDiskUse=True))
 
     # Print results
-    for entry in result:
-        print(entry)
+    for output_collection, entries in result.items():
+        print(f"{output_collection}: {len(entries)} groups")
+        for entry in entries:
+            print(entry)
 
     # Write to MongoDB if write_to_db=True
     if write_to_db:
-        pipeline.append({
-            "$merge": {
-                "into": OUTPUT_COLLECTION,
-                "whenMatched": "merge",
-                "whenNotMatched": "insert"
-            }
-        })
-        collection.aggregate(pipeline, allowDiskUse=True)
-        print(f"Data written to '{OUTPUT_COLLECTION}' collection.")
-
-
-
-    return result
-
-
-def count_restaurant_per_cuisines(client, db, collection , OUTPUT_COLLECTION="restaurants_per_cuisine", write_to_db=False):
-    """
-    Fetches Michelin cuisine context, including average Google rating and Michelin award distribution.
-    If `write_to_db=True`, writes results into the OUTPUT_COLLECTION using $merge.
-    """
-
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$michelin_info.Cuisine",
-                "google_rating": {"$avg": "$google_info.google_rating"},
-                "michelin_rating": {
-                    "three_stars": {"$sum": {"$cond": [{"$eq": ["$michelin_info.Award", "3 Stars"]}, 1, 0]}},
-                    "two_stars": {"$sum": {"$cond": [{"$eq": ["$michelin_info.Award", "2 Stars"]}, 1, 0]}},
-                    "one_star": {"$sum": {"$cond": [{"$eq": ["$michelin_info.Award", "1 Star"]}, 1, 0]}},
-                    "bib_gourmand": {"$sum": {"$cond": [{"$eq": ["$michelin_info.Award", "Bib Gourmand"]}, 1, 0]}},
-                    "selected": {"$sum": {"$cond": [{"$eq": ["$michelin_info.Award", "Selected"]}, 1, 0]}}
-                },
-                "total_restaurants": {"$sum": 1}
-            }
-        },
-        {"$sort": {"google_rating": -1}}
-    ]
-
-    result = list(collection.aggregate(pipeline, allowDiskUse=True))
-
-    # Print results
-    for entry in result:
-        print(entry)
-
-    # Write to MongoDB if write_to_db=True
-    if write_to_db:
-        pipeline.append({
-            "$merge": {
-                "into": OUTPUT_COLLECTION,
-                "whenMatched": "merge",
-                "whenNotMatched": "insert"
-            }
-        })
-        collection.aggregate(pipeline, allowDiskUse=True)
-        print(f"Data written to '{OUTPUT_COLLECTION}' collection.")
-
-
-
-    return result
-
-
-def count_michelin_starred_restaurants(client, db, collection, output_collection="restaurants_per_city", write_to_db=False):
-    """
-    Counts restaurants per city & country, considering only 1, 2, or 3 Michelin stars.
-    Excludes "Bib Gourmand" and "Selected".
-    If `write_to_db=True`, writes results into the OUTPUT_COLLECTION using $merge.
-    """
-
-
-    pipeline = [
-        {
-            "$match": {
-                "michelin_info.Location": { "$exists": True, "$ne": "" },
-                "michelin_info.Award": { "$in": ["1 Star", "2 Stars", "3 Stars"] }  # Exclude "Bib Gourmand" & "Selected"
-            }
-        },
-        {
-            "$set": {
-                "City": { "$arrayElemAt": [{ "$split": ["$michelin_info.Location", ", "] }, 0] },
-                "Country": { "$arrayElemAt": [{ "$split": ["$michelin_info.Location", ", "] }, 1] }
-            }
-        },
-        {
-            "$group": {
-                "_id": { "City": "$City", "Country": "$Country" },
-                "total_restaurants": { "$sum": 1 }
-            }
-        },
-        { "$sort": { "total_restaurants": -1 } }
-    ]
-
-    result = list(collection.aggregate(pipeline, allowDiskUse=True))
-
-    # Print results
-    for entry in result:
-        print(entry)
-
-    # Write to MongoDB if write_to_db=True
-    if write_to_db:
-        pipeline.append({
-            "$merge": {
-                "into": output_collection,
-                "whenMatched": "merge",
-                "whenNotMatched": "insert"
-            }
-        })
-        collection.aggregate(pipeline, allowDiskUse=True)
-        print(f"Data written to '{output_collection}' collection.")
-
-    return result
-
-
-def count_three_star_michelin_restaurants(client, db, collection, output_collection="three_star_restaurants_per_city", write_to_db=False):
-    """
-    Counts 3-star Michelin restaurants per city & country.
-    If `write_to_db=True`, writes results into the OUTPUT_COLLECTION using $merge.
-    """
-    pipeline = [
-        {
-            "$match": { "michelin_info.Award": "3 Stars" }  # Only 3-Star restaurants
-        },
-        {
-            "$set": {
-                "City": { "$arrayElemAt": [{ "$split": ["$michelin_info.Location", ", "] }, 0] },
-                "Country": { "$arrayElemAt": [{ "$split": ["$michelin_info.Location", ", "] }, 1] }
-            }
-        },
-        {
-            "$group": {
-                "_id": { "City": "$City", "Country": "$Country" },
-                "three_star_count": { "$sum": 1 }
-            }
-        },
-        { "$sort": { "three_star_count": -1 } }
-    ]
-
-    result = list(collection.aggregate(pipeline, allowDiskUse=True))
-
-    # Print results
-    for entry in result:
-        print(entry)
-
-    # Write to MongoDB if write_to_db=True
-    if write_to_db:
-        pipeline.append({
-            "$merge": {
-                "into": output_collection,
-                "whenMatched": "merge",
-                "whenNotMatched": "insert"
-            }
-        })
-        collection.aggregate(pipeline, allowDiskUse=True)
-        print(f"Data written to '{output_collection}' collection.")
+        # Groups the API changed during the scan are recomputed before the swap
+        for output_collection, count in write_rollups(db, result, collection.name, started).items():
+            print(f"Data written to '{output_collection}' collection ({count} groups).")
 
     return result
 
@@ -395,9 +323,7 @@ def run_aggregation(write_to_db=False):
     db = client[DB_NAME]
     collection = db[COLLECTION_NAME]
 
-    count_restaurant_per_cuisine(client, db, collection, write_to_db=write_to_db)
-    count_michelin_starred_restaurants(client, db, collection, write_to_db=write_to_db)
-    count_three_star_michelin_restaurants(client, db, collection, write_to_db=write_to_db)
+    aggregate_rollups(client, db, collection, write_to_db=write_to_db)
     client.close()
     print("Aggregation completed successfully")
 
@@ -455,6 +381,17 @@ def upload_to_gcs(data: str, file_name: str):
     blob.upload_from_string(data)
     print(f"Uploaded {file_name} to GCS.")
 
+def upload_file_to_gcs(path: str, file_name: str):
+    """Upload a local file to Google Cloud Storage as a chunked, resumable upload."""
+    client = storage.Client.from_service_account_json(CREDENTIALS_PATH)
+    bucket = client.bucket(MICHELIN_BUCKET_NAME)
+    blob = bucket.blob(file_name)
+    # Setting a chunk size switches to a resumable session; failed chunks are retried, not the whole file
+    blob.chunk_size = GCS_UPLOAD_CHUNK_SIZE
+
+    blob.upload_from_filename(path)
+    print(f"Uploaded {file_name} to GCS.")
+
 def fetch_and_upload_michelin_data():
     """Fetch Michelin data from GitHub and upload it to GCS."""
     # Example implementation: Replace with actual fetching logic
@@ -506,6 +443,24 @@ task_notify_success = PythonOperator(
     dag=dag,
 )
 
+def build_embeddings_index():
+    """Embed `michelin_google_mongo.json` and publish the vector index the API memory-maps."""
+    bucket = storage_client.bucket(MICHELIN_BUCKET_NAME)
+    blob = bucket.blob("michelin_google_mongo.json")
+    if not blob.exists():
+        notify("michelin_google_mongo.json does not exist, skipping the vector index.")
+        return False
+
+    with blob.open('r', encoding='utf-8') as f:
+        counts = build_vector_index(iter_json_documents(f), VECTOR_INDEX_DIR, workers=EMBEDDING_WORKERS,
+                                    max_tokens=EMBEDDING_MAX_TOKENS, cache_dir=EMBEDDING_CACHE_DIR or None,
+                                    dtype=VECTOR_INDEX_DTYPE)
+    # index.json last: it is what marks a complete index
+    for name in sorted(os.listdir(VECTOR_INDEX_DIR), key=lambda name: name == 'index.json'):
+        upload_file_to_gcs(os.path.join(VECTOR_INDEX_DIR, name), f"{VECTOR_INDEX_GCS_PREFIX}/{name}")
+    print(f"Built the vector index: {counts}")
+    return True
+
 def create_vector_search_index():
     """Create MongoDB Atlas vector search index"""
     client = MongoClient(MONGO_URI)
@@ -518,47 +473,57 @@ def create_vector_search_index():
         ("michelin_info.Description", TEXT)
     ])
 
-    # Create vector search index
-    db.command({
-        "createSearchIndex": "restaurants",
-        "name": "restaurant_embeddings",
-        "type": "search",
-        "fields": [
-            {
-                "type": "vector",
-                "path": "embedding",
-                "numDimensions": 384,
-                "similarity": "cosine"
-            }
-        ]
-    })
-
-    # Create hybrid search index
-    db.command({
-        "createSearchIndex": "restaurants",
-        "name": "restaurant_hybrid",
-        "type": "search",
-        "fields": [
-            {
-                "type": "vector",
-                "path": "embedding",
-                "numDimensions": 384,
-                "similarity": "cosine"
-            },
-            {
-                "type": "string",
-                "path": "Name"
-            },
-            {
-                "type": "string",
-                "path": "michelin_info.Cuisine"
-            },
-            {
-                "type": "string",
-                "path": "michelin_info.Description"
-            }
-        ]
-    })
+    # Atlas-only; on a plain mongod /search/semantic is served from the local vector index instead
+    try:
+        # Create vector search index
+        db.command({
+            "createSearchIndex": "restaurants",
+            "name": "restaurant_embeddings",
+            "type": "search",
+            "fields": [
+                {
+                    "type": "vector",
+                    "path": "embedding",
+                    "numDimensions": 384,
+                    "similarity": "cosine"
+                }
+            ]
+        })
+
+        # Create hybrid search index
+        db.command({
+            "createSearchIndex": "restaurants",
+            "name": "restaurant_hybrid",
+            "type": "search",
+            "fields": [
+                {
+                    "type": "vector",
+                    "path": "embedding",
+                    "numDimensions": 384,
+                    "similarity": "cosine"
+                },
+                {
+                    "type": "string",
+                    "path": "Name"
+                },
+                {
+                    "type": "string",
+                    "path": "michelin_info.Cuisine"
+                },
+                {
+                    "type": "string",
+                    "path": "michelin_info.Description"
+                }
+            ]
+        })
+    except OperationFailure as e:
+        print(f"Skipping Atlas search indexes: {e}")
+
+task_build_vector_index = PythonOperator(
+    task_id='build_vector_index',
+    python_callable=build_embeddings_index,
+    dag=dag,
+)
 
 # Add the new task to your DAG
 create_index_task = PythonOperator(
@@ -568,4 +533,4 @@ create_index_task = PythonOperator(
 )
 
 # **DAG Execution Flow**
-task_fetch_mongo_data >> task_run_aggregation >> task_notify_success >> create_index_task
+task_fetch_mongo_data >> task_run_aggregation >> task_build_vector_index >> task_notify_success >> create_index_task
@@ -1,66 +1,164 @@
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import pandas as pd
-from typing import List, Dict
+import scipy.sparse as sp
+from typing import List, Dict, Optional, Tuple
 import os
+import json
 import joblib
 
 class RestaurantRecommender:
-    def __init__(self):
+    """Content-based recommendations from TF-IDF vectors of name, cuisine and description.
+
+    Training persists everything inference needs next to the vectorizer:
+    the L2-normalized TF-IDF matrix (its CSR arrays as .npy), the row -> restaurant
+    id map and a precomputed top-K neighbour table. Recommendations are then a table
+    lookup, or one sparse dot product when more than K are asked for.
+
+    The arrays are plain .npy files so `load_model(mmap_mode='r')` can memory-map
+    them: every process serving the model shares the same page-cache copy.
+    """
+
+    CSR_ARRAYS = ('data', 'indices', 'indptr')
+
+    def __init__(self, model_path: Optional[str] = None):
         self.vectorizer = TfidfVectorizer(
             max_features=5000,
             stop_words='english',
             ngram_range=(1, 2)
         )
-        self.model_path = os.path.join(os.path.dirname(__file__), 'models')
+        self.model_path = model_path or os.path.join(os.path.dirname(__file__), 'models')
         os.makedirs(self.model_path, exist_ok=True)
+        self.matrix: Optional[sp.csr_matrix] = None
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.neighbors: Optional[np.ndarray] = None
+        self.neighbor_scores: Optional[np.ndarray] = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.model_path, name)
 
     def prepare_features(self, restaurants: List[Dict]) -> pd.DataFrame:
         """Prepare features for the recommendation model"""
         df = pd.DataFrame(restaurants)
         # Combine relevant text features
-        df['text_features'] = df.apply(
-            lambda x: f"{x['name']} {x['cuisine']} {x['description'] if 'description' in x else ''}",
-            axis=1
-        )
+        description = df['description'].fillna('') if 'description' in df else ''
+        df['text_features'] = df['name'].fillna('') + ' ' + df['cuisine'].fillna('') + ' ' + description
         return df
 
-    def train(self, restaurants: List[Dict]):
-        """Train the recommendation model"""
+    def train(self, restaurants: List[Dict], top_k: int = 20, block_size: int = 512):
+        """Train the recommendation model and persist the matrix, id map and neighbour table"""
         df = self.prepare_features(restaurants)
-        # Create TF-IDF matrix
-        tfidf_matrix = self.vectorizer.fit_transform(df['text_features'])
-        # Save the model
-        joblib.dump(self.vectorizer, os.path.join(self.model_path, 'vectorizer.joblib'))
+        # Create TF-IDF matrix (rows are L2-normalized, so cosine similarity is a dot product)
+        tfidf_matrix = self.vectorizer.fit_transform(df['text_features']).astype(np.float32).tocsr()
+        ids = df['_id'].astype(str).tolist() if '_id' in df else [str(i) for i in range(len(df))]
+        self._set_model(tfidf_matrix, ids)
+        if top_k:
+            self.neighbors, self.neighbor_scores = self._top_k(top_k, block_size)
+        self.save_model()
         return tfidf_matrix
 
-    def get_recommendations(self, restaurant_id: str, restaurants: List[Dict], n_recommendations: int = 5):
-        """Get restaurant recommendations"""
-        # Load the model
-        self.vectorizer = joblib.load(os.path.join(self.model_path, 'vectorizer.joblib'))
+    def _set_model(self, matrix: sp.csr_matrix, ids: List[str]):
+        self.matrix = matrix
+        self.ids = ids
+        self.rows = {restaurant_id: row for row, restaurant_id in enumerate(ids)}
 
-        # Prepare features
-        df = self.prepare_features(restaurants)
-        tfidf_matrix = self.vectorizer.transform(df['text_features'])
+    def _top_k(self, k: int, block_size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k most similar rows (self excluded) for every row, computed block by block"""
+        n = self.matrix.shape[0]
+        k = min(k, n - 1)
+        neighbors = np.empty((n, k), dtype=np.int32)
+        scores = np.empty((n, k), dtype=np.float32)
+        transposed = self.matrix.T.tocsc()
+        for start in range(0, n, block_size):
+            end = min(start + block_size, n)
+            block = (self.matrix[start:end] @ transposed).toarray()
+            block[np.arange(end - start), np.arange(start, end)] = -np.inf
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            neighbors[start:end] = np.take_along_axis(top, order, axis=1)
+            scores[start:end] = np.take_along_axis(top_scores, order, axis=1)
+        return neighbors, scores
+
+    def similar(self, restaurant_id: str, n_recommendations: int = 5) -> List[Tuple[str, float]]:
+        """(restaurant id, cosine similarity) of the most similar restaurants"""
+        if self.matrix is None:
+            self.load_model()
+        row = self.rows.get(str(restaurant_id))
+        if row is None:
+            raise KeyError(f"Unknown restaurant: {restaurant_id}")
 
-        # Find the index of the input restaurant
-        restaurant_idx = df[df['_id'] == restaurant_id].index[0]
+        if self.neighbors is not None and n_recommendations <= self.neighbors.shape[1]:
+            top = self.neighbors[row, :n_recommendations]
+            top_scores = self.neighbor_scores[row, :n_recommendations]
+        else:
+            scores = (self.matrix @ self.matrix[row].T).toarray().ravel()
+            scores[row] = -np.inf
+            n = min(n_recommendations, len(scores) - 1)
+            top = np.argpartition(-scores, n - 1)[:n] if n > 0 else np.empty(0, dtype=np.int64)
+            top = top[np.argsort(-scores[top], kind='stable')]
+            top_scores = scores[top]
+        return [(self.ids[i], float(score)) for i, score in zip(top, top_scores)]
 
-        # Calculate similarity scores
-        similarity_scores = cosine_similarity(tfidf_matrix[restaurant_idx], tfidf_matrix).flatten()
+    def similar_many(self, restaurant_ids: List[str], n_recommendations: int = 5) -> Dict[str, List[Tuple[str, float]]]:
+        """`similar` for several restaurants; unknown ids are left out of the result"""
+        if self.matrix is None:
+            self.load_model()
+        rows = {str(restaurant_id): self.rows[str(restaurant_id)]
+                for restaurant_id in restaurant_ids if str(restaurant_id) in self.rows}
+        if self.neighbors is not None and n_recommendations <= self.neighbors.shape[1]:
+            return {restaurant_id: self.similar(restaurant_id, n_recommendations) for restaurant_id in rows}
 
-        # Get top N recommendations (excluding the input restaurant)
-        similar_indices = similarity_scores.argsort()[::-1][1:n_recommendations+1]
+        # One sparse product for the whole batch instead of one per restaurant
+        n = min(n_recommendations, self.matrix.shape[0] - 1)
+        scores = (self.matrix[list(rows.values())] @ self.matrix.T).toarray()
+        result = {}
+        for i, (restaurant_id, row) in enumerate(rows.items()):
+            row_scores = scores[i]
+            row_scores[row] = -np.inf
+            top = np.argpartition(-row_scores, n - 1)[:n] if n > 0 else np.empty(0, dtype=np.int64)
+            top = top[np.argsort(-row_scores[top], kind='stable')]
+            result[restaurant_id] = [(self.ids[j], float(row_scores[j])) for j in top]
+        return result
 
-        # Return recommended restaurants
-        recommendations = df.iloc[similar_indices].to_dict('records')
-        return recommendations
+    def get_recommendations(self, restaurant_id: str, restaurants: Optional[List[Dict]] = None,
+                            n_recommendations: int = 5) -> List[Dict]:
+        """Get restaurant recommendations.
+
+        With `restaurants`, returns their records (matched on `_id`) in ranked order;
+        otherwise `{"_id", "score"}` pairs.
+        """
+        ranked = self.similar(restaurant_id, n_recommendations)
+        if restaurants is None:
+            return [{'_id': similar_id, 'score': score} for similar_id, score in ranked]
+        by_id = {str(restaurant.get('_id')): restaurant for restaurant in restaurants}
+        return [by_id[similar_id] for similar_id, _ in ranked if similar_id in by_id]
 
     def save_model(self):
         """Save the model to disk"""
-        joblib.dump(self.vectorizer, os.path.join(self.model_path, 'vectorizer.joblib'))
+        joblib.dump(self.vectorizer, self._file('vectorizer.joblib'))
+        if self.matrix is not None:
+            for name in self.CSR_ARRAYS:
+                np.save(self._file(f'tfidf_{name}.npy'), getattr(self.matrix, name))
+            with open(self._file('row_ids.json'), 'w') as f:
+                json.dump({'shape': list(self.matrix.shape), 'ids': self.ids}, f)
+        if self.neighbors is not None:
+            np.save(self._file('neighbors.npy'), self.neighbors)
+            np.save(self._file('neighbor_scores.npy'), self.neighbor_scores)
+
+    def load_model(self, mmap_mode: Optional[str] = None):
+        """Load the model from disk (once; the loaded arrays are shared by every call).
 
-    def load_model(self):
-        """Load the model from disk"""
-        self.vectorizer = joblib.load(os.path.join(self.model_path, 'vectorizer.joblib'))
+        With `mmap_mode='r'` the matrix and neighbour table stay memory-mapped,
+        read-only, instead of being copied into this process.
+        """
+        self.vectorizer = joblib.load(self._file('vectorizer.joblib'))
+        if os.path.exists(self._file('row_ids.json')):
+            with open(self._file('row_ids.json')) as f:
+                meta = json.load(f)
+            arrays = [np.load(self._file(f'tfidf_{name}.npy'), mmap_mode=mmap_mode) for name in self.CSR_ARRAYS]
+            self._set_model(sp.csr_matrix(tuple(arrays), shape=tuple(meta['shape']), copy=False), meta['ids'])
+        if os.path.exists(self._file('neighbors.npy')):
+            self.neighbors = np.load(self._file('neighbors.npy'), mmap_mode=mmap_mode)
+            self.neighbor_scores = np.load(self._file('neighbor_scores.npy'), mmap_mode=mmap_mode)
@@ -0,0 +1,99 @@
+"""
+Turn the merged Michelin + Google CSV into MongoDB restaurant documents.
+
+Documents are serialized column by column, one chunk of rows at a time, and
+streamed out as NDJSON, so memory use depends on the chunk size rather than
+on the dataset size. Kept free of Airflow / GCS imports so it can be
+benchmarked and reused outside the DAG.
+"""
+import json
+from json.encoder import encode_basestring
+from typing import IO, Iterable, Iterator, List, Optional
+import pandas as pd
+
+MICHELIN_FIELDS = [
+    "Address", "Location", "Price", "Cuisine", "Longitude", "Latitude", "PhoneNumber",
+    "Url", "WebsiteUrl", "Award", "GreenStar", "FacilitiesAndServices", "Description",
+]
+# google_info key -> CSV column; the last two only exist after incremental enrichment
+GOOGLE_FIELDS = [
+    ("google_rating", "google_rating"),
+    ("google_reviews", "google_reviews"),
+    ("fetched_at", "google_fetched_at"),
+    ("content_hash", "content_hash"),
+]
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Direct encoders for the scalar types a CSV column holds; json.dumps per value costs ~4x more
+_ENCODERS = {
+    str: encode_basestring,
+    float: float.__repr__,
+    int: int.__repr__,
+    type(None): lambda value: "null",
+}
+
+def _json_column(series: pd.Series) -> List[str]:
+    """JSON literal of every value in a column, with NaN / NA as null"""
+    values = series.astype(object).where(series.notna(), None).tolist()
+    return [_ENCODERS.get(type(value), json.dumps)(value) for value in values]
+
+def iter_ndjson(chunks: Iterable[pd.DataFrame]) -> Iterator[str]:
+    """NDJSON text for each chunk of merged rows, one restaurant document per line"""
+    for chunk in chunks:
+        chunk = chunk.assign(
+            GreenStar=pd.to_numeric(chunk["GreenStar"], errors="coerce").fillna(0).astype(int),
+            google_reviews=pd.to_numeric(chunk["google_reviews"], errors="coerce").astype("Int64"),
+        )
+        google_fields = [(key, column) for key, column in GOOGLE_FIELDS if column in chunk]
+        template = (
+            '{"Name":%s,"michelin_info":{'
+            + ",".join(f'"{field}":%s' for field in MICHELIN_FIELDS)
+            + '},"google_info":{'
+            + ",".join(f'"{key}":%s' for key, _ in google_fields)
+            + "}}\n"
+        )
+        columns = [_json_column(chunk["Name"])]
+        columns += [_json_column(chunk[field]) for field in MICHELIN_FIELDS]
+        columns += [_json_column(chunk[column]) for _, column in google_fields]
+        yield "".join(template % values for values in zip(*columns))
+
+def read_merged_chunks(michelin_google_path: Optional[str] = None, michelin_path: Optional[str] = None,
+                       google_path: Optional[str] = None,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Chunks of the merged dataset: the enriched CSV if there is one, else Michelin joined with Google on Name"""
+    if michelin_google_path:
+        yield from pd.read_csv(michelin_google_path, chunksize=chunk_size)
+        return
+    # The Google side is three columns, small enough to hold while the Michelin side streams
+    google = pd.read_csv(google_path)
+    for chunk in pd.read_csv(michelin_path, chunksize=chunk_size):
+        yield chunk.merge(google, on="Name", how="inner")
+
+def write_ndjson(blocks: Iterable[str], path: str) -> int:
+    """Stream NDJSON blocks to `path`; returns the number of documents written"""
+    documents = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for block in blocks:
+            documents += block.count("\n")
+            f.write(block)
+    return documents
+
+def iter_ndjson_documents(lines: Iterable[str]) -> Iterator[dict]:
+    """Parse NDJSON lines back into documents, skipping blank lines"""
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+def iter_json_documents(f: IO[str]) -> Iterator[dict]:
+    """Documents from an NDJSON stream, or from a legacy JSON array export (which is read whole)"""
+    first = f.readline()
+    while first and not first.strip():
+        first = f.readline()
+    if first.lstrip().startswith("["):
+        yield from json.loads(first + f.read())
+        return
+    if first:
+        yield json.loads(first)
+    yield from iter_ndjson_documents(f)
+
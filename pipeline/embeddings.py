@@ -0,0 +1,190 @@
+"""
+Embed restaurant documents and build the local vector index the API serves
+`/api/v1/search/semantic` from.
+
+Vectors are computed on CPU with sentence-transformers and written, with their
+`restaurant_key`s, as a memory-mappable IVF index (see
+`common.vector_index`). Nothing is stored in MongoDB, so semantic
+search needs neither Atlas nor a database at all.
+
+Embedding is the slow part, so:
+
+- texts are sorted by length and cut into batches under a padded-token budget,
+  so short texts are not padded to the length of long ones;
+- batches are spread over a pool of worker processes, one model copy each;
+- an `EmbeddingCache` keyed by a hash of model + text means unchanged restaurants
+  are never re-embedded. It is one contiguous quantized (float16 / int8) matrix,
+  memory-mapped when read back.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from common.embeddings import EMBEDDING_MODEL, embedding_text, encode, load_encoder
+from common.vector_index import VectorIndex, dequantize, quantize, save_npy_atomic
+from common.restaurants import restaurant_key
+
+DEFAULT_MAX_TOKENS = 8192
+DEFAULT_MAX_BATCH_SIZE = 128
+DEFAULT_STORAGE_DTYPE = "float16"
+
+def document_text(document: Dict) -> str:
+    info = document.get("michelin_info") or {}
+    return embedding_text(document.get("Name"), info.get("Cuisine"), info.get("Description"))
+
+def content_hash(model_name: str, text: str) -> bytes:
+    """Cache key of one embedding: changes with the text and with the model"""
+    return hashlib.sha1(f"{model_name}\x1f{text}".encode("utf-8")).digest()
+
+def estimate_tokens(text: str) -> int:
+    """Rough word-piece count, good enough to group texts of similar length"""
+    return int(len(text.split()) * 1.3) + 2
+
+def length_batches(texts: Sequence[str], max_tokens: int = DEFAULT_MAX_TOKENS,
+                   max_batch_size: int = DEFAULT_MAX_BATCH_SIZE) -> List[np.ndarray]:
+    """Indices of `texts` grouped shortest first, each batch's padded size (size x longest) within `max_tokens`"""
+    lengths = np.array([estimate_tokens(text) for text in texts], dtype=np.int64)
+    order = np.argsort(lengths, kind="stable")
+    batches, start = [], 0
+    for end in range(1, len(order) + 1):
+        # Sorted ascending, so the batch's longest text is its last one
+        size = end - start
+        if end < len(order) and size < max_batch_size and (size + 1) * lengths[order[end]] <= max_tokens:
+            continue
+        batches.append(order[start:end])
+        start = end
+    return batches
+
+class EmbeddingCache:
+    """Content-addressed embeddings: sha1(model, text) -> vector, stored quantized.
+
+    Saved as `hashes.npy` (n x 20 bytes of sha1 digests), `vectors.npy` (float16 / int8 rows) and,
+    for int8, `scales.npy`. `save` writes the vectors of the current run only, so
+    restaurants that left the dataset drop out of the cache.
+    """
+
+    def __init__(self, directory: str, model_name: str = EMBEDDING_MODEL, dtype: str = DEFAULT_STORAGE_DTYPE):
+        self.directory = directory
+        self.model_name = model_name
+        self.dtype = dtype
+        self.hashes = np.empty((0, 20), dtype=np.uint8)
+        self.vectors: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self._rows: Dict[bytes, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> "EmbeddingCache":
+        """Memory-map the saved cache; a missing cache, or one from another model, is empty"""
+        try:
+            with open(os.path.join(self.directory, "cache.json")) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return self
+        if meta.get("model") != self.model_name:
+            return self
+        self.hashes = np.load(os.path.join(self.directory, "hashes.npy"))
+        self.vectors = np.load(os.path.join(self.directory, "vectors.npy"), mmap_mode="r")
+        if meta.get("dtype") == "int8":
+            self.scales = np.load(os.path.join(self.directory, "scales.npy"))
+        self._rows = {digest.tobytes(): row for row, digest in enumerate(self.hashes)}
+        return self
+
+    def lookup(self, digests: Sequence[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions found, their float32 vectors) for the digests already cached"""
+        found = [(i, self._rows[digest]) for i, digest in enumerate(digests) if digest in self._rows]
+        self.hits += len(found)
+        self.misses += len(digests) - len(found)
+        if not found:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+        positions, rows = (np.array(values, dtype=np.int64) for values in zip(*found))
+        scales = self.scales[rows] if self.scales is not None else None
+        return positions, dequantize(self.vectors[rows], scales)
+
+    def save(self, digests: Sequence[bytes], vectors: np.ndarray):
+        """Replace the cache with these embeddings; the metadata goes last"""
+        os.makedirs(self.directory, exist_ok=True)
+        stored, scales = quantize(vectors, self.dtype)
+        save_npy_atomic(os.path.join(self.directory, "hashes.npy"),
+                        np.frombuffer(b"".join(digests), dtype=np.uint8).reshape(-1, 20))
+        save_npy_atomic(os.path.join(self.directory, "vectors.npy"), stored)
+        if scales is not None:
+            save_npy_atomic(os.path.join(self.directory, "scales.npy"), scales)
+        tmp = os.path.join(self.directory, "cache.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"model": self.model_name, "dtype": self.dtype, "count": len(digests)}, f)
+        os.replace(tmp, os.path.join(self.directory, "cache.json"))
+
+# One model per worker process, loaded by the pool initializer
+_worker_encoder = None
+
+def _init_worker(model_name: str, threads: int):
+    global _worker_encoder
+    import torch
+
+    # Workers split the cores instead of each spawning a thread per core
+    torch.set_num_threads(threads)
+    _worker_encoder = load_encoder(model_name)
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    return encode(_worker_encoder, texts, batch_size=len(texts))
+
+def _encoded_batches(texts: Sequence[str], batches: List[np.ndarray], model_name: str,
+                     workers: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """(indices, vectors) per batch, in order, from `workers` processes (or this one)"""
+    if not batches:
+        return
+    batch_texts = ([texts[i] for i in batch] for batch in batches)
+    if workers <= 1:
+        encoder = load_encoder(model_name)
+        for batch, chunk in zip(batches, batch_texts):
+            yield batch, encode(encoder, chunk, batch_size=len(chunk))
+        return
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    # spawn: forking a process that already initialized torch is not safe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(model_name, threads)) as executor:
+        yield from zip(batches, executor.map(_encode_batch, batch_texts))
+
+def embed_texts(texts: Sequence[str], model_name: str = EMBEDDING_MODEL, workers: int = 1,
+                max_tokens: int = DEFAULT_MAX_TOKENS, cache: Optional[EmbeddingCache] = None) -> np.ndarray:
+    """Unit-length float32 embeddings of `texts`, reusing cached ones and refreshing the cache"""
+    digests = [content_hash(model_name, text) for text in texts]
+    vectors: Optional[np.ndarray] = None
+    missing = np.arange(len(texts))
+    if cache is not None:
+        positions, cached = cache.lookup(digests)
+        if len(positions):
+            vectors = np.empty((len(texts), cached.shape[1]), dtype=np.float32)
+            vectors[positions] = cached
+            missing = np.setdiff1d(missing, positions)
+
+    pending = [texts[i] for i in missing]
+    for batch, encoded in _encoded_batches(pending, length_batches(pending, max_tokens), model_name, workers):
+        if vectors is None:
+            vectors = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        vectors[missing[batch]] = encoded
+    if vectors is None:
+        vectors = np.empty((0, 0), dtype=np.float32)
+    if cache is not None:
+        cache.save(digests, vectors)
+    return vectors
+
+def build_vector_index(documents: Iterable[Dict], directory: str, model_name: str = EMBEDDING_MODEL,
+                       workers: int = 1, max_tokens: int = DEFAULT_MAX_TOKENS, cache_dir: Optional[str] = None,
+                       dtype: str = DEFAULT_STORAGE_DTYPE, n_lists: Optional[int] = None) -> Dict[str, int]:
+    """Embed every document and save the index to `directory`; returns indexed / embedded / cached counts"""
+    keys, texts = [], []
+    for document in documents:
+        keys.append(restaurant_key(document))
+        texts.append(document_text(document))
+    if not keys:
+        raise ValueError("No documents to index")
+    cache = EmbeddingCache(cache_dir, model_name, dtype).load() if cache_dir else None
+    vectors = embed_texts(texts, model_name, workers, max_tokens, cache)
+    VectorIndex.build(vectors, keys, n_lists=n_lists, model=model_name, dtype=dtype).save(directory)
+    cached = cache.hits if cache else 0
+    return {"indexed": len(keys), "embedded": len(keys) - cached, "cached": cached}
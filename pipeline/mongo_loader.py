@@ -0,0 +1,118 @@
+"""
+Bulk, idempotent loading of restaurant documents into MongoDB.
+
+Documents are consumed from an iterator (so a file can be streamed), grouped into
+batches and written as unordered `UpdateOne(upsert=True)` bulk writes keyed on
+`restaurant_key`, by a small pool of writer threads. Loading twice, or resuming
+after a crash, never duplicates a restaurant.
+
+A full load goes into a staging collection seeded with the live documents, which
+is then renamed over the live one, so readers see either the previous dataset or
+the new one, never a partial load. Seeding keeps every restaurant's `_id` and
+`created_at` across loads (cursors, links and recommender ids stay valid) and
+keeps restaurants created through the API; only pipeline documents the new load
+no longer contains are removed.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from pymongo.database import Database
+from common.restaurants import SEARCH_INDEXES, TEXT_INDEX, restaurant_key, with_shadow_fields
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_WRITERS = 4
+
+def _upsert(document: Dict, loaded_at: datetime, load_id: ObjectId) -> UpdateOne:
+    document = with_shadow_fields(document)
+    document["restaurant_key"] = restaurant_key(document)
+    document["updated_at"] = loaded_at
+    # Marks pipeline documents, and which load last wrote them
+    document["load_id"] = load_id
+    document.pop("_id", None)
+    document.pop("created_at", None)
+    return UpdateOne(
+        {"restaurant_key": document["restaurant_key"]},
+        {"$set": document, "$setOnInsert": {"created_at": loaded_at}},
+        upsert=True,
+    )
+
+def ensure_indexes(collection):
+    """Unique restaurant key (what upserts match on) plus the API's search indexes"""
+    collection.create_index([("restaurant_key", ASCENDING)], unique=True, name="restaurant_key")
+    for name, keys in SEARCH_INDEXES:
+        collection.create_index(keys, name=name)
+    collection.create_index(TEXT_INDEX)
+
+def upsert_documents(collection, documents: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE,
+                     writers: int = DEFAULT_WRITERS, load_id: Optional[ObjectId] = None) -> Dict[str, int]:
+    """Upsert documents in unordered batches from `writers` threads; returns write counts"""
+    loaded_at = datetime.now(timezone.utc)
+    load_id = load_id or ObjectId()
+    counts = {"documents": 0, "upserted": 0, "modified": 0, "matched": 0}
+    pending = set()
+
+    def collect(done):
+        for future in done:
+            result = future.result()
+            counts["upserted"] += result.upserted_count
+            counts["modified"] += result.modified_count
+            counts["matched"] += result.matched_count
+
+    def submit(executor, batch: List[UpdateOne]):
+        # Bound the in-flight batches so a fast reader cannot buffer the whole file
+        if len(pending) >= writers * 2:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            pending.difference_update(done)
+            collect(done)
+        pending.add(executor.submit(collection.bulk_write, batch, ordered=False))
+
+    with ThreadPoolExecutor(max_workers=writers) as executor:
+        batch = []
+        for document in documents:
+            batch.append(_upsert(document, loaded_at, load_id))
+            counts["documents"] += 1
+            if len(batch) == batch_size:
+                submit(executor, batch)
+                batch = []
+        if batch:
+            submit(executor, batch)
+        done, _ = wait(pending)
+        collect(done)
+    return counts
+
+def load_documents(db: Database, collection_name: str, documents: Iterable[Dict],
+                   batch_size: int = DEFAULT_BATCH_SIZE, writers: int = DEFAULT_WRITERS,
+                   swap: bool = True, resume: bool = False) -> Dict[str, int]:
+    """
+    Load documents into `collection_name`.
+
+    With `swap` (full reload) they are upserted into `<name>_staging`, a copy of the
+    live collection, from which pipeline documents missing from this load are then
+    deleted, and which is atomically renamed over the live collection. `resume` keeps
+    a staging collection left by a failed run instead of starting it over. Without
+    `swap` the documents are upserted straight into the live collection (incremental load).
+    """
+    if not swap:
+        target = db[collection_name]
+        ensure_indexes(target)
+        return upsert_documents(target, documents, batch_size, writers)
+
+    staging = db[f"{collection_name}_staging"]
+    if not resume:
+        staging.drop()
+        if collection_name in db.list_collection_names():
+            # Upserts then match existing restaurants by key and keep their _id and created_at
+            db[collection_name].aggregate([{"$match": {}}, {"$out": staging.name}])
+    # Index before upserting: the unique key makes concurrent upserts of the same restaurant safe
+    ensure_indexes(staging)
+    load_id = ObjectId()
+    counts = upsert_documents(staging, documents, batch_size, writers, load_id)
+    if counts["documents"] == 0:
+        raise ValueError("No documents to load, keeping the current collection")
+    # Restaurants created through the API carry no load_id and are kept
+    counts["removed"] = staging.delete_many({"load_id": {"$exists": True, "$ne": load_id}}).deleted_count
+    # renameCollection within a database is atomic for readers
+    staging.rename(collection_name, dropTarget=True)
+    return counts
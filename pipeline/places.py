@@ -0,0 +1,285 @@
+"""
+Google Places lookups for the ratings enrichment: a persistent SQLite cache of
+both lookup steps, the cache/find/details decisions shared by every client, and
+a concurrent async client with rate limiting, retries and a resumable checkpoint.
+
+Configuration comes from the caller (see the PLACES_* settings in dag.py);
+benchmarks/mock_places_server.py stands in for the real API locally.
+"""
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import time
+from typing import Dict, Generator, Iterable, Optional, Tuple
+import aiohttp
+
+DEFAULT_BASE_URL = 'https://maps.googleapis.com/maps/api/place'
+
+class PlacesCache:
+    """
+    Persistent SQLite cache for the two Places lookup steps.
+
+    `places` maps a normalized "name address" query to its place_id (NULL for a
+    query Places could not match, kept for a shorter negative TTL); place_ids are
+    stable, so these live long. `details` maps a place_id to rating and review
+    count, which drift and expire sooner. A stale rating with a known place_id
+    therefore costs one details call instead of a new text search.
+    """
+
+    def __init__(self, path: str, place_id_ttl_days: float = 365, rating_ttl_days: float = 7,
+                 negative_ttl_days: float = 7):
+        self.place_id_ttl = place_id_ttl_days * 86400
+        self.rating_ttl = rating_ttl_days * 86400
+        self.negative_ttl = negative_ttl_days * 86400
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS places (query TEXT PRIMARY KEY, place_id TEXT, fetched_at REAL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS details (place_id TEXT PRIMARY KEY, rating REAL, reviews INTEGER, fetched_at REAL)")
+        self.stats = {'place_hits': 0, 'negative_hits': 0, 'place_misses': 0, 'details_hits': 0, 'details_misses': 0}
+
+    @staticmethod
+    def normalize_query(name: str, address: str) -> str:
+        return " ".join(f"{name} {address}".lower().split())
+
+    def get_place_id(self, name: str, address: str) -> Tuple[bool, Optional[str]]:
+        """(found, place_id); a found None place_id is a cached "no match"."""
+        row = self.conn.execute("SELECT place_id, fetched_at FROM places WHERE query = ?",
+                                (self.normalize_query(name, address),)).fetchone()
+        if row is not None:
+            place_id, fetched_at = row
+            ttl = self.place_id_ttl if place_id is not None else self.negative_ttl
+            if time.time() - fetched_at < ttl:
+                self.stats['place_hits' if place_id is not None else 'negative_hits'] += 1
+                return True, place_id
+        self.stats['place_misses'] += 1
+        return False, None
+
+    def put_place_id(self, name: str, address: str, place_id: Optional[str]):
+        self.conn.execute("INSERT OR REPLACE INTO places VALUES (?, ?, ?)",
+                          (self.normalize_query(name, address), place_id, time.time()))
+
+    def get_details(self, place_id: str) -> Optional[Tuple[Optional[float], Optional[int]]]:
+        row = self.conn.execute("SELECT rating, reviews, fetched_at FROM details WHERE place_id = ?",
+                                (place_id,)).fetchone()
+        if row is not None and time.time() - row[2] < self.rating_ttl:
+            self.stats['details_hits'] += 1
+            return row[0], row[1]
+        self.stats['details_misses'] += 1
+        return None
+
+    def put_details(self, place_id: str, rating: Optional[float], reviews: Optional[int]):
+        self.conn.execute("INSERT OR REPLACE INTO details VALUES (?, ?, ?, ?)", (place_id, rating, reviews, time.time()))
+
+    def hit_rates(self) -> Dict[str, float]:
+        place_lookups = self.stats['place_hits'] + self.stats['negative_hits'] + self.stats['place_misses']
+        details_lookups = self.stats['details_hits'] + self.stats['details_misses']
+        return {
+            'place_hit_rate': (self.stats['place_hits'] + self.stats['negative_hits']) / place_lookups if place_lookups else 0.0,
+            'details_hit_rate': self.stats['details_hits'] / details_lookups if details_lookups else 0.0,
+        }
+
+    def report(self):
+        rates = self.hit_rates()
+        print(f"Places cache: {self.stats}, place_id hit rate {rates['place_hit_rate']:.1%}, "
+              f"details hit rate {rates['details_hit_rate']:.1%}")
+
+    def close(self):
+        self.conn.close()
+
+# Places answered but could not serve the request (bad key, quota, server trouble): not a "no match"
+FAILED_STATUSES = {'REQUEST_DENIED', 'INVALID_REQUEST', 'OVER_QUERY_LIMIT', 'UNKNOWN_ERROR'}
+# Of those, the ones worth retrying after a backoff
+RETRYABLE_STATUSES = {'OVER_QUERY_LIMIT', 'UNKNOWN_ERROR'}
+
+class PlacesError(Exception):
+    """Places rejected a request; the lookup fails instead of being recorded as "no match"."""
+
+PlaceRatingSteps = Generator[Tuple[str, Dict], Dict, Tuple[Optional[float], Optional[int]]]
+
+def place_rating_steps(cache: Optional[PlacesCache], name: str, address: str) -> PlaceRatingSteps:
+    """
+    The cache/find/details decisions for one restaurant, shared by the sync and async clients.
+
+    Yields (endpoint, params) for every Places request it needs and expects the
+    JSON response to be sent back; returns (rating, reviews). Raises PlacesError
+    on a FAILED_STATUSES response, so nothing is cached or checkpointed for it.
+    """
+    found, place_id = cache.get_place_id(name, address) if cache else (False, None)
+    if found and place_id is None:
+        return None, None
+    if not found:
+        data = yield 'findplacefromtext', {
+            'input': f"{name} {address}",
+            'inputtype': 'textquery',
+            'fields': 'place_id,rating,user_ratings_total',
+        }
+        if data.get('status') in FAILED_STATUSES:
+            raise PlacesError(f"findplacefromtext: {data['status']} {data.get('error_message', '')}".strip())
+        candidates = data.get('candidates') or []
+        if not candidates:
+            if cache:
+                cache.put_place_id(name, address, None)
+            return None, None
+        candidate = candidates[0]
+        place_id = candidate.get('place_id')
+        if cache and place_id:
+            cache.put_place_id(name, address, place_id)
+        # The search usually carries the rating already, saving the details round-trip
+        if candidate.get('rating') is not None:
+            if cache and place_id:
+                cache.put_details(place_id, candidate.get('rating'), candidate.get('user_ratings_total'))
+            return candidate.get('rating'), candidate.get('user_ratings_total')
+        if not place_id:
+            return None, None
+
+    cached = cache.get_details(place_id) if cache else None
+    if cached is not None:
+        return cached
+    details = yield 'details', {
+        'place_id': place_id,
+        'fields': 'rating,user_ratings_total',
+    }
+    if details.get('status') in FAILED_STATUSES:
+        raise PlacesError(f"details: {details['status']} {details.get('error_message', '')}".strip())
+    result = details.get('result') or {}
+    if cache:
+        cache.put_details(place_id, result.get('rating'), result.get('user_ratings_total'))
+    return result.get('rating'), result.get('user_ratings_total')
+
+class TokenBucket:
+    """Async token bucket allowing `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class RetryableError(Exception):
+    """Throttled or transient Places response; `retry_after` is the server's hint in seconds."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class PlacesEnricher:
+    """
+    Concurrent Google Places lookups for many restaurants.
+
+    Requests share one keep-alive session, go through a token bucket and at most
+    `concurrency` are in flight. 429/5xx and OVER_QUERY_LIMIT are retried with
+    exponential backoff and jitter. Every finished lookup is appended to a JSONL
+    checkpoint, so a crashed run resumes where it stopped, and goes through the
+    PlacesCache when one is given, so re-runs and other callers reuse it.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_key: str, base_url: str = DEFAULT_BASE_URL, concurrency: int = 16,
+                 requests_per_second: float = 20, max_retries: int = 5,
+                 checkpoint_path: Optional[str] = None, base_backoff: float = 0.5,
+                 max_backoff: float = 30.0, cache: Optional[PlacesCache] = None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(requests_per_second)
+        self.max_retries = max_retries
+        self.checkpoint_path = checkpoint_path
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.cache = cache
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'resumed': 0, 'looked_up': 0}
+
+    async def _get_json(self, session: aiohttp.ClientSession, endpoint: str, params: Dict) -> Dict:
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            self.stats['requests'] += 1
+            try:
+                async with session.get(f"{self.base_url}/{endpoint}/json", params={**params, 'key': self.api_key}) as response:
+                    if response.status in self.RETRY_STATUSES:
+                        retry_after = response.headers.get('Retry-After', '')
+                        raise RetryableError(f"HTTP {response.status}",
+                                             float(retry_after) if retry_after.isdigit() else None)
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+                if data.get('status') in RETRYABLE_STATUSES:
+                    raise RetryableError(data['status'])
+                return data
+            except (RetryableError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise
+                self.stats['retries'] += 1
+                backoff = min(self.max_backoff, self.base_backoff * 2 ** attempt) * (0.5 + random.random() / 2)
+                await asyncio.sleep(max(backoff, getattr(e, 'retry_after', None) or 0))
+
+    async def lookup(self, session: aiohttp.ClientSession, name: str, address: str) -> Tuple[Optional[float], Optional[int]]:
+        """Rating and review count for one restaurant, (None, None) when Places has no match."""
+        # SQLite lookups are sub-millisecond local reads, so they run inline on the event loop
+        steps = place_rating_steps(self.cache, name, address)
+        try:
+            endpoint, params = next(steps)
+            while True:
+                endpoint, params = steps.send(await self._get_json(session, endpoint, params))
+        except StopIteration as done:
+            return done.value
+
+    def _load_checkpoint(self) -> Dict[Tuple[str, str], Tuple[Optional[float], Optional[int]]]:
+        done = {}
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash
+                    done[(entry['name'], entry['address'])] = (entry['rating'], entry['reviews'])
+        return done
+
+    async def enrich(self, restaurants: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[Optional[float], Optional[int]]]:
+        """Look up every (name, address) pair not already in the checkpoint."""
+        results = self._load_checkpoint()
+        pending = iter([key for key in dict.fromkeys(restaurants) if key not in results])
+        self.stats['resumed'] = len(results)
+        checkpoint = open(self.checkpoint_path, 'a', encoding='utf-8') if self.checkpoint_path else None
+
+        async def worker(session):
+            # Workers share one iterator; next() never yields to the event loop, so no locking needed
+            for name, address in pending:
+                try:
+                    rating, reviews = await self.lookup(session, name, address)
+                except Exception as e:
+                    self.stats['failures'] += 1
+                    print(f"Error fetching rating for {name}: {str(e)}")
+                    continue
+                results[(name, address)] = (rating, reviews)
+                self.stats['looked_up'] += 1
+                if checkpoint:
+                    checkpoint.write(json.dumps({'name': name, 'address': address, 'rating': rating, 'reviews': reviews}) + "\n")
+                    checkpoint.flush()
+                if self.stats['looked_up'] % 500 == 0:
+                    print(f"Processed {self.stats['looked_up']} restaurants...")
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+        try:
+            async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=30)) as session:
+                await asyncio.gather(*(worker(session) for _ in range(self.concurrency)))
+        finally:
+            if checkpoint:
+                checkpoint.close()
+        return results
+
@@ -0,0 +1,17 @@
+import pytest
+from api.app.routes.search import michelin_service, response_cache
+from api.app.services.restaurant_store import RestaurantStore
+from benchmarks.blocking_load_test import synthetic_frame
+
+@pytest.fixture
+def frame():
+    return synthetic_frame(200)
+
+@pytest.fixture
+def dataset(frame, monkeypatch):
+    """Serve `frame` from the API's MichelinService instead of the downloaded dataset"""
+    store = michelin_service._prepare(RestaurantStore.from_frame(frame, version="test"))
+    monkeypatch.setattr(michelin_service, "_data", store)
+    response_cache.clear()
+    yield store
+    response_cache.clear()
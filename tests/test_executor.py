@@ -0,0 +1,33 @@
+import asyncio
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from api.app.main import app
+from api.app.services.executor import BoundedExecutor, ServiceOverloaded, service_executor
+
+def test_calls_beyond_the_queue_are_rejected():
+    executor = BoundedExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def run():
+        # One call runs, one waits for the thread, the third has no room
+        held = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ServiceOverloaded):
+            await executor.run(release.wait)
+        release.set()
+        return await asyncio.gather(*held)
+
+    try:
+        assert asyncio.run(run()) == [True, True]
+    finally:
+        executor.shutdown()
+    metrics = executor.metrics()
+    assert metrics["rejected"] == 1 and metrics["completed"] == 2 and metrics["queued"] == 0
+
+def test_overflow_is_served_as_503(dataset, monkeypatch):
+    # Every slot is taken by requests still in flight
+    monkeypatch.setattr(service_executor, "_pending", service_executor.max_workers + service_executor.max_queue)
+    response = TestClient(app).get("/api/v1/search/search", params={"cuisine": "Japanese"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
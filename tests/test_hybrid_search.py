@@ -0,0 +1,80 @@
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from api.app.main import app
+from api.app.routes.search import michelin_service, semantic_search
+from api.app.services.rank_fusion import RRF_K
+from api.app.services.semantic_search import SemanticSearch
+from common.vector_index import VectorIndex
+
+SEARCH = "/api/v1/search/search"
+
+@pytest.fixture
+def vectors(frame):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(len(frame), 16)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+@pytest.fixture
+def index(frame, vectors):
+    index = VectorIndex.build(vectors, list(frame["Url"]), n_lists=4, dtype="float32")
+    index.n_probe = 4  # every list, so the vector ranking is exact
+    return index
+
+@pytest.fixture
+def client(dataset, index, vectors, monkeypatch):
+    monkeypatch.setattr(semantic_search, "index", index)
+    monkeypatch.setattr(semantic_search, "encoder", object())
+    # The query "means" restaurant 3
+    monkeypatch.setattr(semantic_search, "embed", lambda query: vectors[3])
+    return TestClient(app)
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def expected_order(lexical, vector, depth):
+    """Reciprocal rank fusion written out: sum of 1 / (k + rank), ties by row"""
+    scores = {}
+    for ranking in (lexical[:depth], vector[:depth]):
+        for rank, row in enumerate(ranking, start=1):
+            scores[row] = scores.get(row, 0) + 1 / (RRF_K + rank)
+    return sorted(scores, key=lambda row: (-scores[row], row))
+
+@pytest.mark.parametrize("filters", [{}, {"cuisine": "Japanese"}], ids=["unfiltered", "filtered"])
+def test_hybrid_fuses_lexical_and_vector_rankings(client, frame, vectors, filters):
+    depth = michelin_service.hybrid_candidates
+    params = {"query": "tasting menu", "limit": 100, **filters}
+    row = lambda result: int(result["name"].split()[-1])
+    lexical = [row(r) for r in client.get(SEARCH, params=params).json()["results"]]
+    allowed = frame["Cuisine"].str.contains(filters["cuisine"]).to_numpy() if filters else np.ones(len(frame), bool)
+    similarity = np.where(allowed, vectors @ vectors[3], -np.inf)
+    vector = [int(i) for i in np.argsort(-similarity, kind="stable")[:int(allowed.sum())]]
+
+    response = client.get(SEARCH, params={**params, "mode": "hybrid"})
+    assert response.headers["X-Search-Mode"] == "hybrid"
+    fused = [row(r) for r in response.json()["results"]]
+    assert fused == expected_order(lexical, vector, depth)[:100]
+    # In both rankings beats being top of only one of them
+    assert fused[0] in lexical[:depth] and fused[0] in vector[:depth]
+    assert all(allowed[fused])
+
+def test_fetch_downloads_the_published_index(index, tmp_path, monkeypatch):
+    published = tmp_path / "published"
+    index.save(str(published))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(published)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("VECTOR_INDEX_URL", f"http://127.0.0.1:{server.server_port}/")
+    try:
+        semantic = SemanticSearch(str(tmp_path / "local"))
+        assert semantic.fetch() is True
+        assert semantic.fetch() is False  # already current
+    finally:
+        server.shutdown()
+        server.server_close()
+    fetched = VectorIndex.load(str(tmp_path / "local"))
+    assert fetched.keys == index.keys
+    assert np.array_equal(np.asarray(fetched.vectors), index.vectors)
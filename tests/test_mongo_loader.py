@@ -0,0 +1,63 @@
+import mongomock
+import pytest
+from common.restaurants import restaurant_key
+from pipeline.mongo_loader import load_documents
+
+def restaurant(name, award, url=None):
+    return {
+        "Name": name,
+        "michelin_info": {"Address": f"1 {name} Street", "Cuisine": "French", "Location": "Paris, France",
+                          "Award": award, "Url": url},
+    }
+
+RESTAURANTS = [
+    restaurant("Le Cinq", "3 Stars", "https://guide.michelin.com/le-cinq"),
+    restaurant("Septime", "1 Star", "https://guide.michelin.com/septime"),
+    restaurant("Chez Nous", "Bib Gourmand"),
+]
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().michelin
+
+@pytest.mark.parametrize("swap", [True, False], ids=["full", "incremental"])
+def test_reloading_never_duplicates_restaurants(db, swap):
+    load_documents(db, "restaurants", RESTAURANTS, batch_size=2, writers=2, swap=swap)
+    created = {doc["restaurant_key"]: doc["created_at"] for doc in db.restaurants.find()}
+
+    updated = [restaurant("Septime", "2 Stars", "https://guide.michelin.com/septime")]
+    counts = load_documents(db, "restaurants", RESTAURANTS[:1] + updated + RESTAURANTS[2:],
+                            batch_size=2, writers=2, swap=swap)
+
+    documents = list(db.restaurants.find())
+    assert len(documents) == len(RESTAURANTS) == len(created)
+    assert {doc["restaurant_key"]: doc["created_at"] for doc in documents} == created
+    assert db.restaurants.find_one({"Name": "Septime"})["michelin_info"]["Award"] == "2 Stars"
+    assert counts["upserted"] == 0 and counts["matched"] == len(RESTAURANTS)
+
+def test_full_reload_keeps_identities_and_api_restaurants(db):
+    load_documents(db, "restaurants", RESTAURANTS)
+    ids = {doc["restaurant_key"]: (doc["_id"], doc["created_at"]) for doc in db.restaurants.find()}
+    assert "https://guide.michelin.com/le-cinq" in ids  # keyed on the guide URL, not the name hash
+    created_through_api = db.restaurants.insert_one({"Name": "Pop-up", "restaurant_key": "pop-up"}).inserted_id
+
+    # Chez Nous left the guide
+    counts = load_documents(db, "restaurants", RESTAURANTS[:2])
+
+    loaded = db.restaurants.find({"load_id": {"$exists": True}})
+    assert {doc["restaurant_key"]: (doc["_id"], doc["created_at"]) for doc in loaded} == {
+        key: ids[key] for key in ids if key != restaurant_key(RESTAURANTS[2])
+    }
+    assert db.restaurants.find_one({"_id": created_through_api}) is not None
+    assert db.restaurants.find_one({"Name": "Chez Nous"}) is None and counts["removed"] == 1
+
+def test_full_reload_keeps_a_restaurant_loaded_twice_once(db):
+    load_documents(db, "restaurants", RESTAURANTS + RESTAURANTS[:1], writers=1)
+    assert db.restaurants.count_documents({}) == len(RESTAURANTS)
+    assert "restaurants_staging" not in db.list_collection_names()
+
+def test_empty_reload_keeps_the_current_collection(db):
+    load_documents(db, "restaurants", RESTAURANTS)
+    with pytest.raises(ValueError):
+        load_documents(db, "restaurants", [])
+    assert db.restaurants.count_documents({}) == len(RESTAURANTS)
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import pytest
+from aiohttp import web
+from benchmarks.mock_places_server import create_app, place_for
+from pipeline.places import PlacesCache, PlacesEnricher
+
+RESTAURANTS = [(f"Resto {i}", f"{i} Street") for i in range(40)]
+
+def expected(name, address):
+    place = place_for(f"{name} {address}")
+    return (place["rating"], place["user_ratings_total"]) if place else (None, None)
+
+def start_mock(**faults):
+    """Run benchmarks/mock_places_server.py on its own event loop thread; returns (base_url, stop)"""
+    options = {"latency": 0, "throttle_rate": 0, "error_rate": 0, "details_rate": 0.5, **faults}
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(create_app(**options))
+
+    async def start():
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return runner.addresses[0][1]
+
+    port = loop.run_until_complete(start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    return f"http://127.0.0.1:{port}", stop
+
+@pytest.fixture
+def mock_places():
+    base_url, stop = start_mock()
+    yield base_url
+    stop()
+
+def enricher(base_url, **options):
+    return PlacesEnricher("test-key", base_url=base_url, requests_per_second=1000, base_backoff=0.01, **options)
+
+def test_retries_through_server_errors():
+    base_url, stop = start_mock(error_rate=0.2)
+    try:
+        places = enricher(base_url)
+        results = asyncio.run(places.enrich(RESTAURANTS))
+    finally:
+        stop()
+    assert results == {key: expected(*key) for key in RESTAURANTS}
+    assert places.stats["failures"] == 0 and places.stats["retries"] > 0
+
+def test_cached_lookups_skip_the_api(mock_places, tmp_path):
+    cache = PlacesCache(str(tmp_path / "places.sqlite"))
+    first = asyncio.run(enricher(mock_places, cache=cache).enrich(RESTAURANTS))
+    second = enricher(mock_places, cache=cache)
+    assert asyncio.run(second.enrich(RESTAURANTS)) == first
+    assert second.stats["requests"] == 0
+    cache.close()
+
+def test_resumes_from_the_checkpoint(mock_places, tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    first = asyncio.run(enricher(mock_places, checkpoint_path=checkpoint).enrich(RESTAURANTS[:25]))
+    resumed = enricher(mock_places, checkpoint_path=checkpoint)
+    results = asyncio.run(resumed.enrich(RESTAURANTS))
+    assert results == {**first, **{key: expected(*key) for key in RESTAURANTS}}
+    assert resumed.stats["resumed"] == 25 and resumed.stats["looked_up"] == 15
+
+def test_denied_requests_fail_instead_of_recording_no_match(tmp_path):
+    base_url, stop = start_mock(api_key="right-key")
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    cache = PlacesCache(str(tmp_path / "places.sqlite"))
+    try:
+        places = enricher(base_url, checkpoint_path=str(checkpoint), cache=cache)
+        results = asyncio.run(places.enrich(RESTAURANTS))
+    finally:
+        stop()
+    assert results == {} and places.stats["failures"] == len(RESTAURANTS)
+    # Nothing is checkpointed or cached, so the next run looks every restaurant up again
+    assert checkpoint.read_text() == ""
+    assert cache.get_place_id(*RESTAURANTS[0]) == (False, None)
+    cache.close()
@@ -0,0 +1,30 @@
+import numpy as np
+from api.app.models.schemas import RestaurantSearchParams
+from api.app.preload import preload
+from api.app.services.michelin_service import MichelinService
+from api.app.services.restaurant_store import RestaurantStore
+from api.app.services.snapshot import DatasetSnapshot
+
+def test_preload_completes_the_snapshot_workers_map(frame, tmp_path):
+    # A snapshot holding only the columns, as written before indexes were saved with it
+    DatasetSnapshot(str(tmp_path)).save(RestaurantStore.from_frame(frame, version="test"))
+
+    summary = preload(MichelinService(str(tmp_path)))
+    assert summary["version"] == "test" and summary["restaurants"] == len(frame)
+    assert {"spatial", "text", "facilities", "name_order", "derived.json"} <= set(summary["rebuilt"])
+    assert preload(MichelinService(str(tmp_path)))["rebuilt"] == []
+
+    # A worker maps everything from the snapshot and answers like a store built in memory
+    worker = MichelinService(str(tmp_path))
+    store = worker.load()
+    assert store.unsaved_artifacts() == []
+    assert isinstance(store.latitude, np.memmap)
+
+    reference = MichelinService(str(tmp_path / "unused"))
+    reference._data = reference._prepare(RestaurantStore.from_frame(frame, version="test"))
+    for params in (RestaurantSearchParams(query="tasting menu", limit=20),
+                   RestaurantSearchParams(cuisine="Japanese", facilities=["Terrace"])):
+        assert worker.search_restaurants(params).body == reference.search_restaurants(params).body
+        assert worker.facet_counts(params) == reference.facet_counts(params)
+    assert worker.find_nearest_restaurants(48.85, 2.35, 5).body == reference.find_nearest_restaurants(48.85, 2.35, 5).body
+    assert worker.get_restaurant_by_name("Resto 7").body == reference.get_restaurant_by_name("Resto 7").body
@@ -0,0 +1,45 @@
+import pytest
+from fastapi.testclient import TestClient
+from api.app.main import app
+from api.app.services.recommendation_service import RecommendationService, recommendation_service
+from ml.models.recommendation import RestaurantRecommender
+
+RESTAURANTS = [
+    {"_id": "a", "name": "Sushi Saito", "cuisine": "Japanese", "description": "omakase sushi counter"},
+    {"_id": "b", "name": "Sushi Kanesaka", "cuisine": "Japanese", "description": "edomae sushi omakase"},
+    {"_id": "c", "name": "Le Bernardin", "cuisine": "Seafood", "description": "french seafood tasting menu"},
+    {"_id": "d", "name": "Le Cinq", "cuisine": "French", "description": "classic french tasting menu"},
+]
+
+@pytest.fixture
+def client():
+    # No `with`: the app's lifespan (dataset download, Mongo) is not needed here
+    return TestClient(app)
+
+@pytest.fixture
+def trained(tmp_path, monkeypatch):
+    RestaurantRecommender(str(tmp_path)).train(RESTAURANTS, top_k=2)
+    service = RecommendationService(str(tmp_path))
+    service.load()
+    monkeypatch.setattr(recommendation_service, "_model", service._model)
+    yield
+    service.close()
+
+def test_unavailable_without_a_model(client, monkeypatch):
+    monkeypatch.setattr(recommendation_service, "_model", None)
+    assert client.get("/api/v1/recommendations/a").status_code == 503
+    response = client.post("/api/v1/recommendations/batch", json={"restaurant_ids": ["a"]})
+    assert response.status_code == 503
+
+def test_recommends_most_similar(client, trained):
+    response = client.get("/api/v1/recommendations/a?limit=1")
+    assert response.status_code == 200
+    assert [r["restaurant_id"] for r in response.json()["recommendations"]] == ["b"]
+    assert response.headers["Server-Timing"].startswith("recommend;dur=")
+
+def test_unknown_restaurant(client, trained):
+    assert client.get("/api/v1/recommendations/zzz").status_code == 404
+    response = client.post("/api/v1/recommendations/batch", json={"restaurant_ids": ["c", "zzz"], "limit": 1})
+    assert response.status_code == 200
+    assert response.json()["missing"] == ["zzz"]
+    assert response.json()["results"][0]["recommendations"][0]["restaurant_id"] == "d"
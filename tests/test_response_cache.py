@@ -0,0 +1,11 @@
+from api.app.services.response_cache import ResponseCache, pack_response, unpack_response
+
+def test_headers_survive_a_cache_round_trip():
+    cache = ResponseCache()
+    body = b'{"description": "line one\nline two"}'
+    headers = {"Server-Timing": "filter;dur=0.10, render;dur=0.20", "X-Search-Mode": "hybrid"}
+    cache.set("key", pack_response(body, headers))
+    assert unpack_response(cache.get("key")) == (body, headers)
+
+def test_no_headers():
+    assert unpack_response(pack_response(b"[]", {})) == (b"[]", {})
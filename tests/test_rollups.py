@@ -0,0 +1,121 @@
+import asyncio
+from datetime import datetime, timezone
+import mongomock
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from api.app.services.rollups import (
+    COUNT_FIELDS, apply_rollup_delta, rebuild_rollups, rollup_pipeline, update_rollups, write_rollups,
+)
+
+def restaurant(cuisine, award, location, rating=None):
+    return {
+        "michelin_info": {"Cuisine": cuisine, "Award": award, "Location": location},
+        "google_info": {"google_rating": rating},
+    }
+
+@pytest.fixture
+def db():
+    database = mongomock.MongoClient().michelin
+    database.restaurants.insert_many([
+        restaurant("French", "3 Stars", "Paris, France", 4.5),
+        restaurant("French", "1 Star", "Lyon, France", 4.0),
+        restaurant("Japanese", "Bib Gourmand", "Tokyo, Japan"),
+    ])
+    return database
+
+def test_rebuild_counts_and_averages(db):
+    assert rebuild_rollups(db) == {
+        "restaurants_per_cuisine": 2, "restaurants_per_city": 2, "three_star_restaurants_per_city": 1,
+    }
+    french = db.restaurants_per_cuisine.find_one({"_id": "French"})
+    assert french["total_restaurants"] == 2
+    assert french["google_rating"] == pytest.approx(4.25)
+    assert french["michelin_rating"]["three_stars"] == 1
+
+def test_rebuild_drops_groups_that_disappeared(db):
+    rebuild_rollups(db)
+    db.restaurants.delete_many({"michelin_info.Location": "Lyon, France"})
+    rebuild_rollups(db)
+    assert [entry["_id"] for entry in db.restaurants_per_city.find()] == [{"City": "Paris", "Country": "France"}]
+    # Swapped in by rename: no staging collection is left behind and the index survives
+    assert not [name for name in db.list_collection_names() if name.endswith("_rebuild")]
+    assert "total_restaurants_-1" in db.restaurants_per_city.index_information()
+
+def summary(db):
+    """Rollup contents without the zero counters and missing sums only one of the two paths writes"""
+    return {
+        rollup: sorted(
+            (str(entry["_id"]), entry[count_field], sorted((k, v) for k, v in entry.get("michelin_rating", {}).items() if v),
+             None if entry.get("google_rating") is None else round(entry["google_rating"], 6))
+            for entry in db[rollup].find()
+        )
+        for rollup, count_field in COUNT_FIELDS.items()
+    }
+
+def rebuilt_summary(db):
+    """What a rebuild from the current restaurants gives, computed on a copy"""
+    copy = mongomock.MongoClient().copy
+    copy.restaurants.insert_many(list(db.restaurants.find()))
+    rebuild_rollups(copy)
+    return summary(copy)
+
+@pytest.fixture
+def motor_db():
+    """The same database through the async (Motor) API the write routes use"""
+    client = AsyncMongoMockClient()
+    database = client.michelin
+    database.delegate.restaurants.insert_many([
+        restaurant("French", "3 Stars", "Paris, France", 4.5),
+        restaurant("French", "1 Star", "Lyon, France", 4.0),
+        restaurant("Japanese", "Bib Gourmand", "Tokyo, Japan"),
+    ])
+    rebuild_rollups(database.delegate)
+    return database
+
+def create(db, document):
+    async def run():
+        await db.restaurants.insert_one(document)
+        await apply_rollup_delta(db, document, 1)
+    asyncio.run(run())
+    return document
+
+def test_deltas_track_creates_updates_and_deletes(motor_db):
+    sync = motor_db.delegate
+    sushi = create(motor_db, restaurant("Japanese", "3 Stars", "Kyoto, Japan", 4.8))
+    assert summary(sync) == rebuilt_summary(sync)
+
+    async def update():
+        after = {**sushi, "michelin_info": {**sushi["michelin_info"], "Award": "2 Stars", "Location": "Tokyo, Japan"}}
+        await motor_db.restaurants.replace_one({"_id": sushi["_id"]}, after)
+        await update_rollups(motor_db, sushi, after)
+        return after
+    moved = asyncio.run(update())
+    assert summary(sync) == rebuilt_summary(sync)
+    # Kyoto lost its only starred restaurant, so its groups are gone
+    assert sync.restaurants_per_city.find_one({"_id": {"City": "Kyoto", "Country": "Japan"}}) is None
+
+    async def delete():
+        await motor_db.restaurants.delete_one({"_id": moved["_id"]})
+        await apply_rollup_delta(motor_db, moved, -1)
+    asyncio.run(delete())
+    assert summary(sync) == rebuilt_summary(sync)
+
+def test_rebuild_keeps_deltas_applied_after_its_scan(motor_db):
+    sync = motor_db.delegate
+    started = datetime.now(timezone.utc)
+    result = next(sync.restaurants.aggregate(rollup_pipeline()))
+    # Written after the scan read the restaurants, before the swap
+    create(motor_db, restaurant("Peruvian", "3 Stars", "Lima, Peru", 4.7))
+    write_rollups(sync, result, "restaurants", started)
+    assert summary(sync) == rebuilt_summary(sync)
+    assert sync.restaurants_per_cuisine.find_one({"_id": "Peruvian"})["total_restaurants"] == 1
+
+def test_rebuild_does_not_count_a_scanned_delta_twice(motor_db):
+    sync = motor_db.delegate
+    started = datetime.now(timezone.utc)
+    # Written while the scan is starting: the scan already sees it
+    create(motor_db, restaurant("French", "2 Stars", "Paris, France", 4.1))
+    result = next(sync.restaurants.aggregate(rollup_pipeline()))
+    write_rollups(sync, result, "restaurants", started)
+    assert summary(sync) == rebuilt_summary(sync)
+    assert sync.restaurants_per_city.find_one({"_id": {"City": "Paris", "Country": "France"}})["total_restaurants"] == 2
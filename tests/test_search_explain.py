@@ -0,0 +1,46 @@
+"""Restaurant search filters must be answered from indexes; needs a MongoDB server (MONGODB_URI)."""
+import os
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from api.app.services.mongo_search import build_search_query
+from common.restaurants import with_shadow_fields
+from benchmarks.mongo_explain_check import CASES, stages
+from pipeline.mongo_loader import ensure_indexes
+
+RESTAURANTS = [
+    ("Le Bernardin", "Seafood", "New York, USA", "$$$$"),
+    ("Sushi Saito", "Japanese", "Tokyo, Japan", "€€€€"),
+    ("Le Cinq", "Modern Cuisine", "Paris, France", "€€€€"),
+    ("Ramen Nagi", "Japanese", "Tokyo, Japan", "€€"),
+]
+
+@pytest.fixture(scope="module")
+def collection():
+    client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017"), serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip("No MongoDB server reachable")
+    db = client["michelin_explain_test"]
+    db.restaurants.drop()
+    ensure_indexes(db.restaurants)
+    db.restaurants.insert_many([
+        with_shadow_fields({
+            "Name": name,
+            "restaurant_key": name,
+            "michelin_info": {"Cuisine": cuisine, "Location": location, "Price": price,
+                              "Description": "omakase sushi counter" if cuisine == "Japanese" else "tasting menu"},
+        })
+        for name, cuisine, location, price in RESTAURANTS
+    ])
+    yield db.restaurants
+    client.drop_database(db.name)
+    client.close()
+
+@pytest.mark.parametrize("filters", CASES.values(), ids=list(CASES))
+def test_search_uses_an_index(collection, filters):
+    explain = collection.find(build_search_query(**filters)).sort("_id", 1).limit(10).explain()
+    plan_stages = set(stages(explain["queryPlanner"]["winningPlan"]))
+    assert "COLLSCAN" not in plan_stages
+    assert plan_stages & {"IXSCAN", "TEXT", "TEXT_MATCH"}
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from api.app.main import app
+
+SEARCH = "/api/v1/search/search"
+FACETS = "/api/v1/search/facets"
+
+FILTERS = [
+    {"cuisine": "japanese"},
+    {"cuisine": "French", "price": "$$"},
+    {"location": "japan", "award": "star"},
+    {"location": "Paris", "has_green_star": True},
+    {"facilities": ["Terrace"]},
+    {"facilities": ["terrace", "car park"], "price": "$$$$"},
+    {"award": "michelin"},
+]
+
+def baseline(frame, cuisine=None, price=None, location=None, award=None, has_green_star=None, facilities=None):
+    """The pandas masks the service used before the columnar store (green star read as a number)"""
+    mask = pd.Series(True, index=frame.index)
+    if cuisine:
+        mask &= frame["Cuisine"].astype(str).str.contains(cuisine, case=False, na=False, regex=False)
+    if price:
+        mask &= frame["Price"].astype(str) == price
+    if location:
+        mask &= frame["Location"].astype(str).str.contains(location, case=False, na=False, regex=False)
+    if award:
+        mask &= frame["Award"].astype(str).str.contains(award, case=False, na=False, regex=False)
+    if has_green_star is not None:
+        mask &= (pd.to_numeric(frame["GreenStar"], errors="coerce").fillna(0) > 0) == has_green_star
+    for facility in facilities or []:
+        mask &= frame["FacilitiesAndServices"].astype(str).str.contains(facility, case=False, na=False, regex=False)
+    return frame[mask]
+
+@pytest.fixture
+def client(dataset):
+    return TestClient(app)
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_filters_match_the_pandas_baseline(client, frame, filters):
+    expected = baseline(frame, **filters)
+    body = client.get(SEARCH, params={**filters, "limit": 100}).json()
+    assert body["total"] == len(expected)
+    assert [result["name"] for result in body["results"]] == list(expected["Name"][:100])
+
+@pytest.mark.parametrize("filters", FILTERS[:4] + [{}])
+def test_facet_counts_match_the_pandas_baseline(client, frame, filters):
+    expected = baseline(frame, **filters)
+    facilities = expected["FacilitiesAndServices"].str.split(",").explode().value_counts()
+    body = client.get(FACETS, params=filters).json()
+    assert body["total"] == len(expected)
+    assert body["facilities"] == {name: int(count) for name, count in facilities.items()}
+    assert list(body["facilities"].values()) == sorted(body["facilities"].values(), reverse=True)
@@ -0,0 +1,42 @@
+import pytest
+from fastapi.testclient import TestClient
+from api.app.main import app
+from api.app.services.pagination import encode_cursor
+
+SEARCH = "/api/v1/search/search"
+
+@pytest.fixture
+def client(dataset):
+    return TestClient(app)
+
+def pages(client, params):
+    names, cursor = [], None
+    while True:
+        body = client.get(SEARCH, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        names += [result["name"] for result in body["results"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            return names
+
+@pytest.mark.parametrize("params", [{"cuisine": "Japanese"}, {"query": "tasting menu"}], ids=["filtered", "ranked"])
+def test_cursor_pages_cover_the_results_once(client, params):
+    everything = client.get(SEARCH, params={**params, "limit": 100}).json()
+    names = pages(client, {**params, "limit": 7})
+    assert len(names) == everything["total"] > 7
+    assert names[:100] == [result["name"] for result in everything["results"]]
+    assert len(set(names)) == len(names)
+
+def test_cursor_from_another_dataset_version_is_rejected(client):
+    cursor = client.get(SEARCH, params={"limit": 5}).json()["next_cursor"]
+    stale = encode_cursor({"v": "older", "row": 4})
+    assert client.get(SEARCH, params={"limit": 5, "cursor": cursor}).status_code == 200
+    response = client.get(SEARCH, params={"limit": 5, "cursor": stale})
+    assert response.status_code == 400 and "restart pagination" in response.json()["detail"]
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor({"v": "test"}), encode_cursor([1, 2])])
+def test_invalid_cursor_is_a_bad_request(client, cursor):
+    assert client.get(SEARCH, params={"cursor": cursor}).status_code == 400
+
+@pytest.mark.parametrize("params", [{"limit": -1}, {"limit": 0}, {"limit": 101}, {"skip": -5}])
+def test_out_of_range_paging_is_rejected(client, params):
+    assert client.get(SEARCH, params=params).status_code == 422
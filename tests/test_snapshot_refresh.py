@@ -0,0 +1,76 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from api.app.services.michelin_service import MichelinService
+from benchmarks.blocking_load_test import synthetic_frame
+
+class CsvUpstream:
+    """Local stand-in for the dataset URL: serves `body` with an ETag and answers 304 to a matching If-None-Match"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.downloads = 0
+        self.not_modified = 0
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                etag = f'"{hashlib.sha1(upstream.body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    upstream.not_modified += 1
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                upstream.downloads += 1
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(upstream.body)))
+                self.end_headers()
+                self.wfile.write(upstream.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/michelin.csv"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+def csv_bytes(count, seed=0):
+    return synthetic_frame(count, seed).to_csv(index=False).encode("utf-8")
+
+@pytest.fixture
+def upstream(monkeypatch):
+    server = CsvUpstream(csv_bytes(20))
+    monkeypatch.setenv("MICHELIN_CSV_URL", server.url)
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+def test_first_load_downloads_and_later_processes_map_the_snapshot(upstream, tmp_path):
+    store = MichelinService(str(tmp_path)).load()
+    assert store.size == 20 and upstream.downloads == 1
+    # Another worker on the same snapshot directory never touches the network
+    assert MichelinService(str(tmp_path)).load().version == store.version
+    assert upstream.downloads == 1
+
+def test_refresh_is_conditional(upstream, tmp_path):
+    service = MichelinService(str(tmp_path))
+    version = service.load().version
+    assert service.refresh() is False
+    assert upstream.not_modified == 1 and service.version == version
+
+def test_refresh_swaps_in_changed_data_and_shares_it(upstream, tmp_path):
+    service, other = MichelinService(str(tmp_path)), MichelinService(str(tmp_path))
+    version = service.load().version
+    other.load()
+    reloaded = []
+    service.add_reload_listener(reloaded.append)
+
+    upstream.body = csv_bytes(30, seed=1)
+    assert service.refresh() is True
+    assert service.version != version and service.load().size == 30
+    assert [store.size for store in reloaded] == [30]
+    # The other process picks up the new snapshot instead of downloading it again
+    assert other.refresh() is True and other.version == service.version
+    assert upstream.downloads == 2
@@ -0,0 +1,77 @@
+from math import atan2, cos, radians, sin, sqrt
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from api.app.main import app
+from api.app.services.spatial_index import SpatialIndex
+
+POINTS = [(48.8566, 2.3522), (35.6762, 139.6503), (-12.0464, -77.0428), (0.0, 179.9)]
+
+def haversine(lat1, lon1, lat2, lon2):
+    """The row-by-row formula the pandas implementation used"""
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+def baseline(frame, latitude, longitude):
+    """(distance, name) of every restaurant with coordinates, nearest first"""
+    located = frame.dropna(subset=["Latitude", "Longitude"])
+    return sorted(
+        (haversine(latitude, longitude, float(row.Latitude), float(row.Longitude)), row.Name)
+        for row in located.itertuples()
+    )
+
+@pytest.fixture
+def frame(frame):
+    # Some restaurants have no coordinates and must be skipped
+    frame.loc[::17, ["Latitude", "Longitude"]] = np.nan
+    return frame
+
+@pytest.fixture
+def client(dataset):
+    return TestClient(app)
+
+@pytest.mark.parametrize("latitude, longitude", POINTS)
+def test_nearest_matches_the_pandas_haversine(client, frame, latitude, longitude):
+    expected = baseline(frame, latitude, longitude)[:8]
+    body = client.get("/api/v1/search/nearest", params={"latitude": latitude, "longitude": longitude, "limit": 8}).json()
+    assert [entry["restaurant"]["name"] for entry in body] == [name for _, name in expected]
+    assert [entry["distance_km"] for entry in body] == pytest.approx([round(d, 2) for d, _ in expected], abs=0.011)
+
+@pytest.mark.parametrize("latitude, longitude", POINTS)
+def test_radius_matches_the_pandas_haversine(client, frame, latitude, longitude):
+    radius = 3000
+    expected = [(d, name) for d, name in baseline(frame, latitude, longitude) if d <= radius][:50]
+    body = client.get("/api/v1/search/radius", params={
+        "latitude": latitude, "longitude": longitude, "radius_km": radius, "limit": 50,
+    }).json()
+    assert [entry["restaurant"]["name"] for entry in body] == [name for _, name in expected]
+    assert [entry["distance_km"] for entry in body] == pytest.approx([d for d, _ in expected], rel=1e-6)
+
+def test_batch_follows_the_input_order(client, frame):
+    points = POINTS[::-1] + POINTS[:1]
+    body = client.post("/api/v1/search/nearest/batch", json={
+        "points": [{"latitude": lat, "longitude": lon} for lat, lon in points], "limit": 3,
+    }).json()
+    assert len(body) == len(points)
+    for (latitude, longitude), entries in zip(points, body):
+        assert [entry["restaurant"]["name"] for entry in entries] == [
+            name for _, name in baseline(frame, latitude, longitude)[:3]
+        ]
+
+@pytest.mark.parametrize("path, params", [
+    ("/api/v1/search/nearest", {"limit": -1}),
+    ("/api/v1/search/nearest", {"limit": 0}),
+    ("/api/v1/search/radius", {"radius_km": 10, "limit": -1}),
+    ("/api/v1/search/radius", {"radius_km": 0}),
+    ("/api/v1/search/radius", {"radius_km": -5}),
+])
+def test_invalid_limits_and_radius_are_rejected(client, path, params):
+    assert client.get(path, params={"latitude": 48.85, "longitude": 2.35, **params}).status_code == 422
+
+def test_index_rejects_limits_below_one():
+    index = SpatialIndex(np.array([48.85, 35.67]), np.array([2.35, 139.65]))
+    for query in (lambda: index.nearest(0, 0, 0), lambda: index.within_radius(0, 0, 100, -1),
+                  lambda: index.nearest_batch([0], [0], -2)):
+        with pytest.raises(ValueError):
+            query()
@@ -0,0 +1,13 @@
+from api.app.services.text_index import TextIndex
+
+def test_prefix_matches_every_completion_beyond_the_scoring_cap():
+    count = TextIndex.MAX_EXPANSIONS * 2
+    names = [f"sushi{i:03d} tokyo" for i in range(count)] + ["sushi tokyo", "ramen tokyo"]
+    index = TextIndex.build(len(names), [(names, 1.0)])
+    rows, _ = index.search("sush tokyo")
+    assert sorted(rows.tolist()) == list(range(count + 1))
+
+def test_every_token_must_match():
+    names = ["sushi tokyo", "sushi paris", "ramen tokyo"]
+    index = TextIndex.build(len(names), [(names, 1.0)])
+    assert index.search("sus tok")[0].tolist() == [0]